@@ -1,72 +1,133 @@
 # data_reduce.py  ─ çalıştırma dizini:  data\
-import os, glob, math, json
+# Dil dosyalarından yıldız dağılımını koruyan (katmanlı) örneklem çıkarır.
+#
+# * İndeks seçimi için yalnızca puan kolonu okunur; kotalar ve satır seçimi NumPy ile tek geçişte
+#   hesaplanır (her yıldız grubunda tohumlu permütasyon → deterministik).
+# * Seçilen satırlar row group row group okunup Arrow `take` ile yazılır; tablonun tamamı
+#   belleğe alınmaz.
+# * Birden çok dil dosyası paralel işlenir (Arrow / NumPy işlemleri GIL'i bırakır).
+#
+# Kullanım:  python data/data_reduce.py [--workers 4] [--seed 42]
+import argparse
+import glob
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
-from collections import Counter
-from datasets import Dataset, concatenate_datasets
 
 DATA_DIR = os.path.dirname(__file__)
 
 TARGET = {
-    "fr": 70_000,    # mutlak adet
+    "fr": 70_000,    # mutlak adet (float verilirse oran, ör. 0.1)
     "es": 70_000,
     "ja": 30_000,
     "zh": 30_000,
     # en / de belirtilmedi ⇒ atlanır
 }
+SEED = 42
 
-def stratified_sample(ds: Dataset, n: int | float) -> Dataset:
-    rating_col = "stars" if "stars" in ds.column_names else "label"
 
-    # ORAN verildiyse (float)
+def quotas(counts: np.ndarray, n: int | float) -> np.ndarray:
+    """
+    Grup başına örnek sayısı: oransal tabana yuvarlanır, artan adetler en büyük kesirli
+    paya sahip gruplara dağıtılır (toplam tam olarak `n`, hiçbir kota grup boyunu aşmaz).
+    """
+    total = int(counts.sum())
     if isinstance(n, float):
-        return ds.train_test_split(
-            test_size=n,
-            stratify_by_column=rating_col,
-            seed=42,
-        )["test"]
-
-    # MUTLAK adet (int)
-    counts = Counter(ds[rating_col])  # {1: 45000, 2: ...}
-    per_star = {s: math.floor(c * n / len(ds)) for s, c in counts.items()}
-
-    buckets = []
-    for star, k in per_star.items():
-        subset = ds.filter(lambda r: r[rating_col] == star, keep_in_memory=False)
-        buckets.append(subset.shuffle(seed=42).select(range(k)))
-
-    sample = concatenate_datasets(buckets)
-
-    # Eksiğimiz varsa rastgele tamamla
-    missing = n - len(sample)
-    if missing > 0:
-        extra = ds.filter(lambda r: r[rating_col] not in sample[rating_col], keep_in_memory=False)
-        sample = concatenate_datasets(
-            [sample, extra.shuffle(seed=42).select(range(missing))]
-        )
-
-    # label kolonunu stars'a dönüştür
-    if rating_col == "label":
-        sample = sample.map(
-            lambda r: {"stars": int(r["label"]) + 1},
-            remove_columns=["label"],
-            num_proc=1,
-        )
-    return sample
-
-for path in glob.glob(os.path.join(DATA_DIR, "*.parquet")):
-    lang = os.path.basename(path).split(".")[0]
-    rule = TARGET.get(lang)
-
-    if rule is None:
-        print(f"{lang}: atlanıyor (değiştirilmedi)")
-        continue
-
-    print(f"{lang}: örnekleniyor…")
-    ds = Dataset(pq.read_table(path))
-    sampled = stratified_sample(ds, rule)
-
-    out_path = path.replace(".parquet", "_sample.parquet")
-    sampled.to_parquet(out_path)
-    print(f"{lang}: {len(sampled):,} satır → {out_path}")
-
-print("✅  Tüm örnekleme tamamlandı.")
+        n = math.ceil(n * total)
+    n = min(int(n), total)
+    if total == 0:
+        return np.zeros_like(counts)
+    exact = counts * (n / total)
+    q = np.floor(exact).astype(np.int64)
+    rest = n - int(q.sum())
+    if rest > 0:
+        q[np.argsort(q - exact, kind="stable")[:rest]] += 1
+    return q
+
+
+def stratified_indices(ratings: np.ndarray, n: int | float, seed: int = SEED) -> np.ndarray:
+    """Katmanlı örneklemin satır indeksleri (artan sırada)."""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(ratings))                       # rastgele sıra
+    grouped = order[np.argsort(ratings[order], kind="stable")]  # yıldıza göre grupla, grup içi rastgele
+    _, starts, counts = np.unique(ratings[grouped], return_index=True, return_counts=True)
+    rank = np.arange(len(grouped)) - np.repeat(starts, counts)  # grup içindeki sıra
+    return np.sort(grouped[rank < np.repeat(quotas(counts, n), counts)])
+
+
+def stratified_sample(path: str, n: int | float, out_path: str, seed: int = SEED) -> int:
+    """`path` dosyasından katmanlı örneklemi `out_path`'e yazar; yazılan satır sayısını döner."""
+    pf = pq.ParquetFile(path)
+    names = pf.schema_arrow.names
+    rating_col = "stars" if "stars" in names else "label"
+
+    # Yalnızca puan kolonu okunur
+    ratings = pc.fill_null(pq.read_table(path, columns=[rating_col]).column(rating_col), -1).to_numpy()
+    idx = stratified_indices(ratings, n, seed)
+
+    writer = None
+    rows = 0
+    start = 0
+    try:
+        for i in range(pf.num_row_groups):
+            size = pf.metadata.row_group(i).num_rows
+            lo, hi = np.searchsorted(idx, [start, start + size])
+            if hi > lo:
+                part = pf.read_row_group(i).take(pa.array(idx[lo:hi] - start))
+                # label kolonunu stars'a dönüştür (0-4 → 1-5)
+                if rating_col == "label":
+                    stars = pc.add(pc.cast(part.column("label"), pa.int64()), 1)
+                    part = part.drop_columns(["label"]).append_column("stars", stars)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path + ".tmp", part.schema)
+                writer.write_table(part)
+                rows += part.num_rows
+            start += size
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(out_path + ".tmp")
+        raise
+    if writer is None:
+        return 0
+    writer.close()
+    os.replace(out_path + ".tmp", out_path)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Dil dosyalarından yıldız dağılımını koruyan örneklem çıkarır")
+    ap.add_argument("--data-dir", default=DATA_DIR)
+    ap.add_argument("--workers", type=int, default=4, help="Paralel işlenen dil dosyası sayısı")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args(argv)
+
+    jobs = {}
+    for path in sorted(glob.glob(os.path.join(args.data_dir, "*.parquet"))):
+        lang = os.path.basename(path).split(".")[0]
+        rule = TARGET.get(lang)
+
+        if rule is None:
+            print(f"{lang}: atlanıyor (değiştirilmedi)")
+            continue
+        jobs[lang] = (path, rule, path.replace(".parquet", "_sample.parquet"))
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {}
+        for lang, (path, rule, out_path) in jobs.items():
+            print(f"{lang}: örnekleniyor…")
+            futures[pool.submit(stratified_sample, path, rule, out_path, args.seed)] = lang
+        for fut in as_completed(futures):
+            lang = futures[fut]
+            print(f"{lang}: {fut.result():,} satır → {jobs[lang][2]}")
+
+    print("✅  Tüm örnekleme tamamlandı.")
+
+
+if __name__ == "__main__":
+    main()
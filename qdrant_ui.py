@@ -4,22 +4,29 @@
 * 6 dil (en, es, fr, de, zh, ja)
 * Dil filtresi opsiyonel
 * Sonuç limiti 1‑8
-* Yeni yorum eklerken PointStruct artık `id` ister → uuid4() kullanıyoruz
+* Yeni yorumlar paylaşılan yazma tamponuyla (src/write_buffer.py) batch halinde eklenir; id → uuid4()
 """
 
 from __future__ import annotations
 
+import time
 import warnings
 from typing import Sequence
-from uuid import uuid4
 
 import matplotlib.pyplot as plt  # noqa: F401  (Plotly bizde esas, ama ihtiyaç halinde)
 import pandas as pd
 import streamlit as st
-from fastembed import TextEmbedding
-from qdrant_client.http.models import PointStruct
 
-from src.qdrant_setup import client
+from src import clients
+from src.clients import collection_target, get_client
+from src.langid import best as detect_language, route
+from src.local_index import LocalEngine
+from src.model_registry import collection_models, get_spec
+from src.projection import project
+from src.query_cache import QueryCache, vector_digest
+from src.query_metrics import QueryMetrics
+from src.search import search_params, search_shards
+from src.write_buffer import WriteBuffer
 from src.config import settings
 
 # -----------------------------------------------------------------------------
@@ -35,10 +42,42 @@ st.set_page_config(
 )
 
 
+def get_embedder(model: str | None = None):
+    """Süreç genelinde paylaşılan, sorgu önbellekli embedder (ilk çağrıda yüklenir; varsayılan MODEL_NAME)."""
+    return clients.get_embedder(namespace="queries", model=model)
+
+
+@st.cache_resource(show_spinner="Loading embedding model…")
+def warm_up() -> dict:
+    """Sunucu başladıktan sonraki ilk oturumda modeli yükleyip ısıtır; ilk arama beklemez."""
+    return clients.warm_up(namespace="queries", ping=False)
+
+
+@st.cache_resource(show_spinner=False)
+def get_local_engine() -> LocalEngine:
+    """Qdrant'a ulaşılamadığında kullanılan yerel tam-arama motoru."""
+    return LocalEngine(settings.LOCAL_INDEX_DIR)
+
+
 @st.cache_resource(show_spinner=False)
-def get_embedder() -> TextEmbedding:
-    """Embedder nesnesini tek sefer oluşturup bellekte tutar."""
-    return TextEmbedding(settings.MODEL_NAME, device=settings.DEVICE)
+def get_query_cache() -> QueryCache:
+    """Tüm oturumların paylaştığı sorgu vektörü LRU'su + sonuç önbelleği."""
+    return QueryCache(settings.QUERY_CACHE_SIZE, settings.RESULT_CACHE_TTL, settings.RESULT_CACHE_SIZE)
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_buffer() -> WriteBuffer:
+    """Tüm oturumların paylaştığı arka plan yazıcısı; eş zamanlı eklemeler tek embed + shard başına tek upsert."""
+    # Yazım kalıcı olunca o shard'ın önbellekteki arama sonuçları bayatlar
+    return WriteBuffer(on_written=get_query_cache().invalidate)
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_metrics() -> QueryMetrics:
+    """Süreç başına tek metrik kaydı; QUERY_METRICS_PORT > 0 ise /metrics uç noktası da açılır."""
+    metrics = QueryMetrics()
+    metrics.serve(settings.QUERY_METRICS_PORT)
+    return metrics
 
 
 # Desteklenen diller
@@ -67,46 +106,87 @@ def _badge(code: str) -> str:
     )
 
 
-def query_qdrant(text: str, langs: Sequence[str], limit: int) -> pd.DataFrame:
-    """Seçili shard'lar üzerinde arama yapar; **skoruna göre global ilk `limit` satırı** döner."""
+def query_qdrant(
+    text: str,
+    langs: Sequence[str],
+    limit: int,
+    rescore: bool | None = None,
+    oversampling: float | None = None,
+    model: str | None = None,
+) -> pd.DataFrame:
+    """Seçili shard'lar üzerinde arama yapar; **skoruna göre global ilk `limit` satırı** döner.
+
+    `rescore` / `oversampling` nicemlenmiş (quantized) koleksiyonlarda aday sayısını ve
+    orijinal vektörlerle yeniden puanlamayı kontrol eder (None → ayarlardaki değer).
+    `model` sorguyu embed eden modeldir; aranan named vector ondan seçilir (None → MODEL_NAME).
+    """
     if not text:
         return pd.DataFrame()
 
-    if not langs:
-        # Dil filtresi seçilmediyse tüm dillerde ara
-        langs = LANG_OPTS
-
-    vec = next(get_embedder().embed([text]))
-    collected: list[dict] = []
-
-    for lang in langs:
-        try:
-            # Yıldız filtresi tamamen kaldırıldı → sade sorgu
-            resp = client.query_points(
-                collection_name=settings.COLLECTION,
-                query=vec,
-                limit=limit,               # shard başına getir
-                with_payload=True,
-                shard_key_selector=lang,
-            )
-            collected.extend(
-                {
-                    "language": p.payload.get("language", lang),
-                    "stars": p.payload.get("stars"),
-                    "score": round(p.score, 3),
-                }
-                for p in resp.points
-            )
-        except Exception as exc:
-            st.error(f"Qdrant query failed for shard '{lang}': {exc}")
-
-    if not collected:
-        return pd.DataFrame()
+    spec = get_spec(model)
+    qc = get_query_cache()
+    qm = get_query_metrics()
+    started = time.perf_counter()
+    embedded = []
 
-    # Skora göre ilk N
-    df_all = pd.DataFrame(collected)
-    df_top = df_all.sort_values("score", ascending=False).head(limit).reset_index(drop=True)
-    return df_top
+    if not langs:
+        # Dil filtresi seçilmediyse sorgu dili tanınır ve yalnızca olası dillerin shard'ları aranır;
+        # güven LANG_ROUTE_THRESHOLD'un altındaysa (ya da yönlendirme kapalıysa) tüm dillerde ara
+        langs = route(text, LANG_OPTS) if settings.LANG_ROUTING else LANG_OPTS
+        qm.observe("route", time.perf_counter() - started)
+        qm.routed(len(langs), fanout=len(langs) == len(LANG_OPTS))
+        if len(langs) < len(LANG_OPTS):
+            st.caption(f"Auto-detected language → searching: {', '.join(langs)}")
+
+    def embed(t):
+        embedded.append(t)
+        return next(get_embedder(spec.name).embed(spec.query_texts([t])))
+
+    # Aynı metin tekrar aranırsa model çalışmaz, vektör LRU'dan gelir.
+    # PCA projeksiyonu LRU'dan sonra uygulanır: alias yeni sürüme geçip projeksiyon dosyası
+    # değiştiğinde önbellekteki vektörler bayatlamaz (sonuç anahtarı da projeksiyonlu vektörden türer).
+    t0 = time.perf_counter()
+    vec = project(qc.vectors.get_or_embed(spec.name, text, embed), model=spec.name)
+    qm.observe("embed", time.perf_counter() - t0)
+    qm.cache_access("vector", hit=not embedded)
+
+    params = search_params(rescore=rescore, oversampling=oversampling)
+    # Alias'ın hedefi anahtarda: reindex geçişinden sonra eski sürümün sonuçları önbellekten dönmez
+    extra = (rescore, oversampling, spec.vector, collection_target())
+    key = qc.results.key(vector_digest(vec), langs, (), limit, extra=extra)
+    res = qc.results.get(key)
+    qm.cache_access("result", hit=res is not None)
+    if res is None:
+        # Nesiller aramadan önce alınır: arama sürerken gelen bir yazım sonucu bayatlatırsa saklanmaz
+        gens = qc.results.snapshot(key)
+        # Tüm shard'lar eşzamanlı sorgulanır; yavaş/hatalı shard sonucu bekletmez, yalnızca eksiltir
+        res = search_shards(
+            get_client(),
+            settings.COLLECTION,
+            vec,
+            langs,
+            limit,                       # shard başına ve global ilk N
+            timeout=settings.SEARCH_TIMEOUT,
+            params=params,
+            metrics=qm,                  # shard başına gecikme + birleştirme süresi
+            using=spec.vector,           # sorguyu embed eden modelin named vector'ü
+        )
+        if not res.degraded:
+            # Eksik (bazı shard'ları düşmüş) sonuçlar önbelleğe alınmaz
+            qc.results.put(key, res, gens)
+        elif settings.LOCAL_FALLBACK and len(res.failed) == len(langs) and spec.name == settings.MODEL_NAME:
+            # Küme tamamen erişilemez → yerel memmap indeksinden tam arama
+            engine = get_local_engine()
+            if engine.available(langs):
+                st.info("Qdrant unreachable — results served from the local index.")
+                t0 = time.perf_counter()
+                res = engine.search(vec, langs, limit)
+                qm.observe("local", time.perf_counter() - t0)
+    qm.observe("total", time.perf_counter() - started)
+    for lang, reason in res.failed.items():
+        st.warning(f"Shard '{lang}' skipped: {reason}")
+
+    return pd.DataFrame(res.records())
 
 
 def show_table(df: pd.DataFrame) -> None:
@@ -204,17 +284,38 @@ st.sidebar.header("Filters")
 sel_langs = st.sidebar.multiselect("Languages (optional)", LANG_OPTS)
 limit = st.sidebar.slider("Result limit", 1, 8, 8)
 
+# Nicemleme (quantization) açıksa doğruluk/hız dengesi buradan ayarlanır
+with st.sidebar.expander("Advanced search", expanded=False):
+    st.caption(f"Quantization: {settings.QUANTIZATION}")
+    sel_rescore = st.checkbox("Rescore with original vectors", value=settings.SEARCH_RESCORE)
+    sel_oversampling = st.slider("Oversampling", 1.0, 4.0, float(settings.SEARCH_OVERSAMPLING), 0.5)
+    # Geçiş (A/B) sırasında koleksiyonda birden çok modelin vektörü varsa sorgu modeli seçilebilir
+    model_opts = [m.name for m in collection_models()]
+    sel_model = st.selectbox("Embedding model", model_opts) if len(model_opts) > 1 else settings.MODEL_NAME
+
 
 # -----------------------------------------------------------------------------
 # Ana arayüz
 # -----------------------------------------------------------------------------
 
+warm_up()
+
 st.title("🔍 Multilingual Review Search")
 query = st.text_input("Enter your search query", placeholder="Great and affordable headphones…")
 
 if st.button("Search"):
     with st.spinner("Searching…"):
-        df = query_qdrant(query, sel_langs, limit)
+        df = query_qdrant(query, sel_langs, limit, sel_rescore, sel_oversampling, sel_model)
+
+    # Önbellek isabet/ıskalama istatistikleri (model süresi ne kadar kazanıldı?)
+    cache = getattr(get_embedder(sel_model), "cache", None)
+    if cache is not None:
+        st.sidebar.caption(cache.report())
+    qs = get_query_cache().stats()
+    st.sidebar.caption(
+        f"Query cache: vectors {qs['vector_hit_rate']:.0%} hit, "
+        f"results {qs['result_hit_rate']:.0%} hit, {qs['invalidations']} invalidations"
+    )
 
     tab_res, tab_gfx = st.tabs(["Results", "Graphs"])
     with tab_res:
@@ -225,6 +326,35 @@ if st.button("Search"):
         show_graphs(df)
 
 
+# -----------------------------------------------------------------------------
+# Tanılama paneli: hangi aşama / hangi dil shard'ı kuyruk gecikmesine yol açıyor?
+# -----------------------------------------------------------------------------
+
+with st.sidebar.expander("Diagnostics", expanded=False):
+    qm = get_query_metrics()
+    snap = qm.snapshot()
+    if not snap:
+        st.caption("No searches yet.")
+    else:
+        st.caption("Rolling latency (last requests), ms")
+        st.dataframe(pd.DataFrame(snap), hide_index=True, use_container_width=True)
+        rates = qm.cache_hit_rates()
+        if rates:
+            st.caption("Cache hit rate: " + ", ".join(f"{k} {v:.0%}" for k, v in sorted(rates.items())))
+        errors = qm.errors()
+        if errors:
+            st.caption("Shard failures: " + ", ".join(f"{k} {v}" for k, v in sorted(errors.items())))
+    ws = get_write_buffer().stats()
+    if ws["flushes"]:
+        st.caption(
+            f"Write buffer: {ws['writes']} saved, {ws['failed']} failed in {ws['flushes']} flushes "
+            f"({ws['points_per_flush']:.1f} reviews / flush, {ws['requests']} upserts)"
+        )
+    if settings.QUERY_METRICS_PORT > 0:
+        st.caption(f"Prometheus: :{settings.QUERY_METRICS_PORT}/metrics")
+    st.download_button("Export metrics", qm.registry.render().encode(), "query_metrics.prom", "text/plain")
+
+
 # -----------------------------------------------------------------------------
 # Yeni yorum ekle (backend aynı, arayüz İngilizce)
 # -----------------------------------------------------------------------------
@@ -233,19 +363,27 @@ with st.expander("Add new review to database"):
     new_text = st.text_input("Review text")
     c1, c2 = st.columns(2)
     with c1:
-        new_lang = st.selectbox("Language", LANG_OPTS)
+        # "auto": shard-key yorum metninden tanınır (bkz. src/langid.py)
+        new_lang = st.selectbox("Language", ["auto", *LANG_OPTS])
     with c2:
         new_star = st.selectbox("Stars", [1, 2, 3, 4, 5], index=4)
 
     if st.button("Save to DB") and new_text:
-        vec = next(get_embedder().embed([new_text]))
-        point = PointStruct(
-            id=str(uuid4()),
-            vector=vec,
-            payload={"language": new_lang, "stars": new_star},
-        )
-        client.upsert(settings.COLLECTION, [point], shard_key_selector=new_lang)
-        st.success("Review added!")
+        if new_lang == "auto":
+            new_lang = detect_language(new_text, langs=LANG_OPTS)
+        if new_lang is None:
+            st.warning("Could not detect the review language confidently — please select it.")
+        else:
+            # Yorum paylaşılan yazıcıya verilir: diğer oturumların eklemeleriyle birlikte embed edilir
+            # (her koleksiyon modelinin named vector'ü) ve shard başına tek upsert ile yazılır.
+            # Future, nokta Qdrant'a kalıcı olarak yazılınca (ve önbellek geçersizleşince) sonuçlanır.
+            with st.spinner("Saving…"):
+                try:
+                    get_write_buffer().write(new_text, new_lang, {"stars": new_star}, timeout=settings.WRITE_TIMEOUT)
+                except Exception as exc:  # noqa: BLE001
+                    st.error(f"Review could not be saved: {exc}")
+                else:
+                    st.success(f"Review added to the '{new_lang}' shard!")
 
 
 st.caption("Built with Streamlit • Powered by FastEmbed & Qdrant")
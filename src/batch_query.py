@@ -0,0 +1,231 @@
+# src/batch_query.py
+# Çevrim dışı değerlendirme için toplu sorgu: sorgu dosyası → büyük batch'lerle embedding →
+# shard-key başına `query_batch_points` → JSONL / Parquet akışı.
+#
+# Kullanım:
+#   python -m src.batch_query Example.txt --langs en de --limit 10 --out results.jsonl
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from src.model_registry import get_spec
+from src.projection import project
+
+if TYPE_CHECKING:  # pragma: no cover
+    from qdrant_client import models
+
+LANGS = ["en", "de", "fr", "es", "ja", "zh"]
+
+# Example.txt başlıkları → dil kodu
+_HEADER_LANG = {
+    "english": "en", "german": "de", "deutsch": "de", "french": "fr", "français": "fr",
+    "spanish": "es", "español": "es", "japanese": "ja", "chinese": "zh",
+}
+# "★4: metin" biçimindeki satırlar
+_STAR_LINE = re.compile(r"^\s*★\s*(\d)\s*[:：]\s*(.+)$")
+# Bölüm ayırıcıları ("---", "===") sorgu değildir
+_SEPARATOR = re.compile(r"^[-=_*~]{3,}$")
+
+
+@dataclass
+class Query:
+    qid: int
+    text: str
+    lang: Optional[str] = None    # Dosyadaki başlıktan gelen dil (varsa)
+    stars: Optional[int] = None   # Beklenen yıldız (varsa)
+
+
+def load_queries(path: str) -> List[Query]:
+    """
+    Sorgu dosyasını okur. Her boş olmayan satır bir sorgudur; `Example.txt` biçimi
+    (dil başlığı + "★n: metin" satırları) tanınır ve dil/yıldız bilgisi korunur.
+    Ayırıcı satırlar atlanır. "English/Spanish" gibi karma başlıkların altındaki sorguların
+    dili belirsizdir (None); bunlar tek bir dilin shard'ına bağlanmaz.
+    """
+    queries: List[Query] = []
+    lang = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or _SEPARATOR.match(line):
+                continue
+            parts = [p.strip() for p in line.lower().split("/")]
+            if all(p in _HEADER_LANG for p in parts):
+                codes = {_HEADER_LANG[p] for p in parts}
+                lang = codes.pop() if len(codes) == 1 else None
+                continue
+            m = _STAR_LINE.match(line)
+            if m:
+                queries.append(Query(len(queries), m.group(2).strip(), lang, int(m.group(1))))
+            else:
+                queries.append(Query(len(queries), line, lang))
+    return queries
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_batch(
+    client,
+    embedder,
+    collection: str,
+    queries: Sequence[Query],
+    shard_keys: Sequence[str] = LANGS,
+    limit: int = 10,
+    batch_size: int = 256,
+    timeout: Optional[int] = None,
+    params: Optional[models.SearchParams] = None,
+    model: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Sorguları `batch_size`'lık parçalar halinde embed eder ve her parça için shard-key
+    başına tek bir `query_batch_points` isteği gönderir. Sonuç satırlarını akış olarak üretir:
+    qid, query, shard_key, rank, id, score, language, stars.
+    `params` rescore / oversampling / hnsw_ef gibi arama parametrelerini taşır.
+    `model` (varsayılan MODEL_NAME) sorgu önekini ve aranacak named vector'ü belirler;
+    `embedder` aynı modeli yüklemiş olmalı.
+    """
+    from qdrant_client import models
+
+    spec = get_spec(model)
+
+    for chunk in _chunks(list(queries), batch_size):
+        texts = spec.query_texts([q.text for q in chunk])
+        vecs = np.vstack(list(embedder.embed(texts))).astype(np.float32, copy=False)
+        vecs = project(vecs, collection, spec.name)   # koleksiyonun PCA projeksiyonu (varsa)
+        vec_lists = vecs.tolist()
+        for key in shard_keys:
+            requests = [
+                models.QueryRequest(
+                    query=v, using=spec.vector, limit=limit, with_payload=True, shard_key=key, params=params
+                )
+                for v in vec_lists
+            ]
+            try:
+                responses = client.query_batch_points(collection, requests=requests, timeout=timeout)
+            except Exception as exc:  # noqa: BLE001 — bir shard düşerse diğerleri devam eder
+                logger.error(f"{key}: toplu sorgu başarısız ({len(chunk)} sorgu): {exc}")
+                continue
+            for q, resp in zip(chunk, responses):
+                for rank, p in enumerate(resp.points, start=1):
+                    yield {
+                        "qid": q.qid,
+                        "query": q.text,
+                        "query_lang": q.lang,
+                        "query_stars": q.stars,
+                        "shard_key": key,
+                        "rank": rank,
+                        "id": str(p.id),
+                        "score": p.score,
+                        "language": (p.payload or {}).get("language", key),
+                        "stars": (p.payload or {}).get("stars"),
+                    }
+
+
+def write_jsonl(rows: Iterable[dict], path: str) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+def result_schema():
+    """`run_batch` satırlarının Arrow şeması (boş kolonlar `null` tipine düşmesin diye sabit)."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("qid", pa.int64()),
+        ("query", pa.string()),
+        ("query_lang", pa.string()),
+        ("query_stars", pa.int16()),
+        ("shard_key", pa.string()),
+        ("rank", pa.int32()),
+        ("id", pa.string()),
+        ("score", pa.float32()),
+        ("language", pa.string()),
+        ("stars", pa.int16()),
+    ])
+
+
+def write_parquet(rows: Iterable[dict], path: str, row_group: int = 50_000) -> int:
+    """Satırları bellekte biriktirmeden, `row_group`'luk parçalar halinde Parquet'e yazar."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = result_schema()
+    writer, buf, n = None, [], 0
+
+    def flush():
+        nonlocal writer
+        if writer is None:
+            writer = pq.ParquetWriter(path, schema)
+        writer.write_table(pa.Table.from_pylist(buf, schema=schema))
+        buf.clear()
+
+    try:
+        for row in rows:
+            buf.append(row)
+            n += 1
+            if len(buf) >= row_group:
+                flush()
+        if buf:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Sorgu dosyasını toplu olarak Qdrant'ta arar.")
+    ap.add_argument("queries", help="Her satırı bir sorgu olan dosya (Example.txt biçimi desteklenir)")
+    ap.add_argument("--langs", nargs="+", default=LANGS, help="Aranacak shard-key'ler")
+    ap.add_argument("--limit", type=int, default=10, help="Sorgu ve shard başına sonuç sayısı")
+    ap.add_argument("--batch-size", type=int, default=256, help="Embedding / istek batch boyutu")
+    ap.add_argument("--out", default="results.jsonl", help="Çıktı dosyası (.jsonl veya .parquet)")
+    # argparse.BooleanOptionalAction Python 3.9 ister; proje 3.8'i destekliyor
+    ap.add_argument("--rescore", dest="rescore", action="store_true", default=None,
+                    help="Nicemlenmiş adayları orijinal vektörlerle yeniden puanla (varsayılan: SEARCH_RESCORE)")
+    ap.add_argument("--no-rescore", dest="rescore", action="store_false",
+                    help="Yeniden puanlamayı kapat")
+    ap.add_argument("--oversampling", type=float, default=None, help="Nicemlenmiş aramada aday çarpanı")
+    ap.add_argument("--hnsw-ef", type=int, default=None, help="Arama zamanı HNSW ef değeri")
+    ap.add_argument("--model", default=None,
+                    help="Sorgu modeli (varsayılan MODEL_NAME); A/B için koleksiyondaki diğer modelin vektörü aranır")
+    args = ap.parse_args(argv)
+
+    from src.clients import get_client, get_embedder
+    from src.config import settings
+    from src.search import search_params
+
+    queries = load_queries(args.queries)
+    logger.info(f"{len(queries):,} sorgu × {len(args.langs)} shard aranıyor…")
+    embedder = get_embedder(namespace="batch", model=args.model)
+    params = search_params(rescore=args.rescore, oversampling=args.oversampling, hnsw_ef=args.hnsw_ef)
+    rows = run_batch(
+        get_client(), embedder, settings.COLLECTION, queries, args.langs, args.limit, args.batch_size,
+        params=params, model=args.model,
+    )
+
+    if os.path.splitext(args.out)[1].lower() == ".parquet":
+        n = write_parquet(rows, args.out)
+    else:
+        n = write_jsonl(rows, args.out)
+    logger.success(f"{n:,} sonuç satırı → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
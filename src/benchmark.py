@@ -0,0 +1,386 @@
+# src/benchmark.py
+# ANN arama parametreleri için geri çağırım (recall) / gecikme kıyaslama aracı.
+#
+# Sorgu kümesini bir koleksiyona karşı tekrar oynatır; saklı vektörlerden hesaplanan
+# tam (brute-force) komşularla karşılaştırıp shard-key başına recall@k ve p50/p95/p99
+# gecikmesini raporlar. Her çalışma JSONL dosyasına bir satır olarak eklenir; böylece
+# çalışmalar arası gerilemeler görülebilir.
+#
+# Örnekler:
+#   python -m src.benchmark --ef 32 64 128 --oversampling 1 2 4 --k 5 10
+#   python -m src.benchmark --path :memory: --seed-parquet 5000 --langs fr es   # ağ gerektirmez
+#   python -m src.benchmark --path :memory: --synthetic 20000 --dim 64          # model de gerektirmez
+#   python -m src.benchmark --project-dims 64 128 256                           # PCA: recall / bellek dengesi
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from src.local_index import LocalIndex, export_from_qdrant
+
+if TYPE_CHECKING:  # pragma: no cover
+    from qdrant_client import QdrantClient, models
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DEFAULT_OUT = os.path.join(DATA_DIR, "benchmarks", "ann.jsonl")
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "..", "Example.txt")
+
+
+def query_texts(path: str = DEFAULT_QUERIES) -> List[str]:
+    """Sorgu dosyasındaki metinler (batch_query.load_queries: ayırıcı ve dil başlığı satırları hariç)."""
+    from src.batch_query import load_queries
+
+    return [q.text for q in load_queries(path)]
+
+
+def percentiles(samples_ms: Sequence[float]) -> Dict[str, float]:
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    if arr.size == 0:
+        return {"p50_ms": float("nan"), "p95_ms": float("nan"), "p99_ms": float("nan")}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def recall_at_k(found: Sequence[str], exact: Sequence[str], k: int) -> float:
+    truth = set(exact[:k])
+    if not truth:
+        return 1.0
+    return len(truth.intersection(found[:k])) / len(truth)
+
+
+class Target:
+    """
+    Kıyaslanan koleksiyon. Uzak kümede shard-key kullanılır; yerel (in-process) Qdrant
+    shard-key desteklemediği için aynı dil ayrımı `language` filtresiyle taklit edilir.
+    `using`: aranan named vector (None → adsız vektörlü yerel koleksiyon).
+    """
+
+    def __init__(self, client: QdrantClient, collection: str, local: bool, using: Optional[str] = None):
+        self.client, self.collection, self.local, self.using = client, collection, local, using
+
+    def _shard_args(self, key: str) -> dict:
+        from qdrant_client import models
+
+        if self.local:
+            return {
+                "query_filter": models.Filter(
+                    must=[models.FieldCondition(key="language", match=models.MatchValue(value=key))]
+                )
+            }
+        return {"shard_key_selector": key}
+
+    def query(self, vector, key: str, limit: int, params: Optional[models.SearchParams]) -> List[str]:
+        resp = self.client.query_points(
+            collection_name=self.collection,
+            query=vector,
+            using=self.using,
+            limit=limit,
+            with_payload=False,
+            search_params=params,
+            **self._shard_args(key),
+        )
+        return [str(p.id) for p in resp.points]
+
+    def export(self, key: str, root: str) -> int:
+        if self.local:
+            return export_from_qdrant(
+                self.client, self.collection, key, root,
+                scroll_filter=self._shard_args(key)["query_filter"], use_shard_key=False, using=self.using,
+            )
+        return export_from_qdrant(self.client, self.collection, key, root, using=self.using)
+
+
+def _seed_local(client: QdrantClient, collection: str, langs: Sequence[str], vectors: Dict[str, np.ndarray]) -> None:
+    """Yerel Qdrant'a (dil başına) vektörleri yükler; ID'ler dil içinde sıralıdır."""
+    from qdrant_client import models
+
+    dim = next(iter(vectors.values())).shape[1]
+    client.create_collection(collection, vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE))
+    next_id = 0
+    for lang in langs:
+        vecs = vectors[lang]
+        ids = list(range(next_id, next_id + len(vecs)))
+        next_id += len(vecs)
+        for start in range(0, len(vecs), 1024):
+            client.upsert(
+                collection,
+                points=models.Batch(
+                    ids=ids[start:start + 1024],
+                    vectors=vecs[start:start + 1024].tolist(),
+                    payloads=[{"language": lang, "stars": 0}] * len(ids[start:start + 1024]),
+                ),
+            )
+        logger.info(f"{lang}: {len(vecs):,} nokta yerel Qdrant'a yüklendi")
+
+
+def _seed_vectors_from_parquet(embedder, langs: Sequence[str], rows: int, spec=None) -> Dict[str, np.ndarray]:
+    from src.parquet_io import iter_parquet_rows
+
+    out = {}
+    for lang in langs:
+        path = os.path.join(DATA_DIR, f"{lang}.parquet")
+        texts: List[str] = []
+        for batch, _ in iter_parquet_rows(path, 1024):
+            texts.extend(batch)
+            if len(texts) >= rows:
+                break
+        texts = spec.document_texts(texts[:rows]) if spec is not None else texts[:rows]
+        out[lang] = np.vstack(list(embedder.embed(texts))).astype(np.float32)
+    return out
+
+
+def run_benchmark(
+    target: Target,
+    queries: np.ndarray,
+    langs: Sequence[str],
+    ks: Sequence[int],
+    efs: Sequence[Optional[int]],
+    rescores: Sequence[Optional[bool]],
+    oversamplings: Sequence[Optional[float]],
+    repeats: int = 1,
+) -> List[dict]:
+    """Her shard-key ve parametre kombinasyonu için recall@k ve gecikme yüzdeliklerini döner."""
+    from qdrant_client import models
+
+    results: List[dict] = []
+    max_k = max(ks)
+    with tempfile.TemporaryDirectory(prefix="ann-truth-") as root:
+        for key in langs:
+            # Doğruluk referansı: saklı vektörlerden tam (exact) top-k
+            n = target.export(key, root)
+            if n == 0:
+                logger.warning(f"{key}: shard boş, atlanıyor")
+                continue
+            exact_index = LocalIndex(root, key)
+            truth = [[h.id for h in exact_index.search(q, max_k)] for q in queries]
+            logger.info(f"{key}: {n:,} nokta için tam komşular hesaplandı")
+
+            for ef, rescore, over in itertools.product(efs, rescores, oversamplings):
+                params = None
+                if ef is not None or rescore is not None or over is not None:
+                    quant = None
+                    if rescore is not None or over is not None:
+                        quant = models.QuantizationSearchParams(rescore=rescore, oversampling=over)
+                    params = models.SearchParams(hnsw_ef=ef, quantization=quant)
+
+                target.query(queries[0].tolist(), key, max_k, params)  # ısınma
+                latencies: List[float] = []
+                found: List[List[str]] = []
+                for _ in range(repeats):
+                    found = []
+                    for q in queries:
+                        t0 = time.perf_counter()
+                        found.append(target.query(q.tolist(), key, max_k, params))
+                        latencies.append((time.perf_counter() - t0) * 1000)
+
+                for k in ks:
+                    recall = float(np.mean([recall_at_k(f, t, k) for f, t in zip(found, truth)]))
+                    row = {
+                        "shard_key": key,
+                        "points": n,
+                        "k": k,
+                        "hnsw_ef": ef,
+                        "rescore": rescore,
+                        "oversampling": over,
+                        "queries": len(queries),
+                        "recall": recall,
+                        **percentiles(latencies),
+                    }
+                    results.append(row)
+                    logger.info(
+                        f"{key} k={k} ef={ef} rescore={rescore} over={over}: "
+                        f"recall={recall:.3f} p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms p99={row['p99_ms']:.1f}ms"
+                    )
+    return results
+
+
+def run_projection_benchmark(
+    target: Target,
+    queries: np.ndarray,
+    langs: Sequence[str],
+    ks: Sequence[int],
+    dims: Sequence[int],
+    sample: int = 20_000,
+    repeats: int = 1,
+) -> List[dict]:
+    """
+    PCA projeksiyonunun recall / bellek dengesi. Saklı (tam boyutlu) vektörlerden örneklemle
+    her boyut için PCA uydurulur; projeksiyonlu vektörlerde tam arama yapılıp tam boyutlu
+    tam komşularla karşılaştırılır. Böylece ölçülen kayıp yalnızca boyut indirgemesinden gelir.
+    """
+    from src.local_index import LocalIndexWriter
+    from src.projection import fit_pca
+
+    results: List[dict] = []
+    max_k = max(ks)
+    with tempfile.TemporaryDirectory(prefix="ann-pca-") as root:
+        for key in langs:
+            n = target.export(key, root)
+            if n == 0:
+                logger.warning(f"{key}: shard boş, atlanıyor")
+                continue
+            full = LocalIndex(root, key)
+            truth = [[h.id for h in full.search(q, max_k)] for q in queries]
+            vectors = np.asarray(full.vectors, dtype=np.float32)
+            ids = [i.decode() for i in full.ids]
+            stars = np.asarray(full.stars)
+            fit_rows = np.random.default_rng(42).choice(n, size=min(n, sample), replace=False)
+            full_mb = n * full.dim * 4 / 2**20
+
+            for dim in dims:
+                if dim >= full.dim:
+                    logger.warning(f"{key}: {dim} boyut saklı boyuttan ({full.dim}) küçük değil, atlanıyor")
+                    continue
+                proj = fit_pca(vectors[fit_rows], dim)
+                sub = os.path.join(root, f"pca{dim}")
+                writer = LocalIndexWriter(sub, key, dim)
+                writer.append(ids, proj.apply(vectors), stars)
+                writer.close()
+                index = LocalIndex(sub, key)
+                projected = proj.apply(queries)
+
+                latencies: List[float] = []
+                found: List[List[str]] = []
+                for _ in range(repeats):
+                    found = []
+                    for q in projected:
+                        t0 = time.perf_counter()
+                        found.append([h.id for h in index.search(q, max_k)])
+                        latencies.append((time.perf_counter() - t0) * 1000)
+
+                for k in ks:
+                    recall = float(np.mean([recall_at_k(f, t, k) for f, t in zip(found, truth)]))
+                    row = {
+                        "shard_key": key,
+                        "points": n,
+                        "k": k,
+                        "dim": dim,
+                        "source_dim": full.dim,
+                        "explained_variance": proj.explained,
+                        "vector_mb": n * dim * 4 / 2**20,
+                        "full_mb": full_mb,
+                        "queries": len(queries),
+                        "recall": recall,
+                        **percentiles(latencies),
+                    }
+                    results.append(row)
+                    logger.info(
+                        f"{key} k={k} dim={dim}/{full.dim}: recall={recall:.3f} "
+                        f"varyans={proj.explained:.1%} bellek={row['vector_mb']:.1f}/{full_mb:.1f} MB "
+                        f"p50={row['p50_ms']:.1f}ms (tam arama)"
+                    )
+    return results
+
+
+def _opt_int(v: str) -> Optional[int]:
+    return None if v.lower() in ("none", "default", "0") else int(v)
+
+
+def _opt_float(v: str) -> Optional[float]:
+    return None if v.lower() in ("none", "default") else float(v)
+
+
+def _opt_bool(v: str) -> Optional[bool]:
+    return None if v.lower() in ("none", "default") else v.lower() in ("1", "true", "yes")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="ANN recall / gecikme kıyaslaması")
+    ap.add_argument("--path", default=None, help="Yerel Qdrant (':memory:' veya dizin); verilmezse uzak küme")
+    ap.add_argument("--collection", default=None, help="Koleksiyon adı (varsayılan: ayarlardaki COLLECTION)")
+    ap.add_argument("--langs", nargs="+", default=["en", "de", "fr", "es", "ja", "zh"])
+    ap.add_argument("--queries", default=DEFAULT_QUERIES, help="Sorgu dosyası (Example.txt biçimi)")
+    ap.add_argument("--k", nargs="+", type=int, default=[5, 10])
+    ap.add_argument("--ef", nargs="+", type=_opt_int, default=[None], help="hnsw_ef değerleri (none → sunucu varsayılanı)")
+    ap.add_argument("--rescore", nargs="+", type=_opt_bool, default=[None])
+    ap.add_argument("--oversampling", nargs="+", type=_opt_float, default=[None])
+    ap.add_argument("--repeats", type=int, default=1, help="Gecikme ölçümü için tekrar sayısı")
+    ap.add_argument("--seed-parquet", type=int, default=0, help="Yerel modda dil başına Parquet'ten yüklenecek satır")
+    ap.add_argument("--synthetic", type=int, default=0, help="Yerel modda dil başına rastgele vektör (model gerekmez)")
+    ap.add_argument("--dim", type=int, default=384, help="--synthetic için vektör boyutu")
+    ap.add_argument("--project-dims", nargs="+", type=int, default=[],
+                    help="PCA projeksiyon boyutları (ör. 64 128 256); verilirse recall / bellek dengesi ölçülür")
+    ap.add_argument("--pca-sample", type=int, default=20_000, help="Dil başına PCA örneklem boyutu")
+    ap.add_argument("--model", default=None,
+                    help="Sorgu modeli (varsayılan MODEL_NAME); uzak kümede bu modelin named vector'ü aranır")
+    ap.add_argument("--out", default=DEFAULT_OUT, help="Sonuçların ekleneceği JSONL dosyası")
+    args = ap.parse_args(argv)
+
+    from qdrant_client import QdrantClient
+
+    from src.clients import get_client, get_embedder
+
+    spec = None
+    if not args.synthetic:
+        from src.model_registry import get_spec
+
+        spec = get_spec(args.model)
+    embedder = None if spec is None else get_embedder(namespace="batch", model=spec.name)
+
+    if args.path:
+        client = QdrantClient(location=":memory:") if args.path == ":memory:" else QdrantClient(path=args.path)
+        collection = args.collection or "benchmark"
+        if args.synthetic or args.seed_parquet:
+            rng = np.random.default_rng(42)
+            if args.synthetic:
+                vectors = {l: rng.standard_normal((args.synthetic, args.dim)).astype(np.float32) for l in args.langs}
+            else:
+                vectors = _seed_vectors_from_parquet(embedder, args.langs, args.seed_parquet, spec)
+            _seed_local(client, collection, args.langs, vectors)
+        target = Target(client, collection, local=True)
+    else:
+        from src.config import settings
+
+        collection = args.collection or settings.COLLECTION
+        target = Target(get_client(), collection, local=False, using=spec.vector if spec else None)
+
+    if args.synthetic:
+        queries = np.random.default_rng(7).standard_normal((100, args.dim)).astype(np.float32)
+    else:
+        texts = spec.query_texts(query_texts(args.queries))
+        queries = np.vstack(list(embedder.embed(texts))).astype(np.float32)
+        if not target.local:
+            from src.projection import project
+
+            # Koleksiyon PCA projeksiyonlu ise sorgular da aynı boyuta indirilir
+            queries = project(queries, collection, spec.name)
+
+    if args.project_dims:
+        results = run_projection_benchmark(
+            target, queries, args.langs, args.k, args.project_dims, args.pca_sample, args.repeats
+        )
+    else:
+        results = run_benchmark(
+            target, queries, args.langs, args.k, args.ef, args.rescore, args.oversampling, args.repeats
+        )
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "collection": collection,
+        "local": target.local,
+        "mode": "projection" if args.project_dims else "ann",
+        "queries": int(len(queries)),
+        "results": results,
+    }
+    if spec is not None:
+        from src.config import settings
+
+        record.update(model=spec.name, vector=target.using, quantization=settings.QUANTIZATION)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    logger.success(f"{len(results)} sonuç satırı → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
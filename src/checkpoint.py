@@ -0,0 +1,103 @@
+# src/checkpoint.py
+# Yeniden başlatılabilir (resumable) ingest için deterministik nokta ID'leri ve kontrol noktası manifestosu.
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict
+from uuid import NAMESPACE_URL, uuid5
+
+from loguru import logger
+
+# Nokta ID'leri için sabit isim alanı; değişirse tüm ID'ler değişir!
+_ID_NAMESPACE = uuid5(NAMESPACE_URL, "amazon-reviews-multi/points")
+
+
+def point_id(lang: str, file_name: str, row: int) -> str:
+    """
+    (dil, dosya, satır) üçlüsünden deterministik UUID üretir.
+    Aynı satır tekrar yüklenirse aynı ID ile upsert edilir → kopya oluşmaz.
+    """
+    return str(uuid5(_ID_NAMESPACE, f"{lang}/{file_name}/{row}"))
+
+
+def file_fingerprint(path: str) -> str:
+    """Dosya değiştiyse kontrol noktasını geçersiz kılmak için boyut + mtime imzası."""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class Manifest:
+    """
+    Her (koleksiyon, dil, dosya) için kalıcı olarak yazılmış (commit) satır sayısını tutar.
+
+    Upsert'ler paralel ve sırasız tamamlanabildiği için yalnızca **kesintisiz**
+    tamamlanmış önek kaydedilir: 0..N arası tüm batch'ler yazılmadan N ilerlemez.
+    Böylece yarıda kalan bir çalışma tekrar başlatıldığında hiçbir satır atlanmaz.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[int, int]] = {}
+        self._state: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._state = json.load(f)
+
+    @staticmethod
+    def key(collection: str, lang: str, file_name: str, vector: str = "") -> str:
+        # Named vector başına ayrı ilerleme: ikinci bir modelin vektörü kendi kaldığı yerden doldurulur
+        return f"{collection}/{lang}/{file_name}" + (f"#{vector}" if vector else "")
+
+    def start_row(self, key: str, fingerprint: str) -> int:
+        """Kaldığımız satırı döner; dosya değiştiyse baştan (0) başlar."""
+        with self._lock:
+            entry = self._state.get(key)
+            if entry is None or entry.get("fingerprint") != fingerprint:
+                if entry is not None:
+                    logger.warning(f"{key}: dosya değişmiş, kontrol noktası sıfırlandı.")
+                self._state[key] = {"fingerprint": fingerprint, "rows": 0}
+                self._pending.pop(key, None)
+                return 0
+            return int(entry["rows"])
+
+    def commit(self, key: str, offset: int, count: int) -> None:
+        """`offset`'ten başlayan `count` satırın Qdrant'a yazıldığını kaydeder."""
+        with self._lock:
+            entry = self._state[key]
+            pending = self._pending.setdefault(key, {})
+            pending[offset] = count
+            rows = entry["rows"]
+            advanced = False
+            while rows in pending:
+                rows += pending.pop(rows)
+                advanced = True
+            if advanced:
+                entry["rows"] = rows
+                self._save()
+
+    def rows(self, key: str) -> int:
+        with self._lock:
+            return int(self._state.get(key, {}).get("rows", 0))
+
+    def drop(self, collection: str) -> int:
+        """Silinen bir koleksiyonun tüm kayıtlarını manifestodan çıkarır; çıkarılan kayıt sayısını döner."""
+        prefix = f"{collection}/"
+        with self._lock:
+            keys = [k for k in self._state if k.startswith(prefix)]
+            for k in keys:
+                del self._state[k]
+                self._pending.pop(k, None)
+            if keys:
+                self._save()
+            return len(keys)
+
+    def _save(self) -> None:
+        # Atomik yazım: yarıda kesilirse eski manifesto bozulmaz
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -0,0 +1,128 @@
+# src/clients.py
+# Qdrant istemcisi ve embedding modeli için tembel (lazy) fabrikalar.
+#
+# İçe aktarma (import) hiçbir bağlantı kurmaz, modeli yüklemez, .env okumaz; nesneler ilk
+# kullanımda oluşturulur ve süreç boyunca paylaşılır. Servis başlangıcında modeli önceden
+# yüklemek için `warm_up()` (veya `python -m src.clients`) kullanılır.
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from loguru import logger
+
+from src.config import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from qdrant_client import QdrantClient
+
+_lock = threading.Lock()
+_client: Optional["QdrantClient"] = None
+_models: Dict[Tuple[str, str], object] = {}
+_embedders: Dict[Tuple[str, str, Optional[str]], object] = {}
+_targets: Dict[str, Tuple[float, str]] = {}
+
+
+def get_client() -> "QdrantClient":
+    """Süreç genelinde tek `QdrantClient` (gRPC tercihli); ilk çağrıda oluşturulur."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from qdrant_client import QdrantClient
+
+                _client = QdrantClient(
+                    url=str(settings.QDRANT_URL),       # Qdrant sunucu adresi
+                    api_key=settings.QDRANT_API_KEY,    # API anahtarı
+                    prefer_grpc=True,                   # gRPC protokolü
+                )
+    return _client
+
+
+def _model(device: str, name: Optional[str] = None):
+    name = name or settings.MODEL_NAME
+    key = (name, device)
+    if key not in _models:
+        from fastembed import TextEmbedding  # onnxruntime içe aktarımı birkaç saniye sürer
+
+        t0 = time.perf_counter()
+        _models[key] = TextEmbedding(name, device=device, cache_dir=settings.MODEL_CACHE_DIR)
+        logger.info(f"Embedding modeli yüklendi: {name} ({device}, {time.perf_counter() - t0:.1f}s)")
+    return _models[key]
+
+
+def get_embedder(namespace: Optional[str] = None, device: Optional[str] = None, model: Optional[str] = None):
+    """
+    Paylaşılan `TextEmbedding`. `namespace` verilirse diskteki embedding önbelleğiyle sarmalanır
+    ("documents", "queries", "ui_writes", "batch"); aynı model tüm namespace'lerde tek kez yüklenir.
+    `model` verilmezse MODEL_NAME kullanılır (A/B için ikinci bir model aynı süreçte yüklenebilir).
+    """
+    device = device or settings.DEVICE
+    model = model or settings.MODEL_NAME
+    key = (model, device, namespace)
+    if key not in _embedders:
+        with _lock:
+            if key not in _embedders:
+                embedder = _model(device, model)
+                if namespace is None:
+                    _embedders[key] = embedder
+                else:
+                    from src.embed_cache import cached_embedder
+
+                    _embedders[key] = cached_embedder(embedder, namespace=namespace, model_name=model)
+    return _embedders[key]
+
+
+def collection_target(name: Optional[str] = None, ttl: Optional[float] = None) -> str:
+    """
+    `name` (varsayılan COLLECTION) bir alias ise gösterdiği sürümlü koleksiyon, değilse kendisi.
+    Sonuç `ttl` (varsayılan ALIAS_REFRESH) saniye tutulur; Qdrant'a ulaşılamazsa son bilinen değer döner.
+    Sonuç önbelleği anahtarına girer: alias yeni sürüme taşındığında eski sürümün sonuçları sunulmaz.
+    """
+    name = name or settings.COLLECTION
+    ttl = settings.ALIAS_REFRESH if ttl is None else ttl
+    now = time.monotonic()
+    cached = _targets.get(name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    try:
+        target = next((a.collection_name for a in get_client().get_aliases().aliases if a.alias_name == name), name)
+    except Exception as exc:  # noqa: BLE001 — arama yolu alias çözümü yüzünden düşmemeli
+        logger.warning(f"'{name}' alias'ı çözülemedi: {exc}")
+        target = cached[1] if cached is not None else name
+    _targets[name] = (now + ttl, target)
+    return target
+
+
+def warm_up(namespace: Optional[str] = None, ping: bool = True) -> Dict[str, float]:
+    """
+    Servis başlangıcında çağrılır: modeli (gerekirse indirip) yükler, ONNX oturumunu tek bir
+    çıkarımla ısıtır ve isteğe bağlı olarak Qdrant bağlantısını dener. Aşama sürelerini döner.
+    """
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    embedder = get_embedder(namespace)
+    timings["model_load"] = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    # Önbelleği atlayıp sorguların kullanacağı modeli doğrudan çalıştır (ilk çıkarım bellek ayırma
+    # ve grafik optimizasyonu yapar); CachedEmbedder sarmalıyorsa alttaki modele gidilir
+    list(getattr(embedder, "embedder", embedder).embed(["warm-up"]))
+    timings["first_inference"] = time.perf_counter() - t1
+
+    if ping:
+        t2 = time.perf_counter()
+        try:
+            get_client().get_collections()
+            timings["qdrant_ping"] = time.perf_counter() - t2
+        except Exception as exc:  # noqa: BLE001 — ısıtma servisi düşürmemeli
+            logger.warning(f"Qdrant'a ulaşılamadı (ısıtma devam ediyor): {exc}")
+    logger.info("Isıtma: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+    return timings
+
+
+if __name__ == "__main__":
+    # Konteyner/servis başlangıcında:  python -m src.clients
+    warm_up()
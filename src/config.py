@@ -1,6 +1,9 @@
 # src/config.py
 # Proje genelinde ortam değişkenlerini ve model ayarlarını merkezi olarak yöneten yapılandırma dosyası.
 
+from functools import lru_cache
+from typing import List, Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl
 
@@ -10,10 +13,79 @@ class Settings(BaseSettings):
     QDRANT_URL: AnyHttpUrl
     QDRANT_API_KEY: str
     COLLECTION: str = "amazon_reviews_multi"
+    TENANT_LAYOUT: bool = False  # True → 'language' payload indeksi tenant olarak işaretlenir
+
+    # Vektör nicemleme (quantization) ve arama parametreleri
+    QUANTIZATION: Literal["none", "scalar", "binary"] = "none"  # scalar → int8 (~4x), binary → 1 bit (~32x)
+    QUANTIZATION_ALWAYS_RAM: bool = True   # Nicemlenmiş vektörler her zaman RAM'de tutulsun mu
+    SEARCH_RESCORE: bool = True            # Adaylar orijinal vektörlerle yeniden puanlansın mı
+    SEARCH_OVERSAMPLING: float = 2.0       # Nicemlenmiş aramada limit × bu kadar aday getir
+    HNSW_EF: Optional[int] = None          # Arama zamanı ef (None → sunucu varsayılanı)
 
     # Embedding modeli ayarları
     MODEL_NAME: str = "BAAI/bge-small-en-v1.5"
     DEVICE: str = "cuda"
+    MODEL_CACHE_DIR: Optional[str] = None  # ONNX model dosyalarının klasörü (None → fastembed varsayılanı)
+    COLLECTION_MODELS: List[str] = []      # Koleksiyonda named vector'ü olacak modeller (boş → yalnızca MODEL_NAME)
+
+    # Saklanan vektörler için PCA projeksiyonu (bkz. src/projection.py)
+    PROJECTION_DIM: int = 0                   # >0 → ingest başında bu boyuta PCA uydurulur (ör. 64 / 128 / 256)
+    PROJECTION_SAMPLE: int = 20_000           # PCA örneklemi (tüm dillere bölüştürülen satır sayısı)
+    PROJECTION_DIR: str = "data/projections"  # {COLLECTION}.npz projeksiyon dosyalarının klasörü
+
+    # Ingest iş hattı ayarları (okuma → embedding → upsert)
+    PIPELINE_DEPTH: int = 4     # Aşamalar arası kuyrukta bekleyebilecek en fazla batch sayısı
+    EMBED_WORKERS: int = 1      # Embedding aşamasındaki iş parçacığı sayısı
+    UPLOAD_WORKERS: int = 2     # Upsert aşamasındaki iş parçacığı sayısı
+    EMBED_PROCESSES: int = 0    # >0 ise CPU embedding havuzu: row group'lar bu kadar sürece dağıtılır (EMBED_CACHE kullanılmaz)
+    ONNX_THREADS: int = 0       # Süreç başına ONNX iş parçacığı (0 → çekirdek sayısı / süreç sayısı)
+
+    # Yakın-kopya filtresi (MinHash/LSH, dil başına; EMBED_PROCESSES=0 gerektirir)
+    DEDUP: bool = False             # True → benzer yorumlar tek noktada toplanır, payload'da dup_count
+    DEDUP_THRESHOLD: float = 0.8    # Tahmini Jaccard benzerliği eşiği (karakter shingle'ları)
+    DEDUP_NUM_PERM: int = 64        # MinHash permütasyon sayısı (imza uzunluğu)
+    DEDUP_BANDS: int = 8            # LSH bant sayısı (NUM_PERM'e tam bölünmeli)
+    DEDUP_SHINGLE: int = 5          # Karakter shingle uzunluğu (ja/zh için 3)
+
+    # Upsert ayarları (uzak Qdrant kümesine eşzamanlı yazım)
+    UPSERT_IN_FLIGHT: int = 4       # Shard-key başına aynı anda yürüyen en fazla upsert isteği
+    UPSERT_MAX_MB: int = 16         # Tek isteğin tahmini üst boyutu (gRPC mesaj sınırının altında kalmalı)
+    UPSERT_RETRIES: int = 5         # Geçici hatalarda en fazla tekrar deneme
+    UPSERT_BACKOFF: float = 0.5     # İlk bekleme süresi (sn); her denemede iki katına çıkar
+
+    # Arayüz yazma tamponu (bkz. src/write_buffer.py): eklemeler batch halinde embed edilip yazılır
+    WRITE_BUFFER_MAX_BATCH: int = 64      # Bir turda en fazla yorum
+    WRITE_BUFFER_MAX_DELAY: float = 0.05  # İlk bekleyen yorumdan sonra en fazla bekleme (sn)
+    WRITE_TIMEOUT: float = 30.0           # Arayüzün yazımın kalıcı olmasını bekleme süresi (sn)
+
+    # Toplu yükleme (--bulk) profili
+    BULK_MAX_SEGMENT_SIZE: Optional[int] = None  # KB; toplu yüklemede segment üst sınırı (None → değiştirme)
+    BULK_OPTIMIZE_TIMEOUT: float = 0             # Yükleme sonrası indeksleme için en fazla bekleme (sn, 0 → sınırsız)
+
+    # Arama ayarları
+    SEARCH_TIMEOUT: float = 2.0     # Shard başına süre sınırı (sn); aşan shard sonuçtan çıkarılır
+    QUERY_METRICS_PORT: int = 0     # >0 → arayüz süreci sorgu metriklerini http://host:PORT/metrics'te sunar
+
+    # Dil tanıma ve shard yönlendirmesi (bkz. src/langid.py)
+    LANG_ROUTING: bool = True           # Dil seçilmediyse sorgu yalnızca tanınan dil(ler)in shard'ına gider
+    LANG_ROUTE_THRESHOLD: float = 0.9   # Seçilen dillerin toplam olasılığı; güven düşükse tüm shard'lar
+    LANGID_PATH: str = "data/langid.npz"  # `python -m src.langid --train` ile üretilen model
+    LANGID_SAMPLE: int = 5_000          # Eğitimde dil başına örnek sayısı
+
+    # Yerel tam-arama indeksi (doğruluk referansı ve Qdrant erişilemezken yedek)
+    LOCAL_INDEX_DIR: str = "data/local_index"
+    LOCAL_FALLBACK: bool = True     # Tüm shard'lar düşerse arayüz yerel indeksten cevap versin
+
+    # Sorgu önbelleği (arayüz süreci içinde)
+    QUERY_CACHE_SIZE: int = 1024        # (model, metin) → vektör LRU kapasitesi
+    RESULT_CACHE_TTL: float = 300.0     # Arama sonucu geçerlilik süresi (sn)
+    RESULT_CACHE_SIZE: int = 4096       # Saklanan en fazla arama sonucu
+    ALIAS_REFRESH: float = 5.0          # COLLECTION alias'ının hedefi bu sıklıkla (sn) yeniden çözülür
+
+    # Embedding önbelleği (model adı + normalize metin özeti → vektör)
+    EMBED_CACHE: bool = True                    # False → her metin modele gönderilir
+    EMBED_CACHE_DIR: str = "data/.embed_cache"  # memmap matris ve anahtar dosyalarının klasörü
+    EMBED_CACHE_MAX_MB: int = 512               # Namespace başına vektör matrisi üst sınırı (MB)
 
     # pydantic-settings yapılandırması
     model_config = SettingsConfigDict(
@@ -24,8 +96,27 @@ class Settings(BaseSettings):
     )
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Ayarları ilk ihtiyaçta bir kez okur (.env / ortam değişkenleri)."""
+    return Settings()
+
+
+class _LazySettings:
+    """
+    `settings.X` ilk erişimde `get_settings()`'i çağırır. Böylece modülleri içe aktarmak
+    .env ya da QDRANT_URL gerektirmez; eksik ayar yalnızca gerçekten kullanıldığında hata verir.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __repr__(self):
+        return repr(get_settings())
+
+
 # --------------  BU SATIR ÇOK ÖNEMLİ  --------------
-settings = Settings()         #  Dışa aktarılan ve projede her yerde kullanılan ayar instance'ı
+settings = _LazySettings()    #  Dışa aktarılan ve projede her yerde kullanılan ayar nesnesi (tembel)
 
 
 
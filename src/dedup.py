@@ -0,0 +1,129 @@
+# src/dedup.py
+# Ingest öncesi yakın-kopya (near-duplicate) yorum tespiti: MinHash imzaları + LSH bantlama.
+#
+# * Metin normalize edilir (NFC + küçük harf + boşluk) ve karakter k-gram'larına (shingle) bölünür;
+#   karakter tabanlı olduğu için ja/zh gibi boşluksuz dillerde de çalışır.
+# * Her metin için `num_perm` permütasyonlu MinHash imzası NumPy ile vektörel hesaplanır.
+# * İmza `bands` banda bölünür; aynı bandı paylaşan önceki metin aday olur, imza benzerliği
+#   `threshold` üzerindeyse satır yakın kopya sayılır ve temsilcisinin sayacı artar.
+# * İndeks dil başına tutulur; akış yeni bir dile geçtiğinde önceki dilin indeksi bırakılır.
+
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.embed_cache import normalize_text
+
+# Boşluksuz yazılan dillerde daha kısa shingle (3 karakter ≈ 1-2 kelime)
+_CJK_SHINGLE = {"ja": 3, "zh": 3}
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    """Metnin benzersiz karakter k-gram özetleri (uint64)."""
+    cps = np.frombuffer(normalize_text(text).lower().encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(cps) == 0:
+        return np.zeros(1, dtype=np.uint64)
+    windows = cps[None, :] if len(cps) <= k else sliding_window_view(cps, k)
+    powers = np.uint64(1_000_003) ** np.arange(windows.shape[1], dtype=np.uint64)
+    h = (windows * powers).sum(axis=1, dtype=np.uint64)  # taşma mod 2^64 (bilinçli)
+    h = (h ^ (h >> np.uint64(31))) * _MIX
+    return np.unique(h)
+
+
+class Deduper:
+    """
+    Akış halinde (batch batch) MinHash/LSH yakın-kopya filtresi.
+
+    `dedupe(lang, keys, texts)` tutulacak satırların maskesini döner; atılan her satır
+    temsilcisinin (ilk görülen benzer metin) sayacını artırır. `dup_counts()` sayacı 1'den
+    büyük temsilcileri verir.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 8,
+        shingle: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm, bands'e tam bölünmeli")
+        self.threshold, self.num_perm, self.bands, self.shingle = threshold, num_perm, bands, shingle
+        self.rows_per_band = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Çarp-kaydır (multiply-shift) hash ailesi: a tek sayı, sonuç üst 32 bit
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self.lang: Optional[str] = None
+        self._reset()
+        self.finished: Dict[str, Dict[Hashable, int]] = {}
+        self.seen: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def _reset(self) -> None:
+        self._buckets: List[Dict[bytes, int]] = [dict() for _ in range(self.bands)]
+        self._sigs: List[np.ndarray] = []
+        self._keys: List[Hashable] = []
+        self._counts: List[int] = []
+
+    def signature(self, text: str, lang: Optional[str] = None) -> np.ndarray:
+        h = _shingle_hashes(text, _CJK_SHINGLE.get(lang, self.shingle))
+        return ((h[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+    def _switch(self, lang: str) -> None:
+        """Yeni dile geçerken önceki dilin sayaçlarını saklar, indeksini bırakır (bellek dil başına sınırlı)."""
+        if self.lang is not None:
+            self.finished.setdefault(self.lang, {}).update(self._current_counts())
+        self.lang = lang
+        self._reset()
+
+    def _current_counts(self) -> Dict[Hashable, int]:
+        return {k: c for k, c in zip(self._keys, self._counts) if c > 1}
+
+    def dedupe(self, lang: str, keys: Sequence[Hashable], texts: Sequence[str]) -> np.ndarray:
+        """Tutulacak satırlar için True maskesi. `keys`: satırın kalıcı kimliği (ör. (dosya, satır))."""
+        if lang != self.lang:
+            self._switch(lang)
+        keep = np.ones(len(texts), dtype=bool)
+        r = self.rows_per_band
+        for i, (key, text) in enumerate(zip(keys, texts)):
+            sig = self.signature(text, lang)
+            bands = [sig[b * r:(b + 1) * r].tobytes() for b in range(self.bands)]
+            rep = None
+            for b, band in enumerate(bands):
+                cand = self._buckets[b].get(band)
+                if cand is not None and np.mean(self._sigs[cand] == sig) >= self.threshold:
+                    rep = cand
+                    break
+            if rep is not None:
+                self._counts[rep] += 1
+                keep[i] = False
+                continue
+            idx = len(self._keys)
+            self._keys.append(key)
+            self._sigs.append(sig)
+            self._counts.append(1)
+            for b, band in enumerate(bands):
+                self._buckets[b].setdefault(band, idx)
+        self.seen[lang] = self.seen.get(lang, 0) + len(texts)
+        self.dropped[lang] = self.dropped.get(lang, 0) + int((~keep).sum())
+        return keep
+
+    def dup_counts(self) -> Dict[str, Dict[Hashable, int]]:
+        """dil → {temsilci anahtarı: toplam kopya sayısı (kendisi dahil)}; yalnızca sayacı > 1 olanlar."""
+        out = {lang: dict(counts) for lang, counts in self.finished.items()}
+        if self.lang is not None:
+            out.setdefault(self.lang, {}).update(self._current_counts())
+        return out
+
+    def report(self) -> str:
+        parts = []
+        for lang, n in self.seen.items():
+            d = self.dropped.get(lang, 0)
+            parts.append(f"{lang}: {d:,}/{n:,} yakın kopya atlandı ({d / n:.1%})" if n else f"{lang}: 0")
+        return "; ".join(parts)
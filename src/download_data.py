@@ -1,49 +1,168 @@
+"""
+Amazon çok dilli yorum veri setini indirip dil başına Parquet dosyalarına yazar.
+
+* Kaynak akış (streaming) olarak tek geçişte okunur; satırlar Arrow batch'leri halinde
+  dile göre ayrılıp her dilin kendi `ParquetWriter`'ına eklenir → bellek kullanımı veri
+  boyutundan bağımsız olarak `ROW_GROUP` satır × dil sayısı ile sınırlıdır.
+* MTEB aynasında her dil ayrı bir konfigürasyondur; diller eşzamanlı indirilir.
+* Dosyalar önce `.tmp` uzantısıyla yazılır, başarıyla bitince yeniden adlandırılır;
+  yarım kalmış bir indirme tamamlanmış dosya gibi görünmez.
+
+Kullanım:  python -m src.download_data [--langs en de ...] [--workers 6]
+"""
+import argparse
 import os
-from datasets import load_dataset, Dataset
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 # Çıktı dosyalarının kaydedileceği klasör (proje kökünde 'data')
 OUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
-os.makedirs(OUT_DIR, exist_ok=True)  # Klasör yoksa oluştur
 
 # İndirilecek dillerin listesi
 LANGS = ["en", "de", "fr", "es", "ja", "zh"]
 
+MTEB_DATASET = "mteb/amazon_reviews_multi"
+FALLBACK_DATASET = "srvmishra832/multilingual-amazon-reviews-6-languages"
+# Kaynaktan tek seferde okunan satır sayısı ve Parquet row group boyutu.
+# Row group'lar ingest'te devam noktası ve EMBED_PROCESSES işçilerinin iş birimidir.
+READ_BATCH = 10_000
+ROW_GROUP = 32_768
+
+
+def _iter_tables(ds, batch_size=READ_BATCH):
+    """Akış veri setini Arrow tabloları olarak (batch_size satırlık) üretir."""
+    if hasattr(ds, "iter"):
+        for batch in ds.iter(batch_size=batch_size):
+            yield pa.Table.from_pydict(batch)
+        return
+    rows = []
+    for row in ds:
+        rows.append(row)
+        if len(rows) >= batch_size:
+            yield pa.Table.from_pylist(rows)
+            rows = []
+    if rows:
+        yield pa.Table.from_pylist(rows)
+
+
+class LangWriter:
+    """Tek bir dilin Parquet dosyası: tabloları tamponlar, `ROW_GROUP` satırda bir row group yazar."""
+
+    def __init__(self, lang, out_dir=OUT_DIR, row_group=ROW_GROUP):
+        self.lang = lang
+        self.path = os.path.join(out_dir, f"{lang}.parquet")
+        self.row_group = row_group
+        self.rows = 0
+        self._writer = None
+        self._buf = []
+        self._buffered = 0
+
+    def write(self, table):
+        if table.num_rows == 0:
+            return
+        self._buf.append(table)
+        self._buffered += table.num_rows
+        while self._buffered >= self.row_group:
+            self._flush(self.row_group)
+
+    def _flush(self, n=None):
+        table = pa.concat_tables(self._buf, promote_options="default") if len(self._buf) > 1 else self._buf[0]
+        n = table.num_rows if n is None else n
+        head, rest = table.slice(0, n), table.slice(n)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path + ".tmp", head.schema)
+        self._writer.write_table(head.cast(self._writer.schema), row_group_size=n)
+        self.rows += head.num_rows
+        self._buf = [rest] if rest.num_rows else []
+        self._buffered = rest.num_rows
+
+    def close(self):
+        """Kalan satırları yazar ve dosyayı yerine koyar (yalnızca başarılı bitişte çağrılır)."""
+        if self._buffered:
+            self._flush()
+        if self._writer is None:
+            return 0
+        self._writer.close()
+        os.replace(self.path + ".tmp", self.path)
+        print(f"  {self.lang:<2} → {self.path}  ({self.rows:,} satır)")
+        return self.rows
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self.path + ".tmp")
 
-def save(ds: Dataset, lang: str):
+
+def download_mteb_lang(lang, out_dir=OUT_DIR):
+    """MTEB aynasından tek bir dil konfigürasyonunu akış olarak indirir."""
+    from datasets import load_dataset
+
+    ds = load_dataset(MTEB_DATASET, name=lang, split="train", streaming=True)
+    writer = LangWriter(lang, out_dir)
+    try:
+        for table in _iter_tables(ds):
+            writer.write(table)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def download_fallback(langs, out_dir=OUT_DIR):
     """
-    Verilen HuggingFace Dataset nesnesini Parquet formatında kaydeder.
-    Her dil için ayrı dosya oluşturur.
+    Yedek veri setini TEK geçişte okur; her Arrow batch'i `language` sütununa göre
+    bölünüp ilgili dilin yazıcısına eklenir (dil başına ayrı filtre geçişi yapılmaz).
     """
-    path = os.path.join(OUT_DIR, f"{lang}.parquet")
-    ds.to_parquet(path)
-    print(f"  {lang:<2} → {path}  ({len(ds):,} satır)")
-
-# 1  Öncelikle MTEB veri setinin aynasını indirmeyi dene
-try:
-    print("  mteb/amazon_reviews_multi deneniyor…")
-    for lang in LANGS:
-        ds_lang = load_dataset(
-            "mteb/amazon_reviews_multi",
-            name=lang,          # ← Dil konfigürasyonu (örn: 'en', 'de', ...)
-            split="train"
-        )
-        save(ds_lang, lang)
-    print("  MTEB aynasından indirme tamam.")
-    exit(0)  # Başarılıysa programı bitir
-except Exception as e:
-    print(f"   MTEB aynası başarısız: {e}")
-
-# 2  Eğer ilk kaynak başarısız olursa, yedek veri setini indir
-print("  srvmishra832/multilingual-amazon-reviews-6-languages deneniyor…")
-ds_all = load_dataset(
-    "srvmishra832/multilingual-amazon-reviews-6-languages",
-    split="train"
-)
-for lang in LANGS:
-    # Her dil için filtre uygula ve ayrı dosya olarak kaydet
-    save(
-        ds_all.filter(lambda r: r["language"] == lang, keep_in_memory=False),
-        lang
-    )
-
-print("  İndirme & Parquet kaydetme tamam.")
+    from datasets import load_dataset
+
+    ds = load_dataset(FALLBACK_DATASET, split="train", streaming=True)
+    writers = {lang: LangWriter(lang, out_dir) for lang in langs}
+    try:
+        for table in _iter_tables(ds):
+            language = table.column("language")
+            for lang, writer in writers.items():
+                mask = pc.equal(language, lang)
+                if pc.any(mask).as_py():
+                    writer.write(table.filter(mask))
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    return {lang: writer.close() for lang, writer in writers.items()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Amazon çok dilli yorumları dil başına Parquet'e indirir")
+    ap.add_argument("--langs", nargs="+", default=LANGS)
+    ap.add_argument("--workers", type=int, default=len(LANGS), help="Eşzamanlı indirilen MTEB dil sayısı")
+    ap.add_argument("--out-dir", default=OUT_DIR)
+    args = ap.parse_args(argv)
+    os.makedirs(args.out_dir, exist_ok=True)  # Klasör yoksa oluştur
+
+    # 1  Öncelikle MTEB veri setinin aynasını dene (diller eşzamanlı)
+    print(f"  {MTEB_DATASET} deneniyor…")
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(download_mteb_lang, lang, args.out_dir): lang for lang in args.langs}
+        for fut in as_completed(futures):
+            lang = futures[fut]
+            try:
+                fut.result()
+            except Exception as e:
+                print(f"   MTEB aynası başarısız ({lang}): {e}")
+                failed.append(lang)
+    if not failed:
+        print("  MTEB aynasından indirme tamam.")
+        return
+
+    # 2  Başarısız diller için yedek veri seti (tek geçiş, dile göre yönlendirme)
+    print(f"  {FALLBACK_DATASET} deneniyor ({', '.join(failed)})…")
+    download_fallback(failed, args.out_dir)
+    print("  İndirme & Parquet kaydetme tamam.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,422 @@
 """
 Yerel Parquet dosyalarından okuyup embedding + Qdrant upsert yapan script.
 """
+import argparse
 import os
-from uuid import uuid4
+import threading
+import time
+from contextlib import nullcontext
+import numpy as np
 import pyarrow.parquet as pq
-from fastembed import TextEmbedding
-from qdrant_client import models
 from loguru import logger
 
+from src.checkpoint import Manifest, file_fingerprint, point_id
+from src.clients import get_client, get_embedder
 from src.config import settings
-from src.qdrant_setup import client, init_collection
+from src.dedup import Deduper
+from src.embed_pool import EmbedPool
+from src.model_registry import collection_models, get_spec
+from src.metrics import PeriodicWriter, Registry, peak_rss_bytes, timed_iter
+from src.parquet_io import iter_parquet_batches, sample_texts
+from src.pipeline import Stage, run_pipeline
+from src.profiler import SamplingProfiler
+from src.projection import fit_from_texts, get_projection
+from src.uploader import Uploader
 
 # Veri dosyalarının bulunduğu klasör (proje kökünde 'data')
 DATA_DIR   = os.path.join(os.path.dirname(__file__), "..", "data")
 #LANGS      = ["en", "de", "fr", "es", "ja", "zh"]
 LANGS      = ["fr", "es", "ja", "zh"]  # Yüklenecek dillerin listesi (örnek olarak bir kısmı aktif)
 BATCH_SIZE = 1024  # Her seferde işlenecek satır sayısı (batch)
+# Yarıda kalan çalışmaların kaldığı yeri tutan manifesto (silinirse her şey baştan yüklenir)
+MANIFEST_PATH = os.path.join(DATA_DIR, ".ingest_manifest.json")
+# Prometheus metin biçimindeki metrik dosyası (node_exporter textfile collector ile kazınabilir)
+METRICS_PATH = os.path.join(DATA_DIR, "metrics", "ingest.prom")
+STAGES = ("read", "dedup", "embed", "project", "build", "upsert_wait", "upsert")
 
-def iter_parquet_rows(path, batch_size):
+
+class IngestMetrics:
     """
-    Parquet dosyasını batch'ler halinde okur ve her batch'te metin ve yıldız puanlarını döneryor.
-    Metin ve puan kolonlarının isimleri farklı olabileceği için esnek kontrol yapar.
+    Aşama (read / dedup / embed / project / build / upsert_wait / upsert) ve dil başına batch süreleri ile satır sayıları.
+    `upsert_wait`: yükleyici penceresi dolu olduğu için beklenen süre (backpressure);
+    `upsert`: batch'in tüm alt-isteklerinin (tekrar denemeler dahil) uçtan uca süresi.
     """
-    pf = pq.ParquetFile(path)
-    for batch in pf.iter_batches(batch_size=batch_size):
-        d = batch.to_pydict()
-
-        # --- METİN ---
-        if "review_body" in d:
-            texts = d["review_body"]
-        elif "text" in d:
-            texts = d["text"]
-        else:
-            raise KeyError("Metin kolonu bulunamadı ('review_body' veya 'text')")
 
-        # --- YILDIZ / LABEL ---
-        if "stars" in d:
-            stars = d["stars"]
-        elif "label" in d:           # 0-4 → 1-5’e çevir
-            stars = [int(x) + 1 for x in d["label"]]
-        else:
-            raise KeyError("Puan kolonu bulunamadı ('stars' veya 'label')")
+    def __init__(self):
+        self.registry = Registry(prefix="ingest_")
+        self.seconds = self.registry.histogram(
+            "stage_seconds", "Batch başına aşama süresi (saniye)", ("stage", "lang")
+        )
+        self.rows = self.registry.counter("stage_rows_total", "Aşamadan geçen satır sayısı", ("stage", "lang"))
+        self.rss = self.registry.gauge("peak_rss_bytes", "Tepe RSS (bayt)", ("process",))
+        self.elapsed = self.registry.gauge("elapsed_seconds", "Çalışmanın başından beri geçen süre")
+        self.throughput = self.registry.gauge("rows_per_second", "Yüklenen satır / duvar saati süresi")
+        self.started = time.perf_counter()
 
-        yield texts, stars
+    def observe(self, stage, lang, seconds, rows):
+        self.seconds.labels(stage, lang).observe(seconds)
+        self.rows.labels(stage, lang).inc(rows)
 
+    def refresh(self):
+        """Anlık göstergeleri günceller (dosyaya yazmadan hemen önce çağrılır)."""
+        elapsed = time.perf_counter() - self.started
+        uploaded = sum(c.value for (stage, _), c in self.rows.items() if stage == "upsert")
+        self.elapsed.labels().set(elapsed)
+        self.throughput.labels().set(uploaded / elapsed if elapsed > 0 else 0.0)
+        for process, children in (("main", False), ("children", True)):
+            rss = peak_rss_bytes(children=children)
+            if rss is not None:  # Windows'ta ölçülmez
+                self.rss.labels(process).set_max(rss)
+
+    def summary(self):
+        """Dil × aşama özet tablosu: batch, satır, toplam süre, satır/s, p50/p95/max gecikme."""
+        self.refresh()
+        rows = {key: c.value for key, c in self.rows.items()}
+        header = f"{'dil':<5} {'aşama':<12} {'batch':>7} {'satır':>11} {'süre s':>9} {'satır/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        lines = [header, "-" * len(header)]
+        order = {s: i for i, s in enumerate(STAGES)}
+        for (stage, lang), h in sorted(self.seconds.items(), key=lambda kv: (kv[0][1], order.get(kv[0][0], 99))):
+            n = rows.get((stage, lang), 0)
+            p50, p95, pmax = h.quantiles((0.5, 0.95, 1.0))
+            rate = n / h.sum if h.sum > 0 else 0.0
+            lines.append(
+                f"{lang:<5} {stage:<12} {h.count:>7,} {int(n):>11,} {h.sum:>9.1f} {rate:>10,.0f} "
+                f"{p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {pmax * 1000:>8.1f}"
+            )
+        lines.append("-" * len(header))
+        lines.append(
+            f"Toplam: {self.elapsed.labels().value:.1f}s, {self.throughput.labels().value:,.0f} satır/s, "
+            f"tepe RSS {self.rss.labels('main').value / 2**20:,.0f} MiB "
+            f"(alt süreçler {self.rss.labels('children').value / 2**20:,.0f} MiB)"
+        )
+        return "\n".join(lines)
 
-def main():
-    # Qdrant koleksiyonunu ve shard'ları başlat
-    init_collection()
-    # Embedding modeli başlatılır
-    embedder = TextEmbedding(settings.MODEL_NAME, device=settings.DEVICE)
 
-    for lang in LANGS:
+def _lang_files(langs, manifest, vector="", collection=None):
+    """
+    Mevcut Parquet dosyalarını (lang, path, start_row) olarak üretir; eksik dosyaları raporlar.
+    Manifestoya göre (named vector başına) tamamen yüklenmiş dosyalar atlanır.
+    """
+    for lang in langs:
         # Her dil için ilgili Parquet dosyasının yolunu oluştur
         parquet_path = os.path.join(DATA_DIR, f"{lang}.parquet")
         if not os.path.exists(parquet_path):
             logger.error(f"{parquet_path} bulunamadı; önce download_data.py çalıştırman gerek.")
             continue
 
-        logger.info(f"➡️  {lang} shard'ına yükleniyor…")
-        total = 0
-
-        # Parquet dosyasını batch'ler halinde oku ve Qdrant'a yükle
-        for texts, stars in iter_parquet_rows(parquet_path, BATCH_SIZE):
-            # Her metin için embedding vektörü üret
-            vecs = list(embedder.embed(texts))
-            # Her embedding ve puan için Qdrant PointStruct nesnesi oluştur
-            points = [
-                models.PointStruct(
-                    id=str(uuid4()),
-                    vector=v,
-                    payload={"language": lang, "stars": int(s)}
+        key = Manifest.key(collection or settings.COLLECTION, lang, os.path.basename(parquet_path), vector)
+        start_row = manifest.start_row(key, file_fingerprint(parquet_path))
+        num_rows = pq.ParquetFile(parquet_path).metadata.num_rows
+        if start_row >= num_rows:
+            logger.info(f"⏭️  {lang}: {num_rows:,} satırın tamamı zaten yüklenmiş, atlanıyor.")
+            continue
+        if start_row:
+            logger.info(f"↩️  {lang}: {start_row:,}/{num_rows:,} satırdan devam ediliyor…")
+        else:
+            logger.info(f"➡️  {lang} shard'ına yükleniyor…")
+        yield lang, parquet_path, start_row
+
+
+def _iter_all_langs(files, metrics=None):
+    """
+    Tüm dillerin Parquet batch'lerini tek bir akışta (lang, path, offset, texts, stars) olarak üretir.
+    Böylece iş hattı dil geçişlerinde boşa düşmez.
+    """
+    for lang, parquet_path, start_row in files:
+        batches = iter_parquet_batches(parquet_path, BATCH_SIZE, start_row)
+        if metrics is not None:
+            # Parquet okuma + çözme süresi, batch başına
+            batches = timed_iter(batches, lambda dt, b, lang=lang: metrics.observe("read", lang, dt, len(b[1])))
+        for offset, texts, stars in batches:
+            yield lang, parquet_path, offset, texts, stars
+
+
+def ensure_projection(langs=LANGS, model=None, collection=None):
+    """
+    PROJECTION_DIM > 0 ise modelin koleksiyondaki (varsayılan COLLECTION) vektörü için PCA
+    projeksiyonunu hazırlar: dosya varsa ve boyutu tutuyorsa kullanılır, yoksa dillere bölüştürülmüş
+    rastgele örneklem üzerinde uydurulur. Koleksiyon oluşturulmadan önce çağrılmalı (vektör boyutu
+    bu dosyadan okunur).
+    """
+    spec = get_spec(model)
+    collection = collection or settings.COLLECTION
+    existing = get_projection(collection, spec.name)
+    dim = settings.PROJECTION_DIM
+    if dim <= 0 or (existing is not None and existing.dim == dim):
+        return existing
+    if existing is not None:
+        raise RuntimeError(
+            f"{collection}/{spec.vector}: mevcut projeksiyon {existing.dim} boyutlu, PROJECTION_DIM={dim}; "
+            "koleksiyonu ve projeksiyon dosyasını silip yeniden yükleyin"
+        )
+    paths = [p for p in (os.path.join(DATA_DIR, f"{lang}.parquet") for lang in langs) if os.path.exists(p)]
+    if not paths:
+        raise FileNotFoundError("PCA örneklemi için Parquet dosyası bulunamadı; önce download_data.py çalıştırın")
+    per_file = max(1, settings.PROJECTION_SAMPLE // len(paths))
+    texts = [t for path in paths for t in sample_texts(path, per_file)]
+    # Örneklem "documents" önbelleğiyle embed edilir; ingest sırasında aynı metinler modele tekrar gitmez
+    return fit_from_texts(
+        get_embedder(namespace="documents", model=spec.name), texts, dim, collection=collection, model=spec.name
+    )
+
+
+def _apply_dup_counts(deduper, failed, collection=None):
+    """
+    Temsilci noktaların `dup_count` payload'unu günceller. Temsilci, kopyaları görülmeden önce
+    (dup_count=1 ile) yüklenmiş olabileceği için bu adım tüm upsert'ler bittikten sonra yapılır.
+    Yüklenemeyen batch'lerdeki temsilciler atlanır (nokta yok; tekrar çalıştırmada yeniden sayılır).
+    """
+    skip = {(r.tag[0], r.tag[1]): [] for r in failed}
+    for r in failed:
+        lang, file_name, offset, size = r.tag
+        skip[(lang, file_name)].append((offset, offset + size))
+
+    client = get_client()
+    for lang, counts in deduper.dup_counts().items():
+        by_count = {}
+        for (file_name, row), n in counts.items():
+            if any(lo <= row < hi for lo, hi in skip.get((lang, file_name), ())):
+                continue
+            by_count.setdefault(n, []).append(point_id(lang, file_name, row))
+        # Aynı sayaca sahip noktalar tek istekte (ve 1000'lik parçalarla) güncellenir
+        for n, ids in by_count.items():
+            for i in range(0, len(ids), 1000):
+                client.set_payload(
+                    collection or settings.COLLECTION,
+                    payload={"dup_count": n},
+                    points=ids[i:i + 1000],
+                    shard_key_selector=lang,
+                    wait=True,
                 )
-                for v, s in zip(vecs, stars)
-            ]
-            # Qdrant'a batch olarak upsert işlemi (shard-key: dil)
-            client.upsert(
-                collection_name=settings.COLLECTION,
-                points=points,
-                shard_key_selector=lang,   # Dil = shard-key
+        logger.info(f"{lang}: {sum(len(v) for v in by_count.values()):,} temsilcinin dup_count değeri güncellendi")
+
+
+def ingest(metrics=None, model=None, add_vector=False, collection=None):
+    """
+    Tüm dillerin Parquet dosyalarını `model` (varsayılan MODEL_NAME) ile embed edip modelin
+    named vector'üne yükler. `add_vector=True` ise noktalar yeniden yazılmaz; mevcut noktalara
+    yalnızca bu modelin vektörü eklenir (A/B geçişi; payload ve diğer vektörler korunur).
+    `collection` verilirse (ör. src/reindex.py'nin sürümlü koleksiyonu) COLLECTION yerine ona yüklenir.
+    (dil → yüklenen satır) sözlüğü ile başarısız batch sonuçlarını döner.
+    Aşama süreleri ve satır sayıları `metrics`e (IngestMetrics; verilmezse yenisi) kaydedilir.
+    """
+    metrics = metrics or IngestMetrics()
+    manifest = Manifest(MANIFEST_PATH)
+    collection = collection or settings.COLLECTION
+    spec = get_spec(model)
+    projection = get_projection(collection, spec.name)   # None → vektörler tam boyutlu saklanır
+    totals = {}
+    lock = threading.Lock()
+
+    uploader = Uploader(
+        get_client(),
+        collection,
+        in_flight=settings.UPSERT_IN_FLIGHT,
+        max_bytes=settings.UPSERT_MAX_MB * 1024 * 1024,
+        retries=settings.UPSERT_RETRIES,
+        backoff=settings.UPSERT_BACKOFF,
+        vector_name=spec.vector,
+        update_vectors=add_vector,
+    )
+
+    def on_uploaded(result):
+        lang, file_name, offset, size = result.tag
+        if not result.ok:
+            # Manifesto ilerlemez; tekrar çalıştırıldığında bu batch'ten devam edilir
+            logger.error(
+                f"{lang}: {file_name} satır {offset:,}+{size:,} yüklenemedi "
+                f"({result.attempts} deneme): {result.errors[0]}"
             )
-            total += len(points)
+            return
+        metrics.observe("upsert", lang, result.seconds, result.count)
+        logger.debug(
+            f"{lang}: {result.count:,} nokta, {result.requests} istek, "
+            f"{result.attempts} deneme, {result.seconds:.2f}s"
+        )
+        # Atılan yakın kopyalar dahil batch'in tüm satır aralığı tamamlanmış sayılır
+        manifest.commit(Manifest.key(collection, lang, file_name, spec.vector), offset, size)
+        with lock:
+            totals[lang] = totals.get(lang, 0) + result.count
+
+    def upload(batch):
+        lang, path, offset, vecs, stars = batch[:5]
+        keep = batch[5] if len(batch) > 5 else None   # yakın-kopya filtresinin maskesi (varsa)
+        file_name = os.path.basename(path)
+        size = len(keep) if keep is not None else len(vecs)
+        if len(vecs) == 0:
+            # Batch'in tamamı önceki satırların kopyası: yüklenecek nokta yok, yalnızca ilerleme kaydedilir
+            manifest.commit(Manifest.key(collection, lang, file_name, spec.vector), offset, size)
+            return
+        if projection is not None:
+            # Sorgu yollarıyla aynı dönüşüm (merkezleme → PCA → L2 normalize)
+            t0 = time.perf_counter()
+            vecs = projection.apply(vecs)
+            metrics.observe("project", lang, time.perf_counter() - t0, len(vecs))
+        # Satır başına PointStruct yerine kolonsal veri: vektörler tek NumPy matrisinden gelir.
+        # ID (dil, dosya, satır)'dan türetilir → tekrar çalıştırmada kopya oluşmaz.
+        t0 = time.perf_counter()
+        rows = (offset + np.flatnonzero(keep)).tolist() if keep is not None else range(offset, offset + len(vecs))
+        ids = [point_id(lang, file_name, r) for r in rows]
+        extra = {"dup_count": 1} if deduper is not None else {}
+        payloads = [{"language": lang, "stars": s, **extra} for s in stars.tolist()]
+        t1 = time.perf_counter()
+        metrics.observe("build", lang, t1 - t0, len(ids))
+        # Upsert shard-key (dil) başına sınırlı pencereyle eşzamanlı yürür; pencere doluysa burada bekleriz.
+        uploader.submit(
+            lang,
+            ids=ids,
+            vectors=vecs,
+            payloads=payloads,
+            tag=(lang, file_name, offset, size),
+            on_done=on_uploaded,
+        )
+        metrics.observe("upsert_wait", lang, time.perf_counter() - t1, len(ids))
+
+    deduper = None
+    if settings.DEDUP and settings.EMBED_PROCESSES > 0:
+        # Havuz modunda metinler işçi süreçlerde okunup embed edilir; embedding öncesi filtre uygulanamaz
+        logger.warning("DEDUP, EMBED_PROCESSES > 0 iken desteklenmiyor; yakın-kopya filtresi kapalı.")
+    elif settings.DEDUP:
+        deduper = Deduper(
+            threshold=settings.DEDUP_THRESHOLD,
+            num_perm=settings.DEDUP_NUM_PERM,
+            bands=settings.DEDUP_BANDS,
+            shingle=settings.DEDUP_SHINGLE,
+        )
+
+    files = _lang_files(LANGS, manifest, spec.vector, collection)
+    if settings.EMBED_PROCESSES > 0:
+        # CPU modu: row group'lar işçi süreçlerde embed edilir, burada yalnızca upsert kalır
+        with EmbedPool(
+            spec.name, settings.EMBED_PROCESSES, settings.ONNX_THREADS or None, prefix=spec.document_prefix
+        ) as pool:
+            logger.info(
+                f"Embedding havuzu: {pool.processes} süreç × {pool.onnx_threads} ONNX iş parçacığı"
+            )
+            if settings.EMBED_CACHE:
+                logger.warning("Embedding önbelleği havuz modunda kullanılmaz; tüm metinler yeniden embed edilir.")
+            # Okuma ve embedding işçi süreçlerde yapılır; burada sonucu bekleme süresi "embed" sayılır
+            embedded = timed_iter(
+                pool.embed_files(files), lambda dt, b: metrics.observe("embed", b[0], dt, len(b[3]))
+            )
+            run_pipeline(
+                embedded,
+                [Stage("upload", upload, settings.UPLOAD_WORKERS)],
+                depth=settings.PIPELINE_DEPTH,
+            )
+    else:
+        # Embedding modeli başlatılır; tekrar eden metinler diskteki önbellekten gelir
+        embedder = get_embedder(namespace="documents", model=spec.name)
+
+        def dedup(batch):
+            lang, path, offset, texts, stars = batch
+            # MinHash/LSH: dil içinde daha önce görülen metne çok benzeyen satırlar embed edilmez
+            t0 = time.perf_counter()
+            file_name = os.path.basename(path)
+            keep = deduper.dedupe(lang, [(file_name, offset + i) for i in range(len(texts))], texts)
+            metrics.observe("dedup", lang, time.perf_counter() - t0, len(texts))
+            kept = np.flatnonzero(keep)
+            return lang, path, offset, [texts[i] for i in kept], stars[kept], keep
+
+        def embed(batch):
+            lang, path, offset, texts, stars = batch[:5]
+            # Her metin için embedding vektörü üret → tek parça (N×D) float32 matris
+            t0 = time.perf_counter()
+            if texts:
+                # Modelin doküman öneki (ör. e5: "passage: ") model kaydından gelir
+                vecs = np.vstack(list(embedder.embed(spec.document_texts(texts)))).astype(np.float32, copy=False)
+            else:
+                vecs = np.empty((0, 0), dtype=np.float32)
+            metrics.observe("embed", lang, time.perf_counter() - t0, len(texts))
+            return (lang, path, offset, vecs, stars, *batch[5:])
 
+        # Okuma, embedding ve upsert aşamaları sınırlı kuyruklarla eşzamanlı çalışır;
+        # toplam süre üç aşamanın toplamı yerine en yavaş aşamaya yaklaşır.
+        stages = [
+            Stage("embed", embed, settings.EMBED_WORKERS),
+            Stage("upload", upload, settings.UPLOAD_WORKERS),
+        ]
+        if deduper is not None:
+            # Tek iş parçacığı: filtre sırayla ilerlemeli (ilk görülen satır temsilci olur)
+            stages.insert(0, Stage("dedup", dedup, 1))
+        run_pipeline(_iter_all_langs(files, metrics), stages, depth=settings.PIPELINE_DEPTH)
+        if hasattr(embedder, "cache"):
+            embedder.cache.flush()
+            logger.info(embedder.cache.report())
+
+    results = uploader.join()
+    uploader.close()
+    failed = [r for r in results if not r.ok]
+    if failed:
+        logger.error(
+            f"{len(failed)} batch ({sum(r.count for r in failed):,} satır) yüklenemedi; "
+            "script tekrar çalıştırıldığında kaldığı yerden devam eder."
+        )
+
+    if deduper is not None:
+        logger.info(deduper.report())
+        if not add_vector:  # vektör ekleme modunda payload'a dokunulmaz
+            _apply_dup_counts(deduper, failed, collection)
+
+    return totals, failed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parquet → embedding → Qdrant yükleme")
+    ap.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Yükleme süresince HNSW indekslemesini kapat, sonunda yeniden kur ve bitmesini bekle",
+    )
+    ap.add_argument(
+        "--metrics-out",
+        default=METRICS_PATH,
+        help="Prometheus metin biçimli metrik dosyası (çalışma boyunca periyodik güncellenir; boş → yazma)",
+    )
+    ap.add_argument(
+        "--profile",
+        metavar="PATH",
+        default=None,
+        help="Örnekleyici profilleyiciyi aç ve yığınları 'collapsed' biçimde PATH'e yaz",
+    )
+    ap.add_argument(
+        "--model",
+        default=None,
+        help="Embed edilecek model (varsayılan MODEL_NAME); COLLECTION_MODELS içinde olmalı",
+    )
+    ap.add_argument(
+        "--add-vector",
+        action="store_true",
+        help="Noktaları yeniden yazma; mevcut noktalara yalnızca bu modelin vektörünü ekle (A/B geçişi)",
+    )
+    args = ap.parse_args(argv)
+
+    from src.qdrant_setup import bulk_load, init_collection  # qdrant_client içe aktarımı yalnızca çalışırken
+
+    spec = get_spec(args.model)
+    models = collection_models()
+    if spec.vector not in {m.vector for m in models}:
+        raise SystemExit(f"{spec.name} koleksiyon modelleri arasında değil; COLLECTION_MODELS'e ekleyin")
+    # PROJECTION_DIM > 0 ise her modelin PCA projeksiyonu (named vector boyutları buna göre belirlenir)
+    for m in models:
+        ensure_projection(model=m.name)
+    # Qdrant koleksiyonunu ve shard'ları başlat
+    init_collection()
+
+    metrics = IngestMetrics()
+    with PeriodicWriter(metrics.registry, args.metrics_out or None, before_write=metrics.refresh), \
+            (SamplingProfiler(args.profile) if args.profile else nullcontext()):
+        with bulk_load() if args.bulk else nullcontext():
+            totals, failed = ingest(metrics, model=spec.name, add_vector=args.add_vector)
+
+    # Başarı, (toplu modda) indeksleme tamamlandıktan sonra raporlanır
+    for lang, total in totals.items():
         logger.success(f"{lang}: {total:,} kayıt yüklendi.")
+    logger.info("Aşama özeti:\n" + metrics.summary())
+    if args.metrics_out:
+        logger.info(f"Metrikler → {args.metrics_out}")
+    if failed:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
-
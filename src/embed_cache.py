@@ -0,0 +1,229 @@
+# src/embed_cache.py
+# Normalize edilmiş metnin özetine (hash) göre anahtarlanan, diskte kalıcı embedding önbelleği.
+# Vektörler bellek-eşlemli (memmap) float32 matriste, anahtarlar ise yanındaki uint64 dizide tutulur.
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from src.config import settings
+
+_WS = re.compile(r"\s+")
+# Anahtar dizisinde boş slotu gösteren değer
+_EMPTY = 0
+# Önbellek dolunca tek seferde boşaltılacak slot oranı
+_EVICT_FRACTION = 0.05
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + boşlukları tekilleştirme; 'Muy  bien ' ile 'Muy bien' aynı anahtara düşer."""
+    return _WS.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def text_key(normalized: str) -> int:
+    """Normalize metnin 64-bit özeti (0 boş slot için ayrılmıştır)."""
+    h = int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+    return h or 1
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+class EmbeddingCache:
+    """
+    (model adı, metin özeti) → vektör önbelleği.
+
+    * `vectors.f32`: kapasite × boyut float32 memmap (RAM'e tamamen yüklenmez)
+    * `keys.u64`   : her slotun anahtarı (0 = boş); vektörle aynı anda yazılır,
+                     böylece indeks hiçbir zaman matristen geri kalmaz
+    * `ticks.npy`  : son kullanım sayacı; dolunca en eski %5 slot boşaltılır (yaklaşık LRU)
+
+    Aynı dizine aynı anda tek bir süreç yazmalıdır; ingest ve arayüz bu yüzden
+    farklı `namespace` kullanır.
+    """
+
+    def __init__(self, root: str, model_name: str, namespace: str = "default", max_mb: int = 512):
+        self.model_name = model_name
+        self.dir = os.path.join(root, _slug(model_name), namespace)
+        self.max_bytes = max(1, max_mb) * 1024 * 1024
+        self._lock = threading.RLock()
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._vecs: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._ticks: Optional[np.ndarray] = None
+        self._tick = 0
+        self.dim: Optional[int] = None
+        self.capacity = 0
+
+        # İstatistikler
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.model_seconds = 0.0
+
+        meta_path = os.path.join(self.dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            self._open(int(meta["dim"]), int(meta["capacity"]), create=False)
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------ depolama
+
+    def _open(self, dim: int, capacity: int, create: bool) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+        mode = "w+" if create else "r+"
+        self.dim, self.capacity = dim, capacity
+        self._vecs = np.memmap(os.path.join(self.dir, "vectors.f32"), np.float32, mode, shape=(capacity, dim))
+        self._keys = np.memmap(os.path.join(self.dir, "keys.u64"), np.uint64, mode, shape=(capacity,))
+        ticks_path = os.path.join(self.dir, "ticks.npy")
+        if not create and os.path.exists(ticks_path):
+            self._ticks = np.load(ticks_path)
+        else:
+            self._ticks = np.zeros(capacity, dtype=np.uint64)
+        self._tick = int(self._ticks.max()) if capacity else 0
+
+        occupied = np.flatnonzero(self._keys != _EMPTY)
+        self._slots = {int(k): int(i) for i, k in zip(occupied, self._keys[occupied])}
+        self._free = np.flatnonzero(self._keys == _EMPTY)[::-1].tolist()
+        if create:
+            with open(os.path.join(self.dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": dim, "capacity": capacity}, f)
+            logger.info(f"Embedding önbelleği oluşturuldu: {self.dir} ({capacity:,} vektör)")
+
+    def _ensure(self, dim: int) -> None:
+        if self.dim == dim:
+            return
+        if self.dim is not None:
+            logger.warning(f"Önbellek boyutu değişti ({self.dim} → {dim}); önbellek sıfırlanıyor.")
+        self._open(dim, max(1, self.max_bytes // (dim * 4)), create=True)
+
+    def _evict(self) -> None:
+        occupied = np.flatnonzero(self._keys != _EMPTY)
+        n = max(1, int(len(occupied) * _EVICT_FRACTION))
+        victims = occupied[np.argpartition(self._ticks[occupied], n - 1)[:n]]
+        for slot in victims.tolist():
+            del self._slots[int(self._keys[slot])]
+            self._keys[slot] = _EMPTY
+            self._free.append(slot)
+        self.evictions += n
+
+    # ------------------------------------------------------------------ API
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[np.ndarray]]:
+        """Her anahtar için vektörün kopyasını ya da None döner."""
+        out: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for k in keys:
+                slot = self._slots.get(k)
+                if slot is None:
+                    out.append(None)
+                    continue
+                self._tick += 1
+                self._ticks[slot] = self._tick
+                out.append(np.array(self._vecs[slot]))
+        return out
+
+    def put_many(self, keys: Sequence[int], vecs: Sequence[np.ndarray]) -> None:
+        with self._lock:
+            for k, v in zip(keys, vecs):
+                v = np.asarray(v, dtype=np.float32)
+                self._ensure(v.shape[-1])
+                if k in self._slots:
+                    continue
+                if not self._free:
+                    self._evict()
+                slot = self._free.pop()
+                # Önce vektör, sonra anahtar: yarıda kalan yazım asla yanlış vektör döndürmez
+                self._vecs[slot] = v
+                self._keys[slot] = k
+                self._tick += 1
+                self._ticks[slot] = self._tick
+                self._slots[k] = slot
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._vecs is None:
+                return
+            self._vecs.flush()
+            self._keys.flush()
+            np.save(os.path.join(self.dir, "ticks.npy"), self._ticks)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def report(self) -> str:
+        """İnsan okunur isabet/ıskalama özeti ve tahmini kazanılan model süresi."""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        per_text = self.model_seconds / self.misses if self.misses else 0.0
+        return (
+            f"Embedding önbelleği [{os.path.basename(self.dir)}]: "
+            f"{self.hits:,} isabet / {self.misses:,} ıskalama (%{rate * 100:.1f}), "
+            f"{len(self):,} kayıt, {self.evictions:,} tahliye, "
+            f"model süresi {self.model_seconds:.1f}s, tahmini kazanç ~{self.hits * per_text:.1f}s"
+        )
+
+
+class CachedEmbedder:
+    """
+    `TextEmbedding` sarmalayıcısı: `embed()` önce önbelleğe bakar, yalnızca eksik
+    (ve batch içinde tekilleştirilmiş) metinleri modele gönderir. Dönüş sırası girişle aynıdır.
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def embed(self, texts: Iterable[str], **kwargs) -> Iterator[np.ndarray]:
+        norm = [normalize_text(t) for t in texts]
+        keys = [text_key(t) for t in norm]
+        found = self.cache.get_many(keys)
+
+        missing: Dict[int, str] = {}
+        for k, t, v in zip(keys, norm, found):
+            if v is None and k not in missing:
+                missing[k] = t
+
+        if missing:
+            t0 = time.perf_counter()
+            vecs = list(self.embedder.embed(list(missing.values()), **kwargs))
+            elapsed = time.perf_counter() - t0
+            self.cache.put_many(list(missing), vecs)
+            fresh = dict(zip(missing, vecs))
+        else:
+            elapsed, fresh = 0.0, {}
+
+        with self.cache._lock:
+            self.cache.misses += len(missing)
+            self.cache.hits += len(keys) - len(missing)
+            self.cache.model_seconds += elapsed
+
+        for k, v in zip(keys, found):
+            yield v if v is not None else np.asarray(fresh[k], dtype=np.float32)
+
+    def __getattr__(self, name):
+        # Diğer tüm öznitelikler (query_embed, model_name…) alttaki modele yönlendirilir
+        return getattr(self.embedder, name)
+
+
+def cached_embedder(embedder, namespace: str, model_name: Optional[str] = None):
+    """Ayarlarda önbellek açıksa `embedder`'ı sarmalar, kapalıysa olduğu gibi döner."""
+    if not settings.EMBED_CACHE:
+        return embedder
+    model_name = model_name or settings.MODEL_NAME
+    cache = EmbeddingCache(settings.EMBED_CACHE_DIR, model_name, namespace, settings.EMBED_CACHE_MAX_MB)
+    return CachedEmbedder(embedder, cache)
@@ -0,0 +1,127 @@
+# src/embed_pool.py
+# GPU olmayan makinelerde toplu ingest için çok süreçli (multi-process) embedding havuzu.
+# Her işçi süreç modeli bir kez yükler; Parquet row group'ları işçilere dağıtılır.
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+import pyarrow.parquet as pq
+
+from src.parquet_io import read_row_group, row_group_offsets
+
+# İşçi süreç içindeki model (süreç başına bir kez yüklenir), doküman öneki ve çıktı boyutu
+_worker_embedder = None
+_worker_prefix = ""
+_worker_dim = 0
+
+
+def default_onnx_threads(processes: int) -> int:
+    """Çekirdekleri süreçlere bölüştürür; aşırı abonelik (oversubscription) olmasın."""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def _init_worker(model_name: str, threads: int, prefix: str = "") -> None:
+    """Havuz başlatıcısı: ONNX iş parçacığı sayısını sınırlar ve modeli yükler."""
+    global _worker_embedder, _worker_prefix, _worker_dim
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _worker_prefix = prefix
+    from fastembed import TextEmbedding  # ağır import yalnızca işçide
+
+    from src.model_registry import get_spec
+
+    _worker_dim = get_spec(model_name).dim
+
+    _worker_embedder = TextEmbedding(model_name, device="cpu", threads=threads)
+
+
+def _embed_row_group(task: Tuple[str, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row group'u işçinin kendisi okur ve embed eder.
+    Ebeveyne yalnızca iki NumPy dizisi döner (tek parça buffer olarak aktarılır);
+    metin listeleri süreçler arasında hiç taşınmaz.
+    """
+    path, index, skip = task
+    texts, stars = read_row_group(path, index, skip)
+    if not texts:
+        # Boş row group ya da devamda tamamı atlanan satırlar: np.vstack boş listede hata verir
+        return np.empty((0, _worker_dim), dtype=np.float32), np.empty(0, dtype=np.int16)
+    if _worker_prefix:
+        texts = [_worker_prefix + t for t in texts]
+    vecs = np.vstack(list(_worker_embedder.embed(texts))).astype(np.float32, copy=False)
+    return vecs, np.asarray(stars, dtype=np.int16)
+
+
+class EmbedPool:
+    """
+    Row group'ları `processes` adet işçiye dağıtan embedding havuzu.
+
+    Sonuçlar gönderim sırasıyla döner; aynı anda en fazla `window` görev
+    havuzda bekler, böylece tüketici (upsert) yavaşsa bellek şişmez.
+    İşçiler kalıcı embedding önbelleğini (src/embed_cache.py) kullanmaz: önbellek tek yazarlı bir
+    memmap'tir, her metin modele gönderilir.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        processes: int,
+        onnx_threads: Optional[int] = None,
+        window: Optional[int] = None,
+        prefix: str = "",
+    ):
+        self.processes = max(1, processes)
+        self.onnx_threads = onnx_threads or default_onnx_threads(self.processes)
+        self.window = window or self.processes * 2
+        # "spawn": ONNX Runtime iş parçacıkları fork ile güvenli kopyalanmaz
+        ctx = mp.get_context("spawn")
+        self._pool = ctx.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(model_name, self.onnx_threads, prefix),   # prefix: modelin doküman öneki (bkz. model_registry)
+        )
+
+    def embed_files(
+        self, files: Iterable[Tuple[str, str, int]]
+    ) -> Iterator[Tuple[str, str, int, np.ndarray, np.ndarray]]:
+        """
+        `files`: (lang, parquet_path, start_row) üçlüleri.
+        Her row group için sırayla (lang, path, offset, vectors[float32, N×D], stars[int16]) üretir.
+        `start_row`'dan önce biten row group'lar işçilere hiç gönderilmez.
+        """
+        pending: deque = deque()
+        for lang, path, start_row in files:
+            pf = pq.ParquetFile(path)
+            offsets = row_group_offsets(pf)
+            for index, rg_start in enumerate(offsets):
+                rg_end = rg_start + pf.metadata.row_group(index).num_rows
+                if rg_end <= start_row:
+                    continue
+                skip = max(0, start_row - rg_start)
+                res = self._pool.apply_async(_embed_row_group, ((path, index, skip),))
+                pending.append((lang, path, rg_start + skip, res))
+                if len(pending) >= self.window:
+                    yield self._pop(pending)
+        while pending:
+            yield self._pop(pending)
+
+    @staticmethod
+    def _pop(pending: deque):
+        lang, path, offset, res = pending.popleft()
+        vecs, stars = res.get()
+        return lang, path, offset, vecs, stars
+
+    def close(self) -> None:
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> "EmbedPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
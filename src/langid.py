@@ -0,0 +1,215 @@
+# src/langid.py
+# Sorgular ve yeni yorumlar için yerel, hızlı dil tanıma → shard-key yönlendirmesi.
+#
+# * Önce yazı sistemi (script) sayılır: kana varsa ja; yalnızca Han karakterleri → zh/ja;
+#   Latin harfleri → en/de/fr/es. Aday dil kümesi böylece model olmadan da daralır.
+# * Adaylar arasında karakter 1-3 gram'larının özetlenmiş (hashed) sayımları üzerinde çok terimli
+#   Naive Bayes ile olasılık hesaplanır. Model dil Parquet dosyalarından örneklemle eğitilir
+#   (`python -m src.langid --train`) ve `LANGID_PATH`'e kaydedilir; yoksa adaylar eşit olasılıklıdır.
+# * `route()` en olası dillerden, toplam olasılık LANG_ROUTE_THRESHOLD'u geçene kadar shard seçer;
+#   güven düşükse küme genişler ve en kötü durumda tüm shard'lara (fan-out) döner.
+#
+# Kullanım:  python -m src.langid --train [--sample 5000]   |   python -m src.langid "metin"
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.config import settings
+from src.embed_cache import normalize_text
+
+LANGS = ("en", "de", "fr", "es", "ja", "zh")
+LATIN = ("en", "de", "fr", "es")
+_BITS = 17                      # 2^17 özet kovası (dil başına 512 KB float32)
+_MAX_CHARS = 512                # uzun metinlerde ilk 512 karakter yeterli
+_NON_LETTER = re.compile(r"[\W\d_]+")
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_POW = np.uint64(1_000_003) ** np.arange(3, dtype=np.uint64)
+
+_lock = threading.Lock()
+_cache: Dict[str, tuple] = {}
+
+
+def _codepoints(text: str) -> np.ndarray:
+    """Küçük harfe çevrilmiş, harf dışı karakterleri tek boşluğa indirilmiş metnin kod noktaları."""
+    text = _NON_LETTER.sub(" ", normalize_text(text)[:_MAX_CHARS].lower())
+    return np.frombuffer(f" {text.strip()} ".encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+
+def scripts(cps: np.ndarray) -> Dict[str, int]:
+    """Yazı sistemi başına harf sayısı: kana, han, latin, other."""
+    kana = ((cps >= 0x3040) & (cps <= 0x30FF)) | ((cps >= 0x31F0) & (cps <= 0x31FF)) | ((cps >= 0xFF66) & (cps <= 0xFF9F))
+    han = ((cps >= 0x4E00) & (cps <= 0x9FFF)) | ((cps >= 0x3400) & (cps <= 0x4DBF)) | ((cps >= 0xF900) & (cps <= 0xFAFF))
+    latin = ((cps >= 0x61) & (cps <= 0x7A)) | ((cps >= 0xDF) & (cps <= 0x24F) & (cps != 0xF7))
+    letters = cps != 0x20
+    counts = {"kana": int(kana.sum()), "han": int(han.sum()), "latin": int(latin.sum())}
+    counts["other"] = int(letters.sum()) - sum(counts.values())
+    return counts
+
+
+def candidates(cps: np.ndarray, langs: Sequence[str] = LANGS) -> List[str]:
+    """Yazı sistemine göre olası diller (`langs` sırasıyla); harf yoksa ya da bilinmeyen yazıysa tümü."""
+    s = scripts(cps)
+    if s["other"] > max(s["kana"], s["han"], s["latin"]):
+        return list(langs)   # ör. Hangul / Kiril: desteklenen bir dil değil → yönlendirme yapılmaz
+    found = set()
+    if s["kana"]:
+        found.add("ja")      # kana yalnızca Japoncada geçer
+    elif s["han"]:
+        found.update(("zh", "ja"))
+    if s["latin"]:
+        found.update(LATIN)
+    picked = [lang for lang in langs if lang in found]
+    return picked or list(langs)
+
+
+def features(cps: np.ndarray, bits: int = _BITS) -> np.ndarray:
+    """Karakter 1, 2 ve 3-gram'larının kova indeksleri (tekrarlar dahil; sayım için)."""
+    parts = []
+    for n in (1, 2, 3):
+        if len(cps) < n:
+            break
+        windows = sliding_window_view(cps, n)
+        parts.append((windows * _POW[:n]).sum(axis=1, dtype=np.uint64) + np.uint64(n))  # taşma mod 2^64 (bilinçli)
+    if not parts:
+        return np.zeros(0, dtype=np.intp)
+    h = np.concatenate(parts)
+    h = (h ^ (h >> np.uint64(29))) * _MIX
+    return (h >> np.uint64(64 - bits)).astype(np.intp)
+
+
+class LangModel:
+    """Dil × kova log-olasılık tablosu (çok terimli Naive Bayes, eşit önsel)."""
+
+    def __init__(self, langs: Sequence[str], log_probs: np.ndarray):
+        self.langs = list(langs)
+        self.log_probs = np.ascontiguousarray(log_probs, dtype=np.float32)
+        self.bits = int(np.log2(self.log_probs.shape[1]))
+
+    @classmethod
+    def fit(cls, texts: Dict[str, Sequence[str]], bits: int = _BITS, alpha: float = 0.5) -> "LangModel":
+        langs = sorted(texts)
+        counts = np.zeros((len(langs), 1 << bits), dtype=np.float64)
+        for i, lang in enumerate(langs):
+            feats = [features(_codepoints(text), bits) for text in texts[lang]]
+            counts[i] = np.bincount(np.concatenate(feats or [np.zeros(0, dtype=np.intp)]), minlength=1 << bits)
+        log_probs = np.log(counts + alpha) - np.log(counts.sum(axis=1, keepdims=True) + alpha * (1 << bits))
+        return cls(langs, log_probs)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, langs=np.array(self.langs), log_probs=self.log_probs)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LangModel":
+        with np.load(path) as f:
+            return cls([str(x) for x in f["langs"]], f["log_probs"])
+
+    def scores(self, cps: np.ndarray, langs: Sequence[str]) -> np.ndarray:
+        rows = np.array([self.langs.index(lang) for lang in langs])
+        return self.log_probs[rows[:, None], features(cps, self.bits)].sum(axis=1, dtype=np.float64)
+
+
+def get_model() -> Optional[LangModel]:
+    """LANGID_PATH'teki model (yoksa None); dosya değişirse yeniden okunur."""
+    path = settings.LANGID_PATH
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        stamp = None
+    cached = _cache.get(path)
+    if cached is None or cached[0] != stamp:
+        with _lock:
+            cached = _cache.get(path)
+            if cached is None or cached[0] != stamp:
+                cached = _cache[path] = (stamp, LangModel.load(path) if stamp is not None else None)
+    return cached[1]
+
+
+def detect(text: str, langs: Sequence[str] = LANGS) -> Dict[str, float]:
+    """
+    `langs` üzerinde dil olasılıkları (toplamı 1, azalan sırada). Yazı sistemine uymayan diller 0;
+    model yoksa ya da adaylardan birini tanımıyorsa adaylar eşit olasılıklıdır.
+    """
+    cps = _codepoints(text)
+    cand = candidates(cps, langs)
+    model = get_model()
+    if len(cand) == 1 or model is None or any(lang not in model.langs for lang in cand) or len(cps) <= 2:
+        probs = np.full(len(cand), 1.0 / len(cand))
+    else:
+        s = model.scores(cps, cand)
+        probs = np.exp(s - s.max())
+        probs /= probs.sum()
+    out = {lang: 0.0 for lang in langs}
+    out.update(zip(cand, probs.tolist()))
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+
+def best(text: str, threshold: Optional[float] = None, langs: Sequence[str] = LANGS) -> Optional[str]:
+    """En olası dil; olasılığı `threshold`un (varsayılan LANG_ROUTE_THRESHOLD) altındaysa None."""
+    threshold = settings.LANG_ROUTE_THRESHOLD if threshold is None else threshold
+    lang, p = next(iter(detect(text, langs).items()))
+    return lang if p >= threshold else None
+
+
+def route(text: str, langs: Sequence[str] = LANGS, threshold: Optional[float] = None) -> List[str]:
+    """
+    Sorgulanacak shard-key'ler: en olası dillerden, toplam olasılık `threshold`u geçene kadar
+    (`langs` sırasıyla döner). Güven düşükse küme büyür; en kötü durumda `langs`'in tamamı.
+    """
+    threshold = settings.LANG_ROUTE_THRESHOLD if threshold is None else threshold
+    picked, total = set(), 0.0
+    for lang, p in detect(text, langs).items():
+        if total >= threshold or p <= 0:
+            break
+        picked.add(lang)
+        total += p
+    if total < threshold:
+        return list(langs)
+    return [lang for lang in langs if lang in picked]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Dil tanıma modeli: eğitim, değerlendirme ve deneme")
+    ap.add_argument("text", nargs="*", help="Dili tahmin edilecek metin(ler)")
+    ap.add_argument("--train", action="store_true", help="Dil Parquet dosyalarından modeli eğit ve kaydet")
+    ap.add_argument("--sample", type=int, default=None, help="Dil başına eğitim örneği (varsayılan LANGID_SAMPLE)")
+    ap.add_argument("--eval", type=int, default=2_000, help="Dil başına ayrık değerlendirme örneği (0 → atla)")
+    args = ap.parse_args(argv)
+
+    if args.train:
+        from src.embed_and_ingest import DATA_DIR
+        from src.parquet_io import sample_texts
+
+        paths = {lang: os.path.join(DATA_DIR, f"{lang}.parquet") for lang in LANGS}
+        paths = {lang: p for lang, p in paths.items() if os.path.exists(p)}
+        if not paths:
+            raise SystemExit("Eğitim için Parquet dosyası bulunamadı; önce download_data.py çalıştırın")
+        n = args.sample or settings.LANGID_SAMPLE
+        model = LangModel.fit({lang: sample_texts(p, n, seed=0) for lang, p in paths.items()})
+        model.save(settings.LANGID_PATH)
+        logger.success(f"Dil modeli ({', '.join(model.langs)}; dil başına {n:,} örnek) → {settings.LANGID_PATH}")
+        if args.eval:
+            for lang, p in paths.items():
+                # Eğitim örneklemiyle çakışabilir; tahmini doğruluk için yeterli
+                texts = sample_texts(p, args.eval, seed=1)
+                hits = sum(best(t, 0.0) == lang for t in texts)
+                shards = np.mean([len(route(t)) for t in texts])
+                logger.info(f"{lang}: doğruluk {hits / len(texts):.1%}, sorgu başına ortalama {shards:.2f} shard")
+    for text in args.text:
+        probs = detect(text)
+        print(f"{text[:60]!r}: " + ", ".join(f"{k} {v:.2f}" for k, v in probs.items() if v > 0) + f" → {route(text)}")
+
+
+if __name__ == "__main__":
+    main()
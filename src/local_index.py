@@ -0,0 +1,236 @@
+# src/local_index.py
+# Bellek-eşlemli (memmap) embedding matrisleri üzerinde yerel, tam (exact) arama motoru.
+# ANN geri çağırımını (recall) ölçmek için doğruluk referansı ve Qdrant erişilemezken yedek olarak kullanılır.
+#
+# Dizin yapısı (dil başına):
+#   {root}/{lang}/meta.json       → {"dim", "count", "dtype", "model"}
+#   {root}/{lang}/vectors.bin     → count × dim float32/float16 (L2-normalize)
+#   {root}/{lang}/stars.i8        → payload: yıldız (1-5)
+#   {root}/{lang}/ids.bin         → payload: nokta ID'si (36 baytlık UUID metni)
+#   {root}/{lang}/star_masks.npy  → yıldız başına paketlenmiş satır maskesi (6 × ceil(count/8))
+#
+# Kullanım (Qdrant'tan dışa aktarım):
+#   python -m src.local_index --langs fr es --dtype float16
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from src.search import Hit, SearchResult
+
+_ID_WIDTH = 36
+_BLOCK_ROWS = 65_536  # 8'in katı olmalı (paketli maskeler bayt sınırında bölünür)
+
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-12)
+
+
+class LocalIndexWriter:
+    """Tek bir dilin vektörlerini ve payload'unu diske ekleyerek (append) yazar."""
+
+    def __init__(self, root: str, lang: str, dim: int, dtype: str = "float32", model: str = ""):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype 'float32' veya 'float16' olmalı")
+        self.dir = os.path.join(root, lang)
+        os.makedirs(self.dir, exist_ok=True)
+        self.dim, self.dtype, self.model = dim, dtype, model
+        self.count = 0
+        self._vecs = open(os.path.join(self.dir, "vectors.bin"), "wb")
+        self._stars = open(os.path.join(self.dir, "stars.i8"), "wb")
+        self._ids = open(os.path.join(self.dir, "ids.bin"), "wb")
+
+    def append(self, ids: Sequence[str], vecs: np.ndarray, stars: Sequence[int]) -> None:
+        vecs = _normalize(vecs)
+        if vecs.shape[1] != self.dim:
+            raise ValueError(f"Beklenen boyut {self.dim}, gelen {vecs.shape[1]}")
+        self._vecs.write(vecs.astype(self.dtype).tobytes())
+        self._stars.write(np.asarray(stars, dtype=np.int8).tobytes())
+        self._ids.write(np.asarray([str(i) for i in ids], dtype=f"S{_ID_WIDTH}").tobytes())
+        self.count += len(vecs)
+
+    def close(self) -> None:
+        for f in (self._vecs, self._stars, self._ids):
+            f.close()
+        stars = np.fromfile(os.path.join(self.dir, "stars.i8"), dtype=np.int8)
+        # Yıldız başına paketli satır maskeleri (indeks 0 kullanılmaz)
+        masks = np.stack([np.packbits(stars == s) for s in range(6)])
+        np.save(os.path.join(self.dir, "star_masks.npy"), masks)
+        with open(os.path.join(self.dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count, "dtype": self.dtype, "model": self.model}, f)
+        logger.info(f"Yerel indeks yazıldı: {self.dir} ({self.count:,} satır, {self.dtype})")
+
+
+class LocalIndex:
+    """Tek bir dilin memmap matrisi üzerinde bloklu matris-vektör çarpımıyla tam top-k arama."""
+
+    def __init__(self, root: str, lang: str):
+        self.lang = lang
+        self.dir = os.path.join(root, lang)
+        with open(os.path.join(self.dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim, self.count, self.model = meta["dim"], meta["count"], meta.get("model", "")
+        self.vectors = np.memmap(
+            os.path.join(self.dir, "vectors.bin"), dtype=meta["dtype"], mode="r", shape=(self.count, self.dim)
+        )
+        self.stars = np.memmap(os.path.join(self.dir, "stars.i8"), dtype=np.int8, mode="r", shape=(self.count,))
+        self.ids = np.memmap(os.path.join(self.dir, "ids.bin"), dtype=f"S{_ID_WIDTH}", mode="r", shape=(self.count,))
+        self.star_masks = np.load(os.path.join(self.dir, "star_masks.npy"), mmap_mode="r")
+
+    def _allowed(self, stars: Optional[Sequence[int]]) -> Optional[np.ndarray]:
+        """Seçili yıldızların paketli maskelerini OR'lar (satır başına 1 bit)."""
+        if not stars:
+            return None
+        sel = sorted({int(s) for s in stars if 0 <= int(s) < len(self.star_masks)})
+        if not sel:
+            return np.zeros(self.star_masks.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(np.asarray(self.star_masks[sel]), axis=0)
+
+    def search(
+        self,
+        vector,
+        limit: int,
+        stars: Optional[Sequence[int]] = None,
+        block_rows: int = _BLOCK_ROWS,
+    ) -> List[Hit]:
+        """
+        Kosinüs benzerliğiyle tam top-`limit`. Matris bloklar halinde okunur,
+        böylece milyonlarca satır RAM'e tamamen yüklenmeden taranır.
+        """
+        if limit <= 0 or self.count == 0:
+            return []
+        q = _normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        block_rows = max(8, block_rows // 8 * 8)
+        packed = self._allowed(stars)
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for start in range(0, self.count, block_rows):
+            stop = min(start + block_rows, self.count)
+            scores = np.asarray(self.vectors[start:stop], dtype=np.float32) @ q
+            if packed is not None:
+                mask = np.unpackbits(packed[start // 8:(stop + 7) // 8], count=stop - start).astype(bool)
+                scores[~mask] = -np.inf
+            k = min(limit, stop - start)
+            top = np.argpartition(-scores, k - 1)[:k]
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > limit:
+                keep = np.argpartition(-best_scores, limit - 1)[:limit]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [
+            Hit(
+                language=self.lang,
+                stars=int(self.stars[r]),
+                score=float(best_scores[i]),
+                id=self.ids[r].decode(),
+            )
+            for i, r in ((i, int(best_rows[i])) for i in order)
+            if np.isfinite(best_scores[i])
+        ]
+
+
+class LocalEngine:
+    """Birden çok dilin yerel indeksini `search_shards` ile aynı sonuç şekliyle sunar."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._indexes: Dict[str, LocalIndex] = {}
+
+    def available(self, langs: Sequence[str]) -> List[str]:
+        return [l for l in langs if os.path.exists(os.path.join(self.root, l, "meta.json"))]
+
+    def index(self, lang: str) -> LocalIndex:
+        if lang not in self._indexes:
+            self._indexes[lang] = LocalIndex(self.root, lang)
+        return self._indexes[lang]
+
+    def search(
+        self, vector, langs: Sequence[str], limit: int, stars: Optional[Sequence[int]] = None
+    ) -> SearchResult:
+        result = SearchResult()
+        hits: List[Hit] = []
+        for lang in langs:
+            if lang not in self.available([lang]):
+                result.failed[lang] = "yerel indeks yok"
+                continue
+            hits.extend(self.index(lang).search(vector, limit, stars))
+        result.hits = sorted(hits, key=lambda h: -h.score)[:limit]
+        return result
+
+
+def export_from_qdrant(
+    client,
+    collection: str,
+    lang: str,
+    root: str,
+    dtype: str = "float32",
+    batch: int = 2048,
+    model: str = "",
+    scroll_filter=None,
+    use_shard_key: bool = True,
+    using: Optional[str] = None,
+):
+    """
+    Bir shard'ın tüm vektör + payload'larını Qdrant'tan scroll ile okuyup yerel indekse yazar.
+    Shard-key desteklemeyen yerel (in-process) Qdrant için `use_shard_key=False` ve
+    dil filtresi (`scroll_filter`) verilir. `using`: dışa aktarılacak named vector
+    (None → adsız tek vektörlü koleksiyon).
+    """
+    writer: Optional[LocalIndexWriter] = None
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            shard_key_selector=lang if use_shard_key else None,
+            scroll_filter=scroll_filter,
+            limit=batch,
+            offset=offset,
+            with_payload=["stars"],
+            with_vectors=[using] if using else True,
+        )
+        if points:
+            vecs = np.asarray([p.vector[using] if using else p.vector for p in points], dtype=np.float32)
+            if writer is None:
+                writer = LocalIndexWriter(root, lang, vecs.shape[1], dtype, model)
+            writer.append([p.id for p in points], vecs, [(p.payload or {}).get("stars", 0) for p in points])
+        if offset is None:
+            break
+    if writer is not None:
+        writer.close()
+        return writer.count
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from src.clients import get_client
+    from src.config import settings
+    from src.model_registry import vector_name
+    from src.qdrant_setup import LANGS
+
+    ap = argparse.ArgumentParser(description="Qdrant shard'larını yerel tam-arama indeksine aktarır.")
+    ap.add_argument("--langs", nargs="+", default=LANGS)
+    ap.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    ap.add_argument("--root", default=settings.LOCAL_INDEX_DIR)
+    args = ap.parse_args(argv)
+
+    for lang in args.langs:
+        n = export_from_qdrant(
+            get_client(), settings.COLLECTION, lang, args.root, args.dtype,
+            model=settings.MODEL_NAME, using=vector_name(),   # arayüz yedeği MODEL_NAME ile sorgular
+        )
+        logger.success(f"{lang}: {n:,} nokta yerel indekse aktarıldı.")
+
+
+if __name__ == "__main__":
+    main()
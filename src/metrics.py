@@ -0,0 +1,271 @@
+# src/metrics.py
+# Bağımlılıksız, iş parçacığı güvenli metrik kaydı: sayaç, gösterge (gauge) ve histogram.
+# Çıktı Prometheus metin biçimindedir (textfile collector veya /metrics ile kazınabilir);
+# histogramlar ayrıca son `window` gözlemi tutar, böylece p50/p95/p99 doğrudan hesaplanır.
+
+from __future__ import annotations
+
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Saniye cinsinden varsayılan kova sınırları (1 ms … 60 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    def esc(v) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    parts = [f'{n}="{esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = float(value)
+
+    def set_max(self, value: float) -> None:
+        with self._lock:
+            self.value = max(self.value, float(value))
+
+
+class Histogram:
+    """Kümülatif kovalar + toplam + son `window` gözlemlik kayan pencere (yüzdelikler için)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 2048):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # son kova: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            i = 0
+            while i < len(self.bounds) and value > self.bounds[i]:
+                i += 1
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    def quantiles(self, qs: Sequence[float] = (0.5, 0.95, 0.99)) -> Tuple[float, ...]:
+        """Kayan penceredeki gözlemlerden yüzdelikler (en yakın sıra yöntemi); boşsa NaN."""
+        with self._lock:
+            data = sorted(self.recent)
+        if not data:
+            return tuple(float("nan") for _ in qs)
+        return tuple(data[min(len(data) - 1, int(q * len(data)))] for q in qs)
+
+
+class _Family:
+    """Aynı ada sahip, etiket değerleriyle ayrışan metrikler."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Sequence[str], factory):
+        self.kind, self.name, self.help = kind, name, help
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kw):
+        if kw:
+            values = tuple(kw[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name}: beklenen etiketler {self.labelnames}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._factory()
+            return child
+
+    def items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Registry:
+    """Metrik aileleri kaydı; `render()` Prometheus metin biçimini üretir."""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind, name, help, labelnames, factory) -> _Family:
+        name = self.prefix + name
+        with self._lock:
+            fam = self._families.get(name)
+            if fam is None:
+                fam = self._families[name] = _Family(kind, name, help, labelnames, factory)
+            elif fam.kind != kind:
+                raise ValueError(f"{name} zaten {fam.kind} olarak kayıtlı")
+            return fam
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> _Family:
+        return self._family("counter", name, help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> _Family:
+        return self._family("gauge", name, help, labelnames, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        window: int = 2048,
+    ) -> _Family:
+        return self._family("histogram", name, help, labelnames, lambda: Histogram(buckets, window))
+
+    def families(self) -> List[_Family]:
+        with self._lock:
+            return list(self._families.values())
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for fam in self.families():
+            lines.append(f"# HELP {fam.name} {fam.help}")
+            lines.append(f"# TYPE {fam.name} {fam.kind}")
+            for values, m in fam.items():
+                if fam.kind == "histogram":
+                    cum = 0
+                    for bound, c in zip(list(m.bounds) + [float("inf")], m.counts):
+                        cum += c
+                        le = _labels(fam.labelnames, values, f'le="{_fmt(bound)}"')
+                        lines.append(f"{fam.name}_bucket{le} {cum}")
+                    lbl = _labels(fam.labelnames, values)
+                    lines.append(f"{fam.name}_sum{lbl} {_fmt(m.sum)}")
+                    lines.append(f"{fam.name}_count{lbl} {m.count}")
+                else:
+                    lines.append(f"{fam.name}{_labels(fam.labelnames, values)} {_fmt(m.value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Atomik yazım (node_exporter textfile collector yarım dosya görmez)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """
+    Sürecin (isteğe bağlı olarak sonlanmış alt süreçlerinin) tepe RSS değeri, bayt.
+    `resource` yalnızca Unix'te vardır; Windows'ta None döner (modül içe aktarılırken değil, burada yüklenir).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    rss = resource.getrusage(who).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # Linux: KiB
+
+
+def timed_iter(iterable: Iterable, observe) -> Iterator:
+    """Her `next()` çağrısının süresini `observe(saniye, öğe)` ile bildirir."""
+    it = iter(iterable)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        observe(time.perf_counter() - t0, item)
+        yield item
+
+
+class PeriodicWriter:
+    """Kaydı arka planda her `interval` saniyede bir dosyaya yazar (uzun çalışmalar sırasında kazıma için)."""
+
+    def __init__(self, registry: Registry, path: Optional[str], interval: float = 15.0, before_write=None):
+        self.registry, self.path, self.interval = registry, path, interval
+        self.before_write = before_write
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _write(self) -> None:
+        if self.before_write is not None:
+            self.before_write()
+        self.registry.write(self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def __enter__(self) -> "PeriodicWriter":
+        if self.path:
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.path:
+            self._write()
+
+
+def serve_metrics(registry: Registry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """`GET /metrics` ile kaydı Prometheus metin biçiminde sunan arka plan HTTP sunucusu."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # istek başına stderr satırı basma
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,78 @@
+# src/model_registry.py
+# Desteklenen fastembed modelleri: vektör boyutu, mesafe metriği, sorgu/doküman önekleri ve
+# koleksiyondaki named vector adı.
+#
+# Koleksiyon her model için ayrı bir named vector taşır; böylece geçiş (A/B) sırasında iki model
+# aynı noktalarda yan yana durur. Sorgu yolları vektör adını sorguyu embed eden modelden seçer.
+# Yeni bir model eklemek için MODELS'e bir satır eklemek yeterlidir.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from src.config import settings
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str                  # fastembed model adı (MODEL_NAME)
+    vector: str                # koleksiyondaki named vector adı
+    dim: int                   # modelin çıktı boyutu
+    distance: str = "Cosine"   # Qdrant mesafe metriği: Cosine | Dot | Euclid
+    query_prefix: str = ""     # sorgu metinlerinin önüne eklenir (ör. e5: "query: ")
+    document_prefix: str = ""  # yüklenen yorumların önüne eklenir (ör. e5: "passage: ")
+
+    def query_texts(self, texts: Sequence[str]) -> List[str]:
+        return [self.query_prefix + t for t in texts] if self.query_prefix else list(texts)
+
+    def document_texts(self, texts: Sequence[str]) -> List[str]:
+        return [self.document_prefix + t for t in texts] if self.document_prefix else list(texts)
+
+    def qdrant_distance(self):
+        from qdrant_client import models
+
+        return models.Distance(self.distance)
+
+
+MODELS: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in (
+        ModelSpec("BAAI/bge-small-en-v1.5", "bge_small_en", 384),
+        ModelSpec("BAAI/bge-base-en-v1.5", "bge_base_en", 768),
+        ModelSpec("BAAI/bge-small-zh-v1.5", "bge_small_zh", 512),
+        ModelSpec("sentence-transformers/all-MiniLM-L6-v2", "minilm_l6", 384),
+        ModelSpec("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", "minilm_multi", 384),
+        ModelSpec("sentence-transformers/paraphrase-multilingual-mpnet-base-v2", "mpnet_multi", 768),
+        ModelSpec("intfloat/multilingual-e5-large", "e5_large_multi", 1024,
+                  query_prefix="query: ", document_prefix="passage: "),
+    )
+}
+
+
+def get_spec(model: Optional[str] = None) -> ModelSpec:
+    """Model kaydı (varsayılan: MODEL_NAME). Kayıtlı olmayan model için KeyError."""
+    name = model or settings.MODEL_NAME
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise KeyError(
+            f"'{name}' model kaydında yok; boyut ve önekleriyle src/model_registry.py MODELS'e ekleyin "
+            f"(kayıtlı: {', '.join(MODELS)})"
+        ) from None
+
+
+def vector_name(model: Optional[str] = None) -> str:
+    """Modelin koleksiyondaki named vector adı (varsayılan: MODEL_NAME)."""
+    return get_spec(model).vector
+
+
+def collection_models() -> List[ModelSpec]:
+    """
+    Koleksiyonda named vector'ü bulunan modeller: COLLECTION_MODELS (boşsa yalnızca MODEL_NAME).
+    MODEL_NAME listede yoksa başa eklenir; sorgular her zaman onun vektörünü kullanabilmeli.
+    """
+    names = list(settings.COLLECTION_MODELS) or [settings.MODEL_NAME]
+    if settings.MODEL_NAME not in names:
+        names.insert(0, settings.MODEL_NAME)
+    return [get_spec(n) for n in names]
@@ -0,0 +1,125 @@
+# src/parquet_io.py
+# Yerel Parquet dosyalarından metin ve yıldız kolonlarını okuyan yardımcılar.
+# Qdrant istemcisine bağımlı değildir; embedding işçi süreçleri de bu modülü kullanır.
+
+from typing import NamedTuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+class Columns(NamedTuple):
+    """Dosya başına bir kez çözümlenen kolon eşlemesi."""
+    text: str        # 'review_body' veya 'text'
+    rating: str      # 'stars' veya 'label'
+    is_label: bool   # True → 0-4 label, yıldıza çevrilmeli
+
+
+def resolve_columns(schema: pa.Schema) -> Columns:
+    """
+    Şemadan metin ve puan kolonlarını seçer.
+    Metin ve puan kolonlarının isimleri farklı olabileceği için esnek kontrol yapar.
+    """
+    names = set(schema.names)
+
+    # --- METİN ---
+    if "review_body" in names:
+        text = "review_body"
+    elif "text" in names:
+        text = "text"
+    else:
+        raise KeyError("Metin kolonu bulunamadı ('review_body' veya 'text')")
+
+    # --- YILDIZ / LABEL ---
+    if "stars" in names:
+        return Columns(text, "stars", False)
+    if "label" in names:           # 0-4 → 1-5’e çevrilecek
+        return Columns(text, "label", True)
+    raise KeyError("Puan kolonu bulunamadı ('stars' veya 'label')")
+
+
+def stars_array(col, is_label: bool) -> np.ndarray:
+    """Puan kolonunu Arrow compute ile (Python döngüsü olmadan) int16 yıldız dizisine çevirir."""
+    col = pc.cast(col, pa.int16())
+    if is_label:
+        col = pc.add(col, pa.scalar(1, pa.int16()))
+    return col.to_numpy(zero_copy_only=False)
+
+
+def _split(data, cols: Columns):
+    """RecordBatch/Table → (texts listesi, stars int16 dizisi)."""
+    texts = data.column(cols.text).to_pylist()
+    return texts, stars_array(data.column(cols.rating), cols.is_label)
+
+
+def iter_parquet_rows(path, batch_size):
+    """
+    Parquet dosyasını batch'ler halinde okur ve her batch'te metin ve yıldız puanlarını döneryor.
+    """
+    for _, texts, stars in iter_parquet_batches(path, batch_size):
+        yield texts, stars
+
+
+def row_group_offsets(pf):
+    """Her row group'un dosya içindeki ilk satır numarası."""
+    offsets, start = [], 0
+    for i in range(pf.num_row_groups):
+        offsets.append(start)
+        start += pf.metadata.row_group(i).num_rows
+    return offsets
+
+
+def iter_parquet_batches(path, batch_size, start_row=0):
+    """
+    `start_row`'dan itibaren (offset, texts, stars) batch'leri üretir.
+    Yalnızca metin ve puan kolonları okunur; tamamı `start_row`'dan önce kalan
+    row group'lar hiç okunmaz (decode edilmez).
+    """
+    pf = pq.ParquetFile(path)
+    cols = resolve_columns(pf.schema_arrow)
+    offsets = row_group_offsets(pf)
+    if not offsets:
+        return
+    first = 0
+    while first + 1 < len(offsets) and offsets[first + 1] <= start_row:
+        first += 1
+
+    offset = offsets[first]
+    for batch in pf.iter_batches(
+        batch_size=batch_size,
+        row_groups=range(first, len(offsets)),
+        columns=[cols.text, cols.rating],
+    ):
+        n = batch.num_rows
+        if offset + n <= start_row:
+            offset += n
+            continue
+        skip = max(0, start_row - offset)
+        if skip:
+            batch = batch.slice(skip)
+        texts, stars = _split(batch, cols)
+        yield offset + skip, texts, stars
+        offset += n
+
+
+def read_row_group(path, index, skip=0):
+    """Parquet dosyasının tek bir row group'unu okuyup (texts, stars) döner; ilk `skip` satır atlanır."""
+    pf = pq.ParquetFile(path)
+    cols = resolve_columns(pf.schema_arrow)
+    table = pf.read_row_group(index, columns=[cols.text, cols.rating])
+    if skip:
+        table = table.slice(skip)
+    return _split(table, cols)
+
+
+def sample_texts(path, n, seed=0):
+    """Dosyadan rastgele (tohumlu) en fazla `n` metin; yalnızca metin kolonu okunur."""
+    pf = pq.ParquetFile(path)
+    cols = resolve_columns(pf.schema_arrow)
+    total = pf.metadata.num_rows
+    if total <= n:
+        return pf.read(columns=[cols.text]).column(cols.text).to_pylist()
+    idx = np.sort(np.random.default_rng(seed).choice(total, size=n, replace=False))
+    return pf.read(columns=[cols.text]).column(cols.text).take(pa.array(idx)).to_pylist()
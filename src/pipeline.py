@@ -0,0 +1,126 @@
+# src/pipeline.py
+# Okuma → embedding → upsert aşamalarını sınırlı (bounded) kuyruklarla birbirine bağlayan iş hattı.
+
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Sequence
+
+from loguru import logger
+
+# Kuyruğun kapandığını bildiren işaret nesnesi
+_SENTINEL = object()
+# Kuyruk bekleme süresi (sn); durdurma sinyalini bu aralıkla kontrol ederiz
+_POLL = 0.1
+
+
+@dataclass
+class Stage:
+    """
+    İş hattının tek bir aşaması.
+    `fn` her öğe için çağrılır; dönüş değeri sonraki aşamanın kuyruğuna yazılır.
+    `None` dönerse öğe düşürülür (sonraki aşamaya geçmez).
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Kuyruk doluysa bekler (backpressure); durdurma istenirse False döner."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_pipeline(source: Iterable[Any], stages: Sequence[Stage], depth: int = 4) -> None:
+    """
+    `source` öğelerini sırayla `stages` aşamalarından geçirir.
+
+    * Her aşamanın önünde en fazla `depth` öğe tutan bir kuyruk bulunur; yavaş aşama
+      öncekileri bekletir, böylece bellek kullanımı sabit kalır.
+    * Kaynak (ör. Parquet okuma) ayrı bir iş parçacığında çalışır; aşamalar
+      `workers` kadar iş parçacığıyla paralel yürür.
+    * Herhangi bir aşamada hata olursa tüm hat durdurulur ve ilk hata yeniden fırlatılır.
+    """
+    if not stages:
+        raise ValueError("En az bir aşama gerekli")
+
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    queues = [queue.Queue(maxsize=max(1, depth)) for _ in stages]
+    remaining = [max(1, s.workers) for s in stages]
+    lock = threading.Lock()
+
+    def fail(exc: BaseException) -> None:
+        with lock:
+            errors.append(exc)
+        stop.set()
+
+    def close(idx: int) -> None:
+        # Aşama `idx` için her işçiye bir kapanış işareti gönder
+        for _ in range(max(1, stages[idx].workers)):
+            if not _put(queues[idx], _SENTINEL, stop):
+                return
+
+    def feed() -> None:
+        try:
+            for item in source:
+                if not _put(queues[0], item, stop):
+                    return
+        except BaseException as exc:  # noqa: BLE001 — hata ana iş parçacığına taşınır
+            fail(exc)
+        finally:
+            close(0)
+
+    def work(idx: int) -> None:
+        stage = stages[idx]
+        q_in = queues[idx]
+        try:
+            while not stop.is_set():
+                try:
+                    item = q_in.get(timeout=_POLL)
+                except queue.Empty:
+                    continue
+                if item is _SENTINEL:
+                    break
+                out = stage.fn(item)
+                if out is not None and idx + 1 < len(stages):
+                    if not _put(queues[idx + 1], out, stop):
+                        return
+        except BaseException as exc:  # noqa: BLE001
+            logger.error(f"Aşama '{stage.name}' hata verdi: {exc}")
+            fail(exc)
+        finally:
+            # Aşamanın son işçisi bir sonraki aşamayı kapatır
+            with lock:
+                remaining[idx] -= 1
+                last = remaining[idx] == 0
+            if last and idx + 1 < len(stages):
+                close(idx + 1)
+
+    threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+    for idx, stage in enumerate(stages):
+        threads.extend(
+            threading.Thread(target=work, args=(idx,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for n in range(max(1, stage.workers))
+        )
+
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=_POLL)
+    except KeyboardInterrupt:
+        stop.set()
+        raise
+
+    if errors:
+        raise errors[0]
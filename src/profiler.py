@@ -0,0 +1,63 @@
+# src/profiler.py
+# Bağımlılıksız örnekleyici (sampling) profilleyici: belirli aralıklarla tüm iş parçacıklarının
+# yığınlarını (`sys._current_frames`) okur ve "collapsed stack" biçiminde yazar.
+# Çıktı speedscope.app veya flamegraph.pl ile alev grafiğine dönüştürülebilir.
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+from loguru import logger
+
+
+class SamplingProfiler:
+    """`with SamplingProfiler("profile.txt"):` bloğu boyunca her `interval` saniyede bir örnek alır."""
+
+    def __init__(self, path: str, interval: float = 0.005, max_depth: int = 64):
+        self.path, self.interval, self.max_depth = path, interval, max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        logger.info(f"Profil: {sum(self.samples.values()):,} örnek → {self.path}")
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
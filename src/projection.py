@@ -0,0 +1,149 @@
+# src/projection.py
+# Saklanan vektörler için öğrenilmiş boyut indirgeme (PCA) — isteğe bağlı.
+#
+# * Ingest başında bir örneklem üzerinde NumPy ile PCA uydurulur ve koleksiyonun yanına
+#   `{PROJECTION_DIR}/{koleksiyon}.{named vector}.npz` olarak kaydedilir (ortalama + bileşenler
+#   + model adı); her modelin vektörü kendi projeksiyonuna sahiptir.
+# * Aynı dönüşüm (merkezleme → izdüşüm → L2 normalize) hem ingest'te hem TÜM sorgu yollarında
+#   `project()` ile uygulanır; koleksiyonun vektör boyutu da bu dosyadan okunur.
+# * Dosya yoksa `project()` vektörleri değiştirmeden döner (tam boyutlu koleksiyon).
+# * Dosya değişirse (ör. src/reindex.py yeni sürümü alias'a bağlarken) çalışan süreçler bir sonraki
+#   çağrıda yeniden okur; yeniden başlatma gerekmez.
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.config import settings
+from src.model_registry import get_spec
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[str, str], Tuple[Optional[int], Optional["Projection"]]] = {}
+
+
+class Projection:
+    """`dim` boyutlu PCA izdüşümü; çıktı kosinüs araması için L2 normalize edilir."""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, model: str = "", explained: float = float("nan")):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)  # dim × kaynak boyut
+        self.model = model
+        self.explained = float(explained)   # korunan varyans oranı
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+
+    def apply(self, vecs) -> np.ndarray:
+        """(N × kaynak) veya tek vektör → (N × dim) / (dim,) float32."""
+        arr = np.asarray(vecs, dtype=np.float32)
+        if arr.shape[-1] != self.source_dim:
+            raise ValueError(f"Projeksiyon {self.source_dim} boyut bekliyor, gelen {arr.shape[-1]}")
+        out = (arr - self.mean) @ self.components.T
+        return out / np.maximum(np.linalg.norm(out, axis=-1, keepdims=True), 1e-12)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, mean=self.mean, components=self.components, model=self.model, explained=self.explained)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as f:
+            return cls(f["mean"], f["components"], str(f["model"]), float(f["explained"]))
+
+
+def fit_pca(sample: np.ndarray, dim: int, model: str = "") -> Projection:
+    """
+    Örneklem üzerinde PCA: merkezlenmiş kovaryansın (kaynak × kaynak) öz ayrışımından
+    en büyük `dim` bileşen. Örneklem sayısından bağımsız olarak maliyet kaynak boyutla sınırlıdır.
+    """
+    x = np.asarray(sample, dtype=np.float64)
+    if dim <= 0 or dim >= x.shape[1]:
+        raise ValueError(f"Projeksiyon boyutu 1..{x.shape[1] - 1} aralığında olmalı (verilen {dim})")
+    if len(x) < dim:
+        raise ValueError(f"PCA için en az {dim} örnek gerekli (verilen {len(x)})")
+    mean = x.mean(axis=0)
+    cov = np.cov(x - mean, rowvar=False)
+    values, vectors = np.linalg.eigh(cov)             # artan sırada
+    order = np.argsort(values)[::-1][:dim]
+    explained = values[order].sum() / max(values.sum(), 1e-12)
+    return Projection(mean, vectors[:, order].T, model, explained)
+
+
+def artifact_path(collection: Optional[str] = None, model: Optional[str] = None) -> str:
+    return os.path.join(settings.PROJECTION_DIR, f"{collection or settings.COLLECTION}.{get_spec(model).vector}.npz")
+
+
+def _stamp(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_projection(collection: Optional[str] = None, model: Optional[str] = None) -> Optional[Projection]:
+    """
+    Koleksiyondaki model vektörünün projeksiyonu (yoksa None). Dosya süreç içinde önbelleklenir;
+    her çağrıda yalnızca mtime kontrol edilir, dosya değiştiyse yeniden okunur.
+    """
+    key = (collection or settings.COLLECTION, model or settings.MODEL_NAME)
+    path = artifact_path(*key)
+    stamp = _stamp(path)
+    cached = _cache.get(key)
+    if cached is None or cached[0] != stamp:
+        with _lock:
+            cached = _cache.get(key)
+            if cached is None or cached[0] != stamp:
+                proj = Projection.load(path) if stamp is not None else None
+                if proj is not None and proj.model and proj.model != key[1]:
+                    raise ValueError(f"{path}: projeksiyon '{proj.model}' modeli için uydurulmuş, beklenen '{key[1]}'")
+                if cached is not None:
+                    logger.info(f"Projeksiyon dosyası değişti, yeniden okundu: {path}")
+                cached = _cache[key] = (stamp, proj)
+    return cached[1]
+
+
+def reset_cache() -> None:
+    """Süreç önbelleğini boşaltır (dosyalar bir sonraki çağrıda yeniden okunur)."""
+    with _lock:
+        _cache.clear()
+
+
+def project(vecs, collection: Optional[str] = None, model: Optional[str] = None):
+    """Koleksiyonun (model vektörü için) projeksiyonu varsa uygular, yoksa vektörleri olduğu gibi döner."""
+    proj = get_projection(collection, model)
+    return vecs if proj is None else proj.apply(vecs)
+
+
+def vector_size(collection: Optional[str] = None, model: Optional[str] = None) -> int:
+    """Koleksiyonda saklanan vektör boyutu: projeksiyon dosyasından, yoksa modelin kendi boyutu."""
+    proj = get_projection(collection, model)
+    return get_spec(model).dim if proj is None else proj.dim
+
+
+def fit_from_texts(
+    embedder, texts: Sequence[str], dim: int, collection: Optional[str] = None, model: Optional[str] = None
+) -> Projection:
+    """Metin örneklemini (doküman önekiyle) embed eder, PCA uydurur ve projeksiyon dosyasına kaydeder."""
+    spec = get_spec(model)
+    sample = np.vstack(list(embedder.embed(spec.document_texts(texts)))).astype(np.float32, copy=False)
+    proj = fit_pca(sample, dim, model=spec.name)
+    path = artifact_path(collection, spec.name)
+    proj.save(path)
+    reset_cache()
+    logger.info(
+        f"Projeksiyon uyduruldu: {proj.source_dim} → {proj.dim} boyut, "
+        f"{len(sample):,} örnek, korunan varyans {proj.explained:.1%} → {path}"
+    )
+    return proj
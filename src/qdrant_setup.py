@@ -1,37 +1,266 @@
 # src/qdrant_setup.py
 # Qdrant istemcisi ve koleksiyon/shard anahtarı (shard-key) kurulumunu yöneten yardımcı dosya.
 
-from qdrant_client import QdrantClient, models
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+from src.clients import get_client
 from src.config import settings
+from src.model_registry import collection_models
+from src.projection import vector_size
+
+
+def __getattr__(name):
+    # Geriye dönük uyumluluk: `from src.qdrant_setup import client` ilk erişimde paylaşılan istemciyi verir
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Shard-key olarak kullanılan diller
+LANGS = ["en", "de", "fr", "es", "ja", "zh"]
+# Qdrant'ın varsayılan indeksleme eşiği (KB); toplu yükleme sonrası değer bilinmiyorsa buna dönülür
+DEFAULT_INDEXING_THRESHOLD = 10_000
+
+
+def payload_indexes():
+    """
+    Koleksiyonda bulunması gereken payload indeksleri.
+    * stars   : integer; hem eşitlik (lookup) hem aralık (range) filtrelerini destekler
+    * language: keyword; TENANT_LAYOUT açıksa "tenant" olarak işaretlenir ve Qdrant
+                aynı dile ait noktaları diskte birlikte yerleştirir
+    """
+    from qdrant_client import models  # ağır import (~1 s) yalnızca kullanımda
+
+    return {
+        "stars": models.IntegerIndexParams(
+            type=models.IntegerIndexType.INTEGER, lookup=True, range=True
+        ),
+        "language": models.KeywordIndexParams(
+            type=models.KeywordIndexType.KEYWORD, is_tenant=settings.TENANT_LAYOUT
+        ),
+    }
+
+
+def ensure_payload_indexes(collection_name=None):
+    """
+    Eksik payload indekslerini oluşturur (migrasyon adımı; tekrar çalıştırmak güvenlidir).
+    Oluşturulan alan adlarını döner.
+    """
+    name = collection_name or settings.COLLECTION
+    existing = get_client().get_collection(name).payload_schema or {}
+    created = []
+    for field, schema in payload_indexes().items():
+        if field in existing:
+            continue
+        get_client().create_payload_index(name, field_name=field, field_schema=schema, wait=True)
+        created.append(field)
+    return created
+
+
+def quantization_config():
+    """
+    Ayarlardaki QUANTIZATION moduna göre Qdrant nicemleme (quantization) yapılandırması.
+    * scalar: float32 → int8, vektör belleği ~4x küçülür
+    * binary: boyut başına 1 bit, ~32x küçülür (rescore ile birlikte kullanılmalı)
+    * none  : yalnızca orijinal float32 vektörler
+    """
+    from qdrant_client import models
+
+    mode = settings.QUANTIZATION
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=settings.QUANTIZATION_ALWAYS_RAM)
+        )
+    return None
+
+
+def _quantization_layout(cfg):
+    """Mevcut koleksiyon yapılandırmasını ('mod', always_ram) olarak özetler."""
+    from qdrant_client import models
+
+    if isinstance(cfg, models.ScalarQuantization):
+        return "scalar", bool(cfg.scalar.always_ram)
+    if isinstance(cfg, models.BinaryQuantization):
+        return "binary", bool(cfg.binary.always_ram)
+    if cfg is None:
+        return "none", None
+    return type(cfg).__name__, None
+
+
+def sync_quantization(collection_name=None):
+    """
+    Koleksiyonun nicemleme düzenini ayarlarla eşitler; fark varsa Qdrant segmentleri
+    yeni düzene göre yeniden oluşturur. Değişiklik yapıldıysa True döner.
+    """
+    from qdrant_client import models
+
+    name = collection_name or settings.COLLECTION
+    current = _quantization_layout(get_client().get_collection(name).config.quantization_config)
+    wanted = quantization_config()
+    target = _quantization_layout(wanted)
+    if current == target or (current[0] == target[0] == "none"):
+        return False
+    get_client().update_collection(
+        name,
+        quantization_config=wanted if wanted is not None else models.Disabled.DISABLED,
+    )
+    return True
 
-# Qdrant veritabanına bağlantı kuran istemci (client) nesnesi
-client = QdrantClient(
-    url=str(settings.QDRANT_URL),           # Qdrant sunucu adresi
-    api_key=settings.QDRANT_API_KEY,        # API anahtarı
-    prefer_grpc=True,                       # gRPC protokolünü
-)
 
-def init_collection():
+def wait_until_optimized(collection_name=None, poll=2.0, timeout=None):
     """
-    Qdrant'da koleksiyon yoksa oluşturur, varsa hiçbir şey yapmaz.
-    Ayrıca her dil için shard-key ekler.
+    Koleksiyon durumu art arda iki kontrolde GREEN (bekleyen optimizasyon yok) olana dek bekler.
+    `timeout` saniye içinde bitmezse TimeoutError fırlatır (None → sınırsız).
     """
+    from qdrant_client import models
+
+    name = collection_name or settings.COLLECTION
+    started = time.monotonic()
+    green_streak = 0
+    while green_streak < 2:
+        time.sleep(poll)
+        info = get_client().get_collection(name)
+        if info.status == models.CollectionStatus.RED:
+            raise RuntimeError(f"{name}: koleksiyon RED durumunda ({info.optimizer_status})")
+        green_streak = green_streak + 1 if info.status == models.CollectionStatus.GREEN else 0
+        if timeout and time.monotonic() - started > timeout:
+            raise TimeoutError(f"{name}: optimizasyon {timeout:.0f}s içinde bitmedi")
+    logger.info(f"{name}: indeksleme tamamlandı ({time.monotonic() - started:.0f}s)")
+
+
+@contextmanager
+def bulk_load(collection_name=None):
+    """
+    Toplu yükleme profili.
+
+    Girişte HNSW indekslemesi kapatılır (indexing_threshold=0) ve BULK_MAX_SEGMENT_SIZE
+    verilmişse segmentler büyütülür; böylece yüz binlerce nokta gelirken graf sürekli
+    yeniden kurulmaz. Çıkışta (hata olsa bile) sunum ayarları geri yüklenir ve
+    optimizasyon bitene kadar beklenir; yarım indekslenmiş koleksiyon hizmete dönmez.
+    """
+    from qdrant_client import models
+
+    name = collection_name or settings.COLLECTION
+    serving = get_client().get_collection(name).config.optimizer_config
+    bulk = models.OptimizersConfigDiff(
+        indexing_threshold=0,
+        max_segment_size=settings.BULK_MAX_SEGMENT_SIZE,
+    )
+    get_client().update_collection(name, optimizers_config=bulk)
+    logger.info(f"{name}: toplu yükleme profili etkin (indeksleme kapalı)")
     try:
-        client.get_collection(settings.COLLECTION)
-        # Koleksiyon zaten var → hiçbir şey yapma
-        return
+        yield
+    finally:
+        threshold = serving.indexing_threshold
+        if not threshold:
+            # None diff'te "değiştirme" demektir (0'da kalır); 0 ise önceki yarım kalmış toplu yüklemeden
+            # kalmış olabilir → her iki durumda da HNSW indekslemesi açık bir değerle geri açılır
+            logger.warning(f"{name}: indexing_threshold={threshold}, {DEFAULT_INDEXING_THRESHOLD} olarak ayarlanıyor")
+            threshold = DEFAULT_INDEXING_THRESHOLD
+        restore = models.OptimizersConfigDiff(
+            indexing_threshold=threshold,
+            max_segment_size=serving.max_segment_size,
+        )
+        if settings.BULK_MAX_SEGMENT_SIZE and serving.max_segment_size is None:
+            # Diff ile "otomatik" değere dönülemez; büyük segmentler aramada da sorun değildir
+            logger.warning(f"{name}: max_segment_size otomatikti, {settings.BULK_MAX_SEGMENT_SIZE} olarak kalıyor")
+        get_client().update_collection(name, optimizers_config=restore)
+        logger.info(f"{name}: sunum ayarları geri yüklendi, HNSW indeksi kuruluyor…")
+        wait_until_optimized(name, timeout=settings.BULK_OPTIMIZE_TIMEOUT or None)
+
+
+def vectors_config(collection_name=None):
+    """
+    Model kaydındaki her koleksiyon modeli için bir named vector (bkz. src/model_registry.py).
+    Boyut projeksiyon dosyasından (varsa) ya da modelin kendisinden, mesafe model kaydından gelir.
+    """
+    from qdrant_client import models
+
+    return {
+        spec.vector: models.VectorParams(
+            size=vector_size(collection_name, spec.name), distance=spec.qdrant_distance()
+        )
+        for spec in collection_models()
+    }
+
+
+def check_vectors(collection_name=None):
+    """
+    Mevcut koleksiyonun named vector'lerini beklenen düzenle karşılaştırır; eksik ya da boyutu
+    farklı vektör varsa hata verir. Qdrant mevcut koleksiyona yeni vektör eklemediği için
+    yeni bir model ancak yeni (sürümlü) bir koleksiyonla devreye alınabilir.
+    """
+    name = collection_name or settings.COLLECTION
+    existing = get_client().get_collection(name).config.params.vectors
+    if not isinstance(existing, dict):
+        raise RuntimeError(
+            f"{name}: koleksiyon adsız (tek) vektör düzeninde; named vector'lü sürüme geçmek için "
+            "`python -m src.reindex --replace-collection` çalıştırın (bkz. README, Notlar: Named vector'ler)"
+        )
+    for vector, params in vectors_config(name).items():
+        if vector not in existing:
+            raise RuntimeError(f"{name}: '{vector}' vektörü koleksiyonda yok (mevcut: {', '.join(existing)})")
+        if existing[vector].size != params.size:
+            raise RuntimeError(
+                f"{name}: '{vector}' {existing[vector].size} boyutlu, beklenen {params.size} "
+                "(model veya projeksiyon dosyası değişmiş olabilir)"
+            )
+
+
+def init_collection(collection_name=None):
+    """
+    Qdrant'da koleksiyon (varsayılan COLLECTION) yoksa oluşturur; varsa named vector düzenini
+    doğrular ve yalnızca nicemleme düzenini ayarlarla eşitler.
+    Her koleksiyon modeli için bir named vector oluşturulur; boyutu projeksiyon dosyasından ya da
+    model kaydından gelir (bkz. src/projection.py, src/model_registry.py).
+    Ayrıca her dil için shard-key ve payload indekslerini ekler.
+    Mevcut koleksiyona indeks eklemek için `python -m src.qdrant_setup` çalıştırın.
+    """
+    from qdrant_client import models
+
+    name = collection_name or settings.COLLECTION
+    try:
+        get_client().get_collection(name)
+        exists = True
     except Exception:
-        pass  # get_collection hata verdiyse oluştur
+        exists = False  # get_collection hata verdiyse oluştur
+    if exists:
+        check_vectors(name)
+        # Koleksiyon zaten var → yalnızca nicemleme ayarı değiştiyse düzeni güncelle
+        sync_quantization(name)
+        return
 
     # Koleksiyonu oluştur
-    client.create_collection(
-        collection_name=settings.COLLECTION,
-        vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE),  # Vektör boyutu ve mesafe metriği
+    get_client().create_collection(
+        collection_name=name,
+        vectors_config=vectors_config(name),  # Model başına named vector (boyut + mesafe metriği)
         shard_number=1,                       # Dil başına 1 fiziksel shard
         sharding_method=models.ShardingMethod.CUSTOM,  # Shard-key ile özel sharding
         replication_factor=2,                 # Yedeklilik için replikasyon
+        quantization_config=quantization_config(),  # QUANTIZATION=scalar/binary ise bellek 4-32x küçülür
     )
 
     # Her dil için shard-key oluştur (veri fiziksel olarak ayrılır)
-    for lang in ["en", "de", "fr", "es", "ja", "zh"]:
-        client.create_shard_key(settings.COLLECTION, shard_key=lang)
+    for lang in LANGS:
+        get_client().create_shard_key(name, shard_key=lang)
+
+    # Filtreli aramalar nokta nokta taranmasın diye payload indeksleri
+    ensure_payload_indexes(name)
+
+
+if __name__ == "__main__":
+    # Mevcut koleksiyonlar için migrasyon:  python -m src.qdrant_setup
+    created = ensure_payload_indexes()
+    print(f"Oluşturulan payload indeksleri: {created or 'yok (hepsi mevcut)'}")
+    if sync_quantization():
+        print(f"Nicemleme düzeni güncellendi: {settings.QUANTIZATION}")
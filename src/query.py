@@ -1,43 +1,80 @@
 # src/query.py  (örnek kullanım)
 # Qdrant üzerinde örnek bir vektör arama işlemi gösterir.
+# İçe aktarıldığında hiçbir şey çalışmaz; örnek için:  python -m src.query ["sorgu metni"] [--lang en]
+# --lang verilmezse shard, sorgunun dilinden seçilir (bkz. src/langid.py).
 
-from fastembed import TextEmbedding
-from src.qdrant_setup import client          # aynı client'i kullanıyoruz
+import argparse
+import time
+
+from src.clients import get_client, get_embedder   # süreç genelinde paylaşılan client / model
 from src.config import settings
+from src.langid import route
+from src.model_registry import get_spec
+from src.projection import project
+from src.query_metrics import QueryMetrics
+from src.search import search_params
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Seçili (ya da sorgu dilinden tanınan) shard'larda örnek vektör arama")
+    ap.add_argument("text", nargs="?", default="Excellent quality and stellar service—highly recommend!")
+    ap.add_argument("--lang", default=None, help="Aranacak shard-key (verilmezse sorgunun dilinden seçilir)")
+    ap.add_argument("--limit", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    metrics = QueryMetrics()                 # aşama süreleri (embed / shard / total)
+    spec = get_spec()                        # MODEL_NAME'in kaydı: sorgu öneki + named vector
+    # Dil tanıma güvenliyse tek shard, değilse olası dillerin (en kötü durumda tüm dillerin) shard'ları
+    shard_keys = [args.lang] if args.lang else route(args.text)
+
+    # 1) Sorgu vektörünü üret
+    embedder = get_embedder()                # Embedding modeli ilk kullanımda yüklenir
+
+    t0 = time.perf_counter()
+    query_vec = next(iter(embedder.embed(spec.query_texts([args.text]))))   # Metni embed ederek vektörünü üret (generator tüketilir → süre gerçek)
+    query_vec = project(query_vec)           # Koleksiyon PCA projeksiyonlu ise aynı boyuta indir
+    metrics.observe("embed", time.perf_counter() - t0)
 
-# 1) Sorgu vektörünü üret
-embedder = TextEmbedding(settings.MODEL_NAME, device=settings.DEVICE)  # Embedding modeli başlatılır
-
-query_text = "Excellent quality and stellar service—highly recommend!"
-#  Sorgulanacak metin (örnek)
-query_vec  = embedder.embed([query_text])               #  Metni embed ederek vektörünü üret
-
-# 2) Yalnızca İngilizce shard'ında (en) ara
-"""
-hits = client.search(
-    collection_name=settings.COLLECTION,
-    query_vector=query_vec,           
-    shard_key_selector="es",   
-    with_payload=True,
-)  
-DeprecationWarning: `search` method is deprecated and will be removed in the future. Use `query_points` instead.                    
-"""
-# Modern ve önerilen yöntemle sorgu (query_points)
-hits = client.query_points(
-    collection_name=settings.COLLECTION,      # Hangi koleksiyonda arama yapılacak
-    query=query_vec,           # Sorgu vektörü (embedding)
-    shard_key_selector="en",   # Sadece İngilizce shard'ında ara
-    limit=5,                   # En fazla 5 sonuç getir
-    with_payload=True,         # Sonuçlarda ek veri (payload) da getir
-).points                       # Sonuçları .points ile alın
-
-
-# 3) Sonuçları yazdır
-for h in hits:
-    print(
-        f"[{h.payload['language']}] ★{h.payload['stars']}  score={h.score:.3f}"
+    # 2) Yalnızca seçili shard(lar)da ara
+    """
+    hits = client.search(
+        collection_name=settings.COLLECTION,
+        query_vector=query_vec,
+        shard_key_selector="es",
+        with_payload=True,
     )
+    DeprecationWarning: `search` method is deprecated and will be removed in the future. Use `query_points` instead.
+    """
+    # Modern ve önerilen yöntemle sorgu (query_points)
+    t1 = time.perf_counter()
+    hits = get_client().query_points(
+        collection_name=settings.COLLECTION,      # Hangi koleksiyonda arama yapılacak
+        query=query_vec,             # Sorgu vektörü (embedding)
+        using=spec.vector,           # Modelin named vector'ü
+        shard_key_selector=shard_keys if len(shard_keys) > 1 else shard_keys[0],  # Sadece seçili dil(ler)in shard'ında ara
+        limit=args.limit,            # En fazla `limit` sonuç getir
+        with_payload=True,           # Sonuçlarda ek veri (payload) da getir
+        search_params=search_params(),  # Nicemleme açıksa rescore / oversampling (ayarlardan)
+    ).points                         # Sonuçları .points ile alın
+
+    metrics.observe_shard(",".join(shard_keys), time.perf_counter() - t1)
+    metrics.observe("total", time.perf_counter() - t0)
+
+    # 3) Sonuçları yazdır
+    print(f"Aranan shard'lar: {', '.join(shard_keys)}")
+    for h in hits:
+        print(
+            f"[{h.payload['language']}] ★{h.payload['stars']}  score={h.score:.3f}"
+        )
+
+    # Aşama süreleri (ms)
+    for row in metrics.snapshot():
+        print(f"{row['series']:<10} {row['p50_ms']} ms")
+
+    # ÖR. çıktı:
+    # [en] ★5  score=0.812
+    # [en] ★4  score=0.799
+
 
-# ÖR. çıktı:
-# [en] ★5  score=0.812
-# [en] ★4  score=0.799
+if __name__ == "__main__":
+    main()
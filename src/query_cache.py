@@ -0,0 +1,147 @@
+# src/query_cache.py
+# Sorgu yolu için iki seviyeli süreç içi önbellek:
+#   1) (model, metin) → sorgu vektörü LRU'su
+#   2) (vektör özeti, diller, yıldızlar, limit) → arama sonucu; TTL + shard bazlı geçersizleştirme
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.embed_cache import normalize_text
+
+
+def vector_digest(vec) -> str:
+    """Sorgu vektörünün kısa özeti (sonuç önbelleği anahtarı için)."""
+    return hashlib.blake2b(np.asarray(vec, dtype=np.float32).tobytes(), digest_size=8).hexdigest()
+
+
+class VectorLRU:
+    """(model, normalize metin) → vektör; en son kullanılan `maxsize` kayıt tutulur."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_embed(self, model: str, text: str, embed: Callable[[str], Any]):
+        key = (model, normalize_text(text))
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+        vec = embed(text)  # model çağrısı kilit dışında
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return vec
+
+
+class ResultCache:
+    """
+    Arama sonucu önbelleği.
+
+    Her shard için bir nesil (generation) sayacı tutulur; o shard'a yazıldığında sayaç
+    artar. Kayıt, oluşturulduğu andaki nesiller hâlâ geçerliyse ve TTL dolmadıysa döner.
+    Böylece geçersizleştirme O(1)'dir, tüm kayıtları taramak gerekmez.
+
+    Arama sürerken gelen bir yazım sonucu bayatlatabileceği için nesiller aramadan ÖNCE
+    `snapshot()` ile alınıp `put()`'a verilmelidir; arada bir nesil değiştiyse sonuç saklanmaz.
+    """
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 4096):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self._gens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(vector_hash: str, langs: Sequence[str], stars: Sequence[int], limit: int, extra: Hashable = ()) -> Hashable:
+        """`extra`: sonucu etkileyen diğer parametreler (ör. rescore / oversampling)."""
+        return vector_hash, tuple(sorted(langs)), tuple(sorted(stars)), limit, extra
+
+    def _snapshot(self, langs: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._gens.get(lang, 0) for lang in langs)
+
+    def snapshot(self, key) -> Tuple[int, ...]:
+        """Anahtardaki shard'ların şu anki nesilleri (aramadan önce alınır, `put`'a verilir)."""
+        with self._lock:
+            return self._snapshot(key[1])
+
+    def get(self, key) -> Optional[Any]:
+        langs = key[1]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, gens, value = entry
+                if expires > time.monotonic() and gens == self._snapshot(langs):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, gens: Optional[Tuple[int, ...]] = None) -> bool:
+        """
+        Sonucu saklar. `gens` (aramadan önceki `snapshot()`) verilmişse ve arama sırasında bir shard
+        geçersizleştiyse sonuç bayat kabul edilip saklanmaz. Saklandıysa True döner.
+        """
+        langs = key[1]
+        with self._lock:
+            current = self._snapshot(langs)
+            if gens is not None and gens != current:
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, current, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def invalidate(self, shard_key: str) -> None:
+        """`shard_key`'e yazıldı: o shard'ı içeren tüm sonuçlar artık bayat."""
+        with self._lock:
+            self._gens[shard_key] = self._gens.get(shard_key, 0) + 1
+            self.invalidations += 1
+
+
+class QueryCache:
+    """Vektör LRU'su ve sonuç önbelleğini birlikte yöneten yardımcı."""
+
+    def __init__(self, vector_size: int = 1024, result_ttl: float = 300.0, result_size: int = 4096):
+        self.vectors = VectorLRU(vector_size)
+        self.results = ResultCache(result_ttl, result_size)
+
+    def invalidate(self, shard_key: str) -> None:
+        self.results.invalidate(shard_key)
+
+    def stats(self) -> Dict[str, float]:
+        def rate(h, m):
+            return h / (h + m) if h + m else 0.0
+
+        v, r = self.vectors, self.results
+        return {
+            "vector_hits": v.hits,
+            "vector_misses": v.misses,
+            "vector_hit_rate": rate(v.hits, v.misses),
+            "result_hits": r.hits,
+            "result_misses": r.misses,
+            "result_hit_rate": rate(r.hits, r.misses),
+            "invalidations": r.invalidations,
+        }
@@ -0,0 +1,95 @@
+# src/query_metrics.py
+# Sorgu yolu gecikme ölçümleri: embedding, shard başına Qdrant gecikmesi, birleştirme ve önbellek isabetleri.
+# Kayan pencereli histogramlar p50/p95/p99 verir; aynı kayıt Prometheus metin biçiminde dışa aktarılır.
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional
+
+from src.metrics import Registry, serve_metrics
+
+# Sorgu yolu için daha ince kovalar (0.5 ms … 10 s)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QueryMetrics:
+    """
+    Her arama isteği için aşama süreleri:
+
+    * `embed`  — sorgu vektörünün üretilmesi (LRU isabetinde ~0)
+    * `shard`  — shard-key başına Qdrant yanıt süresi (süre sınırını aşan shard da, bittiğinde, gerçek süresiyle kaydedilir)
+    * `route`  — dil tanıma ile aranacak shard'ların seçimi (dil filtresi verilmediyse)
+    * `merge`  — shard sonuçlarının heap ile birleştirilmesi
+    * `total`  — isteğin uçtan uca süresi
+    """
+
+    def __init__(self, window: int = 1024):
+        self.registry = Registry(prefix="query_")
+        self.stage = self.registry.histogram(
+            "stage_seconds", "Sorgu aşaması süresi (saniye)", ("stage",), QUERY_BUCKETS, window
+        )
+        self.shard = self.registry.histogram(
+            "shard_seconds", "Shard-key başına Qdrant yanıt süresi (saniye)", ("shard",), QUERY_BUCKETS, window
+        )
+        self.shard_errors = self.registry.counter(
+            "shard_errors_total", "Sonuca yetişemeyen shard sayısı", ("shard", "reason")
+        )
+        self.cache = self.registry.counter("cache_total", "Önbellek erişimleri", ("cache", "result"))
+        self.routing = self.registry.counter(
+            "routing_total", "Dil yönlendirmesi: routed (shard alt kümesi) / fanout (tüm shard'lar)", ("result",)
+        )
+        self.routed_shards = self.registry.counter("routed_shards_total", "Yönlendirme sonrası sorgulanan shard sayısı")
+
+    # --- kayıt -----------------------------------------------------------------
+    def observe(self, stage: str, seconds: float) -> None:
+        self.stage.labels(stage).observe(seconds)
+
+    def observe_shard(self, shard: str, seconds: float) -> None:
+        self.shard.labels(shard).observe(seconds)
+
+    def shard_failed(self, shard: str, reason: str) -> None:
+        self.shard_errors.labels(shard, reason).inc()
+
+    def cache_access(self, cache: str, hit: bool) -> None:
+        self.cache.labels(cache, "hit" if hit else "miss").inc()
+
+    def routed(self, shards: int, fanout: bool) -> None:
+        self.routing.labels("fanout" if fanout else "routed").inc()
+        self.routed_shards.labels().inc(shards)
+
+    # --- raporlama --------------------------------------------------------------
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Panel için satırlar: seri adı, istek sayısı ve kayan penceredeki p50/p95/p99 (ms)."""
+        rows = []
+        for family, prefix in ((self.stage, ""), (self.shard, "shard:")):
+            for (name,), h in family.items():
+                p50, p95, p99 = h.quantiles((0.5, 0.95, 0.99))
+                rows.append({
+                    "series": prefix + name,
+                    "count": h.count,
+                    "p50_ms": round(p50 * 1000, 1) if not math.isnan(p50) else None,
+                    "p95_ms": round(p95 * 1000, 1) if not math.isnan(p95) else None,
+                    "p99_ms": round(p99 * 1000, 1) if not math.isnan(p99) else None,
+                })
+        return rows
+
+    def cache_hit_rates(self) -> Dict[str, float]:
+        counts: Dict[str, Dict[str, float]] = {}
+        for (cache, result), c in self.cache.items():
+            counts.setdefault(cache, {})[result] = c.value
+        return {
+            cache: v.get("hit", 0) / (v.get("hit", 0) + v.get("miss", 0))
+            for cache, v in counts.items()
+            if v.get("hit", 0) + v.get("miss", 0)
+        }
+
+    def errors(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for (shard, _reason), c in self.shard_errors.items():
+            out[shard] = out.get(shard, 0) + int(c.value)
+        return out
+
+    def serve(self, port: int) -> Optional[object]:
+        """`port` > 0 ise `GET /metrics` uç noktasını başlatır."""
+        return serve_metrics(self.registry, port) if port > 0 else None
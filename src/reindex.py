@@ -0,0 +1,337 @@
+# src/reindex.py
+# Kesintisiz yeniden embed / yeniden yükleme (blue-green) için sürümlü koleksiyonlar ve alias.
+#
+# * `COLLECTION` fiziksel bir koleksiyon değil, bir alias'tır; sorgu yolları (qdrant_ui.py,
+#   src/query.py, batch_query, benchmark) her zaman bu adı sorgular.
+# * Her tam yükleme yeni bir sürüme yapılır: `{COLLECTION}_v{n}` (shard-key'ler, named vector'ler,
+#   nicemleme ve payload indeksleri init_collection ile). Sunumdaki sürüme dokunulmaz.
+# * Yükleme HNSW indekslemesi kapalıyken yapılır (bulk_load); indeks kurulup koleksiyon GREEN
+#   olmadan geçiş yapılmaz → alias taşındığında yeni sürüm ilk sorgudan itibaren tam hızdadır.
+# * Geçişten önce dil (shard-key) başına nokta sayıları Parquet satır sayılarıyla doğrulanır.
+# * Alias tek bir `update_collection_aliases` çağrısıyla (sil + oluştur) atomik olarak taşınır;
+#   projeksiyon dosyaları önceden hazırlanıp ancak alias taşındıktan sonra yerleştirilir.
+# * Eski sürümler geri dönüş (rollback) için tutulur; `--keep` adedinden fazlası silinir.
+#
+# Kullanım:
+#   python -m src.reindex                  # yeni sürüm → yükle → doğrula → alias'ı taşı → eskileri sil
+#   python -m src.reindex --resume         # yarıda kalan en yeni sürümü tamamla
+#   python -m src.reindex --list
+#   python -m src.reindex --rollback       # alias'ı bir önceki sürüme geri al
+#   python -m src.reindex --gc-only --keep 2
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pyarrow.parquet as pq
+from loguru import logger
+
+from src.checkpoint import Manifest
+from src.clients import get_client
+from src.config import settings
+from src.embed_and_ingest import (
+    DATA_DIR,
+    LANGS,
+    MANIFEST_PATH,
+    METRICS_PATH,
+    IngestMetrics,
+    ensure_projection,
+    ingest,
+)
+from src.metrics import PeriodicWriter
+from src.model_registry import MODELS, ModelSpec, collection_models
+from src.projection import artifact_path
+
+
+def versions(alias: Optional[str] = None) -> List[Tuple[int, str]]:
+    """Alias'a ait sürümlü koleksiyonlar: [(n, "{alias}_v{n}"), …] sürüm sırasıyla."""
+    alias = alias or settings.COLLECTION
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    names = (c.name for c in get_client().get_collections().collections)
+    return sorted((int(m.group(1)), m.group(0)) for m in map(pattern.match, names) if m)
+
+
+def alias_target(alias: Optional[str] = None) -> Optional[str]:
+    """Alias'ın şu an gösterdiği koleksiyon (alias yoksa None)."""
+    alias = alias or settings.COLLECTION
+    for a in get_client().get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+
+def _version_number(name: Optional[str], alias: str) -> int:
+    m = re.match(rf"^{re.escape(alias)}_v(\d+)$", name or "")
+    return int(m.group(1)) if m else 0
+
+
+def _is_physical(name: str) -> bool:
+    return name in {c.name for c in get_client().get_collections().collections}
+
+
+def shard_counts(collection: str, langs: Sequence[str] = LANGS) -> Dict[str, int]:
+    """Dil (shard-key) başına kesin nokta sayısı."""
+    client = get_client()
+    return {lang: client.count(collection, exact=True, shard_key_selector=lang).count for lang in langs}
+
+
+def verify(
+    collection: str,
+    models: Sequence[ModelSpec],
+    live: Optional[str] = None,
+    max_drop: float = 0.0,
+) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Sürümün sunuma hazır olup olmadığını denetler; (dil → nokta sayısı, sorunlar) döner.
+    * Manifestoya göre her dosya her model vektörü için sonuna kadar yüklenmiş olmalı.
+    * Shard başına nokta sayısı Parquet satır sayısına eşit olmalı (yakın-kopya filtresi açıksa
+      ondan büyük olmamalı) ve sıfırdan büyük olmalı.
+    * `live` verilirse hiçbir shard sunumdaki sürüme göre `max_drop` oranından fazla küçülmemeli.
+    """
+    manifest = Manifest(MANIFEST_PATH)
+    files = {lang: os.path.join(DATA_DIR, f"{lang}.parquet") for lang in LANGS}
+    files = {lang: path for lang, path in files.items() if os.path.exists(path)}
+    counts = shard_counts(collection, list(files))
+    deduped = settings.DEDUP and settings.EMBED_PROCESSES == 0  # havuz modunda filtre kapalı
+    problems = []
+    if not files:
+        problems.append("yüklenecek Parquet dosyası yok")
+    for lang, path in files.items():
+        num_rows = pq.ParquetFile(path).metadata.num_rows
+        for spec in models:
+            done = manifest.rows(Manifest.key(collection, lang, os.path.basename(path), spec.vector))
+            if done < num_rows:
+                problems.append(f"{lang}/{spec.vector}: {done:,}/{num_rows:,} satır yüklendi")
+        n = counts[lang]
+        if n == 0 or n > num_rows or (not deduped and n != num_rows):
+            problems.append(f"{lang}: {n:,} nokta, Parquet'te {num_rows:,} satır")
+    if live:
+        for lang, before in shard_counts(live, list(files)).items():
+            if before and counts[lang] < before * (1 - max_drop):
+                problems.append(f"{lang}: {before:,} → {counts[lang]:,} nokta (izin verilen düşüş {max_drop:.0%})")
+    return counts, problems
+
+
+def _stage_projections(collection: str, alias: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Sürümün PCA projeksiyon dosyalarını alias adının yanına geçici dosyalara kopyalar;
+    [(geçici dosya ya da sürümde projeksiyon yoksa None, alias'taki dosya), …] döner.
+    """
+    staged: List[Tuple[Optional[str], str]] = []
+    try:
+        for spec in MODELS.values():
+            src, dst = artifact_path(collection, spec.name), artifact_path(alias, spec.name)
+            tmp = None
+            if os.path.exists(src):
+                tmp = dst + ".tmp.npz"
+                shutil.copyfile(src, tmp)
+            staged.append((tmp, dst))
+    except BaseException:
+        _discard(staged)
+        raise
+    return staged
+
+
+def _discard(staged: Sequence[Tuple[Optional[str], str]]) -> None:
+    for tmp, _ in staged:
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def switch_alias(collection: str, alias: Optional[str] = None, replace_collection: bool = False) -> Optional[str]:
+    """
+    Alias'ı tek bir atomik istekle `collection`'a taşır; önceki hedefi döner.
+    Aynı adda fiziksel (alias'sız dönemden kalma) bir koleksiyon varsa yalnızca
+    `replace_collection=True` ile silinir; silme ile alias oluşturma arasında kısa bir boşluk olur.
+    """
+    from qdrant_client import models
+
+    alias = alias or settings.COLLECTION
+    client = get_client()
+    previous = alias_target(alias)
+    if previous is None and _is_physical(alias):
+        if not replace_collection:
+            raise RuntimeError(f"'{alias}' fiziksel bir koleksiyon; alias'a geçmek için --replace-collection verin")
+        logger.warning(f"'{alias}' koleksiyonu siliniyor (alias'a geçiş)")
+        client.delete_collection(alias)
+    ops = []
+    if previous is not None:
+        ops.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    ops.append(
+        models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=collection, alias_name=alias))
+    )
+    client.update_collection_aliases(change_aliases_operations=ops)
+    logger.success(f"'{alias}' → {collection}" + (f" (önceki: {previous})" if previous else ""))
+    return previous
+
+
+def cutover(collection: str, alias: Optional[str] = None, replace_collection: bool = False) -> Optional[str]:
+    """
+    Alias'ı `collection`'a taşır ve sürümün projeksiyon dosyalarını alias adıyla yayınlar (sorgu
+    yolları projeksiyonu alias adıyla okur, dosya değişince kendiliğinden yeniden yükler).
+    Kopyalama alias'tan ÖNCE geçici dosyalara yapılır; alias taşınamazsa geçici dosyalar silinir
+    ve alias'taki projeksiyon hiç değişmez. Taşındıktan sonra yalnızca atomik yeniden adlandırma
+    kalır, böylece tek geçiş adımı alias'tır. Önceki hedefi döner.
+    """
+    alias = alias or settings.COLLECTION
+    staged = _stage_projections(collection, alias)
+    try:
+        previous = switch_alias(collection, alias, replace_collection)
+    except BaseException:
+        _discard(staged)
+        raise
+    for tmp, dst in staged:
+        if tmp is not None:
+            os.replace(tmp, dst)
+        elif os.path.exists(dst):
+            os.remove(dst)
+    return previous
+
+
+def drop_version(collection: str) -> None:
+    """Sürümü, manifesto kayıtlarını ve projeksiyon dosyalarını siler."""
+    get_client().delete_collection(collection)
+    Manifest(MANIFEST_PATH).drop(collection)
+    for spec in MODELS.values():
+        path = artifact_path(collection, spec.name)
+        if os.path.exists(path):
+            os.remove(path)
+    logger.info(f"{collection} silindi")
+
+
+def gc(keep: int = 2, alias: Optional[str] = None) -> List[str]:
+    """
+    Sunumdaki sürüm dahil en fazla `keep` sürüm bırakır; silinenleri döner. Yalnızca sunumdaki
+    sürümden ESKİ sürümler silinir; daha yeni (yarım kalmış ya da doğrulanamamış) sürümler
+    `--resume` için korunur.
+    """
+    alias = alias or settings.COLLECTION
+    live = _version_number(alias_target(alias), alias)
+    older = [name for n, name in versions(alias) if n < live]
+    doomed = older[:max(0, len(older) - max(0, keep - 1))]
+    for name in doomed:
+        drop_version(name)
+    return doomed
+
+
+def build(
+    models: Sequence[ModelSpec],
+    resume: bool = False,
+    max_drop: float = 0.0,
+    replace_collection: bool = False,
+    metrics: Optional[IngestMetrics] = None,
+) -> str:
+    """
+    Yeni sürümü oluşturur, tüm koleksiyon modelleriyle yükler, doğrular ve alias'ı taşır.
+    İlk model noktaları yazar, diğerleri yalnızca kendi named vector'lerini ekler.
+    Doğrulama başarısızsa alias'a dokunulmaz (sürüm `--resume` için kalır). Sürüm adını döner.
+    """
+    from src.qdrant_setup import bulk_load, init_collection  # qdrant_client içe aktarımı yalnızca çalışırken
+
+    alias = settings.COLLECTION
+    live = alias_target(alias)
+    if live is None and _is_physical(alias) and not replace_collection:
+        # Saatler süren yüklemeden sonra değil, baştan durulur
+        raise SystemExit(f"'{alias}' fiziksel bir koleksiyon; alias'a geçmek için --replace-collection verin")
+    existing = versions(alias)
+    pending = [name for n, name in existing if n > _version_number(live, alias)]
+    if resume and pending:
+        version = pending[-1]
+        logger.info(f"{version}: yarım kalan sürüm tamamlanıyor")
+    else:
+        version = f"{alias}_v{existing[-1][0] + 1 if existing else 1}"
+        logger.info(f"{version}: yeni sürüm oluşturuluyor (sunumdaki: {live or 'yok'})")
+
+    for spec in models:
+        ensure_projection(model=spec.name, collection=version)
+    init_collection(version)
+    metrics = metrics or IngestMetrics()
+    with bulk_load(version):
+        for i, spec in enumerate(models):
+            totals, failed = ingest(metrics, model=spec.name, add_vector=i > 0, collection=version)
+            if failed:
+                raise SystemExit(f"{version}: {len(failed)} batch yüklenemedi; `--resume` ile devam edin")
+            for lang, total in totals.items():
+                logger.info(f"{version}/{spec.vector}: {lang} {total:,} nokta")
+
+    counts, problems = verify(version, models, live or (alias if _is_physical(alias) else None), max_drop)
+    if problems:
+        for p in problems:
+            logger.error(f"{version}: {p}")
+        raise SystemExit(f"{version} doğrulanamadı; alias '{alias}' → {live or 'yok'} olarak kaldı")
+    logger.info(f"{version} doğrulandı: " + ", ".join(f"{lang} {n:,}" for lang, n in counts.items()))
+
+    cutover(version, alias, replace_collection)
+    return version
+
+
+def rollback(alias: Optional[str] = None) -> str:
+    """Alias'ı sunumdakinden bir önceki (doğrulanabilen) sürüme geri alır."""
+    alias = alias or settings.COLLECTION
+    live = _version_number(alias_target(alias), alias)
+    models = collection_models()
+    for n, name in reversed(versions(alias)):
+        if n >= live:
+            continue
+        _, problems = verify(name, models)
+        if problems:
+            logger.warning(f"{name} atlanıyor: {'; '.join(problems)}")
+            continue
+        cutover(name, alias)
+        return name
+    raise SystemExit(f"'{alias}' için geri dönülebilecek eski sürüm yok")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sürümlü koleksiyona yeniden yükleme ve alias geçişi (blue-green)")
+    ap.add_argument("--resume", action="store_true", help="Yarım kalan en yeni sürümü tamamla")
+    ap.add_argument("--keep", type=int, default=2, help="Sunumdaki dahil tutulacak sürüm sayısı")
+    ap.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.0,
+        help="Bir shard'ın nokta sayısı sunumdaki sürüme göre en fazla bu oranda azalabilir (0.05 = %%5)",
+    )
+    ap.add_argument(
+        "--replace-collection",
+        action="store_true",
+        help="COLLECTION adında fiziksel koleksiyon varsa geçişte sil (alias'sız kurulumdan tek seferlik geçiş)",
+    )
+    ap.add_argument("--list", action="store_true", help="Sürümleri ve alias'ın hedefini listele")
+    ap.add_argument("--rollback", action="store_true", help="Alias'ı bir önceki sürüme geri al")
+    ap.add_argument("--gc-only", action="store_true", help="Yalnızca eski sürümleri temizle")
+    ap.add_argument(
+        "--metrics-out",
+        default=METRICS_PATH,
+        help="Prometheus metin biçimli metrik dosyası (boş → yazma)",
+    )
+    args = ap.parse_args(argv)
+    alias = settings.COLLECTION
+
+    if args.list:
+        live = alias_target(alias)
+        for _, name in versions(alias):
+            points = get_client().get_collection(name).points_count or 0
+            print(f"{'*' if name == live else ' '} {name:<40} {points:>12,} nokta")
+        if live is None:
+            print(f"'{alias}' alias'ı tanımlı değil")
+        return
+    if args.rollback:
+        rollback(alias)
+        return
+    if not args.gc_only:
+        metrics = IngestMetrics()
+        with PeriodicWriter(metrics.registry, args.metrics_out or None, before_write=metrics.refresh):
+            build(collection_models(), args.resume, args.max_drop, args.replace_collection, metrics)
+        logger.info("Aşama özeti:\n" + metrics.summary())
+    removed = gc(args.keep, alias)
+    if removed:
+        logger.info(f"Silinen eski sürümler: {', '.join(removed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# src/search.py
+# Seçili shard-key'lerde eşzamanlı arama yapıp sonuçları sınırlı bir yığınla (heap) birleştiren modül.
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from src.config import settings
+
+if TYPE_CHECKING:  # pragma: no cover — qdrant_client içe aktarımı ~1 s; çalışma anında fonksiyon içinde yapılır
+    from qdrant_client import models
+
+# Tüm aramaların paylaştığı iş parçacığı havuzu (her istekte yeniden oluşturulmaz)
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="shard-search")
+
+
+@dataclass(frozen=True)
+class Hit:
+    """Birleştirilmiş sonuç listesindeki tek bir nokta."""
+    language: str
+    stars: Optional[int]
+    score: float
+    id: Optional[str] = None
+
+
+@dataclass
+class SearchResult:
+    """Global ilk `limit` sonuç + yanıt vermeyen/hata veren shard'lar."""
+    hits: List[Hit] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.failed)
+
+    def records(self) -> List[dict]:
+        """`query_qdrant` ile aynı şekil: language / stars / score sözlükleri."""
+        return [{"language": h.language, "stars": h.stars, "score": round(h.score, 3)} for h in self.hits]
+
+
+def search_params(
+    rescore: Optional[bool] = None,
+    oversampling: Optional[float] = None,
+    hnsw_ef: Optional[int] = None,
+    exact: bool = False,
+) -> Optional[models.SearchParams]:
+    """
+    Arama zamanı parametreleri. Verilmeyen değerler ayarlardan gelir.
+    Nicemleme açıksa önce `limit × oversampling` aday nicemlenmiş vektörlerle bulunur,
+    `rescore` açıksa bu adaylar orijinal float32 vektörlerle yeniden puanlanır.
+    """
+    from qdrant_client import models
+
+    hnsw_ef = hnsw_ef if hnsw_ef is not None else settings.HNSW_EF
+    quant = None
+    if settings.QUANTIZATION != "none" or rescore is not None or oversampling is not None:
+        quant = models.QuantizationSearchParams(
+            rescore=settings.SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=settings.SEARCH_OVERSAMPLING if oversampling is None else oversampling,
+        )
+    if hnsw_ef is None and quant is None and not exact:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quant)
+
+
+def build_star_filter(stars: Optional[Sequence[int]]) -> Optional[models.Filter]:
+    """
+    Yıldız filtresini tek bir koşul olarak kurar (payload indeksini doğrudan kullanır):
+    ardışık yıldızlar (ör. 4-5) → `Range`, diğerleri → `MatchAny`.
+    """
+    if not stars:
+        return None
+    from qdrant_client import models
+
+    values = sorted(set(int(s) for s in stars))
+    if values == list(range(values[0], values[-1] + 1)):
+        cond = models.FieldCondition(key="stars", range=models.Range(gte=values[0], lte=values[-1]))
+    else:
+        cond = models.FieldCondition(key="stars", match=models.MatchAny(any=values))
+    return models.Filter(must=[cond])
+
+
+def _query_shard(
+    client, collection: str, vector, shard_key: str, limit: int, query_filter, params, timeout: float, using=None
+):
+    resp = client.query_points(
+        collection_name=collection,
+        query=vector,
+        using=using,                 # named vector (sorguyu embed eden model)
+        limit=limit,                 # shard başına getir
+        with_payload=True,
+        shard_key_selector=shard_key,
+        query_filter=query_filter,
+        search_params=params,
+        timeout=max(1, math.ceil(timeout)),
+    )
+    return [
+        Hit(
+            language=p.payload.get("language", shard_key),
+            stars=p.payload.get("stars"),
+            score=p.score,
+            id=str(p.id),
+        )
+        for p in resp.points
+    ]
+
+
+def _timed_query_shard(metrics, client, collection, vector, shard_key, *args):
+    """`_query_shard` + süre ölçümü; iş parçacığında ölçüldüğü için süre sınırını aşan shard da kaydedilir."""
+    t0 = time.perf_counter()
+    hits = _query_shard(client, collection, vector, shard_key, *args)
+    metrics.observe_shard(shard_key, time.perf_counter() - t0)
+    return hits
+
+
+def search_shards(
+    client,
+    collection: str,
+    vector,
+    shard_keys: Sequence[str],
+    limit: int,
+    query_filter: Optional[models.Filter] = None,
+    timeout: float = 2.0,
+    params: Optional[models.SearchParams] = None,
+    metrics=None,
+    using: Optional[str] = None,
+) -> SearchResult:
+    """
+    Tüm shard'lara aynı anda sorgu gönderir ve skora göre global ilk `limit` sonucu döner.
+
+    * Her shard için süre sınırı `timeout` saniyedir; süresi dolan shard sonuçtan
+      çıkarılır ve `failed` içinde raporlanır (diğer shard'ları bekletmez).
+    * Birleştirme `limit` boyutlu bir min-heap ile yapılır; tam sıralama yapılmaz.
+    * `params` (bkz. `search_params`) rescore / oversampling / hnsw_ef ayarlarını taşır.
+    * `metrics` (bkz. `src.query_metrics.QueryMetrics`) verilirse shard başına gecikme,
+      hatalar ve birleştirme süresi kaydedilir.
+    * `using`: aranacak named vector; verilmezse MODEL_NAME'in vektörü (bkz. `src.model_registry`).
+    Böylece toplam gecikme shard gecikmelerinin toplamı yerine en yavaş shard'a yaklaşır.
+    """
+    result = SearchResult()
+    if not shard_keys or limit <= 0:
+        return result
+
+    if using is None:
+        from src.model_registry import vector_name
+
+        using = vector_name()
+    args = (limit, query_filter, params, timeout, using)
+    if metrics is None:
+        futures = {_EXECUTOR.submit(_query_shard, client, collection, vector, key, *args): key for key in shard_keys}
+    else:
+        futures = {
+            _EXECUTOR.submit(_timed_query_shard, metrics, client, collection, vector, key, *args): key
+            for key in shard_keys
+        }
+    heap: List[tuple] = []
+    tie = itertools.count()
+
+    merge_seconds = 0.0
+    pending = set(futures)
+    remaining = timeout
+    deadline = time.monotonic() + timeout
+    while pending and remaining > 0:
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for fut in done:
+            key = futures[fut]
+            try:
+                hits = fut.result()
+            except Exception as exc:  # noqa: BLE001 — shard hatası tüm aramayı düşürmez
+                result.failed[key] = str(exc) or exc.__class__.__name__
+                if metrics is not None:
+                    metrics.shard_failed(key, "error")
+                continue
+            t0 = time.perf_counter()
+            for h in hits:
+                item = (h.score, next(tie), h)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+            merge_seconds += time.perf_counter() - t0
+        remaining = deadline - time.monotonic()
+
+    for fut in pending:
+        result.failed[futures[fut]] = f"timeout ({timeout:.1f}s)"
+        if metrics is not None:
+            metrics.shard_failed(futures[fut], "timeout")
+
+    t0 = time.perf_counter()
+    result.hits = [h for _, _, h in sorted(heap, key=lambda x: (-x[0], x[1]))]
+    if metrics is not None:
+        metrics.observe("merge", merge_seconds + time.perf_counter() - t0)
+    return result
@@ -0,0 +1,112 @@
+# src/startup_check.py
+# CLI modüllerinin soğuk başlangıç (import) bütçesi kontrolü — `python -X importtime` tabanlı.
+#
+# Her modül ayrı bir süreçte, .env ve Qdrant ayarları OLMADAN içe aktarılır:
+#   * içe aktarma hata verirse (ör. modül düzeyinde client/model oluşturuluyorsa) → başarısız
+#   * toplam içe aktarma süresi bütçeyi aşarsa → başarısız, en pahalı importlar listelenir
+#   * yasaklı ağır paketler (fastembed, onnxruntime) yüklenirse → başarısız
+#
+# Kullanım:
+#   python -m src.startup_check                  # varsayılan modüller, 1.0 s bütçe
+#   python -m src.startup_check --budget 0.5 src.batch_query
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Komut satırı araçlarının giriş modülleri
+DEFAULT_MODULES = [
+    "src.config",
+    "src.clients",
+    "src.qdrant_setup",
+    "src.query",
+    "src.search",
+    "src.batch_query",
+    "src.benchmark",
+    "src.local_index",
+    "src.embed_and_ingest",
+    "src.reindex",
+    "src.langid",
+    "src.write_buffer",
+]
+# İçe aktarımda asla yüklenmemesi gereken paketler (yalnızca ilk kullanımda)
+FORBIDDEN = ("fastembed", "onnxruntime")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(
+    module: str, python: str = sys.executable
+) -> Tuple[int, Optional[str], List[str], List[Tuple[int, int, str]]]:
+    """
+    Modülü temiz bir süreçte `-X importtime` ile içe aktarır.
+    (toplam µs, hata metni, yüklenen yasaklı paketler, [(self µs, kümülatif µs, paket)]) döner.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith("QDRANT_")}
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    # .env okunmasın diye proje kökü dışında bir klasörden çalıştırılır
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c",
+             f"import sys, {module}; print(' '.join(p for p in {FORBIDDEN!r} if p in sys.modules))"],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), m.group(4)))
+    top_level = [cum for _self, cum, name in rows if name == module]
+    error = None
+    if proc.returncode != 0:
+        error = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")][-1:]
+        error = error[0] if error else f"çıkış kodu {proc.returncode}"
+    total = top_level[-1] if top_level else sum(s for s, _, _ in rows)
+    # importtime başarısız denemeleri de listeler; gerçekten yüklenenler sys.modules'tan okunur
+    heavy = proc.stdout.split() if proc.returncode == 0 else []
+    return total, error, heavy, rows
+
+
+def check(modules: Sequence[str], budget: float, top: int = 5) -> bool:
+    ok = True
+    for module in modules:
+        total, error, heavy, rows = measure(module)
+        status = "OK"
+        if error:
+            status = f"HATA: {error}"
+        elif heavy:
+            status = f"YASAKLI: {', '.join(heavy)}"
+        elif total > budget * 1e6:
+            status = "BÜTÇE AŞILDI"
+        print(f"{module:<24} {total / 1e6:6.2f}s  {status}")
+        if status != "OK":
+            ok = False
+            # En pahalı (kümülatif) paketler: tembel içe aktarma için adaylar
+            roots: Dict[str, int] = {}
+            for _self, cum, name in rows:
+                if name.split(".")[0] == name:
+                    roots[name] = max(roots.get(name, 0), cum)
+            for name, cum in sorted(roots.items(), key=lambda kv: -kv[1])[:top]:
+                print(f"    {cum / 1e6:6.2f}s  {name}")
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="CLI modülleri için içe aktarma süresi bütçesi kontrolü")
+    ap.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    ap.add_argument("--budget", type=float, default=1.0, help="Modül başına en fazla içe aktarma süresi (sn)")
+    args = ap.parse_args(argv)
+    if not check(args.modules, args.budget):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# src/uploader.py
+# Shard-key başına sınırlı sayıda eşzamanlı upsert isteği tutan, yeniden deneme yapan yükleyici.
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+# Tekrar denemeye değer HTTP durum kodları ve gRPC hata kodları
+_RETRY_HTTP = {408, 429, 500, 502, 503, 504}
+_RETRY_GRPC = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "ABORTED", "INTERNAL"}
+# Nokta başına tahmini ek yük (ID + payload + protobuf çerçevesi), bayt
+_POINT_OVERHEAD = 128
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Ağ/sunucu kaynaklı geçici hata mı? (Şema/doğrulama hataları tekrar denenmez.)"""
+    from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+    try:  # gRPC yalnızca prefer_grpc=True iken devrede
+        import grpc
+    except ImportError:  # pragma: no cover
+        grpc = None
+
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code in _RETRY_HTTP
+    if isinstance(exc, (ResponseHandlingException, ConnectionError, TimeoutError)):
+        return True
+    if grpc is not None and isinstance(exc, grpc.RpcError):
+        code = exc.code() if callable(getattr(exc, "code", None)) else None
+        return code is not None and code.name in _RETRY_GRPC
+    return False
+
+
+@dataclass
+class BatchResult:
+    """Tek bir ingest batch'inin (tüm alt-batch'leriyle birlikte) sonucu."""
+    shard_key: str
+    tag: Any
+    count: int
+    requests: int = 0
+    attempts: int = 0
+    seconds: float = 0.0
+    errors: List[BaseException] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class _BatchState:
+    """Alt-batch'ler tamamlandıkça sonucu biriktirir; sonuncusu geri çağrıyı tetikler."""
+
+    def __init__(self, result: BatchResult, parts: int, on_done: Optional[Callable[[BatchResult], None]]):
+        self.result = result
+        self.left = parts
+        self.on_done = on_done
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def part_done(self, attempts: int, error: Optional[BaseException]) -> None:
+        with self.lock:
+            self.result.attempts += attempts
+            if error is not None:
+                self.result.errors.append(error)
+            self.left -= 1
+            last = self.left == 0
+        if last:
+            self.result.seconds = time.perf_counter() - self.started
+            if self.on_done is not None:
+                self.on_done(self.result)
+
+
+class Uploader:
+    """
+    Upsert isteklerini shard-key başına `in_flight` kadar paralel yürütür.
+
+    * Her batch gRPC mesaj sınırına sığacak alt-batch'lere bölünür (`max_bytes`).
+    * Geçici hatalar üstel geri çekilme (exponential backoff + jitter) ile `retries` kez tekrar denenir.
+    * `submit` o shard için pencere doluysa bekler (backpressure); sonuç `on_done` ile batch başına bildirilir.
+    * Kalıcı hata tüm çalışmayı durdurmaz; batch sonucu hatalı olarak raporlanır.
+    * `vector_name` verilirse vektörler o named vector'e yazılır. `update_vectors=True` ise noktalar
+      upsert edilmez; mevcut noktalarda yalnızca bu vektör güncellenir (payload ve diğer modellerin
+      vektörleri korunur — A/B geçişinde ikinci modeli doldurmak için).
+    * `submit`e vektörler {named vector: matris} sözlüğü olarak da verilebilir; her nokta tüm
+      modellerin vektörleriyle tek istekte yazılır.
+    * Uzun ömürlü süreçlerde (ör. arayüz yazıcısı) `keep_results=False` ile sonuçlar biriktirilmez.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection: str,
+        in_flight: int = 4,
+        max_bytes: int = 16 * 1024 * 1024,
+        retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        vector_name: Optional[str] = None,
+        update_vectors: bool = False,
+        keep_results: bool = True,
+    ):
+        if update_vectors and not vector_name:
+            raise ValueError("update_vectors için vector_name gerekli")
+        self.client = client
+        self.collection = collection
+        self.vector_name = vector_name
+        self.update_vectors = update_vectors
+        self.keep_results = keep_results
+        self.in_flight = max(1, in_flight)
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._windows: Dict[str, threading.BoundedSemaphore] = {}
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.results: List[BatchResult] = []
+
+    def _shard(self, key: str):
+        with self._lock:
+            if key not in self._executors:
+                self._executors[key] = ThreadPoolExecutor(self.in_flight, thread_name_prefix=f"upsert-{key}")
+                self._windows[key] = threading.BoundedSemaphore(self.in_flight)
+            return self._executors[key], self._windows[key]
+
+    def rows_per_request(self, dim: int) -> int:
+        """Bir isteğe sığan en fazla nokta sayısı (float32 vektör + sabit ek yük tahmini)."""
+        return max(1, self.max_bytes // (dim * 4 + _POINT_OVERHEAD))
+
+    def submit(
+        self,
+        shard_key: str,
+        ids: Sequence,
+        vectors: Union[np.ndarray, Dict[str, np.ndarray]],
+        payloads: Sequence[dict],
+        tag: Any = None,
+        on_done: Optional[Callable[[BatchResult], None]] = None,
+    ) -> None:
+        n = len(ids)
+        if n == 0:
+            return
+        named = isinstance(vectors, dict)
+        step = self.rows_per_request(sum(v.shape[1] for v in vectors.values()) if named else vectors.shape[1])
+        parts = range(0, n, step)
+        result = BatchResult(shard_key, tag, n, requests=len(parts))
+        state = _BatchState(result, len(parts), self._finish(on_done))
+        executor, window = self._shard(shard_key)
+
+        with self._lock:
+            self._pending += 1
+        sent = 0
+        try:
+            for start in parts:
+                stop = start + step
+                window.acquire()  # pencere doluysa burada bekle
+                try:
+                    part = {k: v[start:stop] for k, v in vectors.items()} if named else vectors[start:stop]
+                    executor.submit(self._send, shard_key, ids[start:stop], part, payloads[start:stop], state, window)
+                except BaseException:
+                    window.release()
+                    raise
+                sent += 1
+        except Exception as exc:  # noqa: BLE001 — ör. kapatılmış executor; sonuç yine on_done ile bildirilir
+            logger.error(f"{shard_key}: {len(parts) - sent} alt-batch gönderilemedi: {exc}")
+            for _ in range(len(parts) - sent):
+                state.part_done(0, exc)
+
+    def _finish(self, on_done):
+        def done(result: BatchResult) -> None:
+            try:
+                if on_done is not None:
+                    on_done(result)
+            except Exception as exc:  # noqa: BLE001 — geri çağrı hatası yükleyiciyi kilitlememeli
+                logger.exception(f"{result.shard_key}: batch geri çağrısı hata verdi: {exc}")
+            finally:
+                with self._lock:
+                    if self.keep_results:
+                        self.results.append(result)
+                    self._pending -= 1
+                    self._idle.notify_all()
+        return done
+
+    def _send(self, shard_key, ids, vectors, payloads, state: _BatchState, window) -> None:
+        from qdrant_client import models
+
+        attempts, error = 0, None
+        try:
+            if isinstance(vectors, dict):
+                vecs = {name: m.tolist() for name, m in vectors.items()}
+            else:
+                vecs = {self.vector_name: vectors.tolist()} if self.vector_name else vectors.tolist()
+            if self.update_vectors:
+                points = [
+                    models.PointVectors(id=i, vector={name: v[j] for name, v in vecs.items()})
+                    for j, i in enumerate(ids)
+                ]
+            else:
+                batch = models.Batch(ids=list(ids), vectors=vecs, payloads=list(payloads))
+            while True:
+                attempts += 1
+                try:
+                    if self.update_vectors:
+                        self.client.update_vectors(
+                            collection_name=self.collection,
+                            points=points,
+                            shard_key_selector=shard_key,
+                            wait=True,
+                        )
+                    else:
+                        self.client.upsert(
+                            collection_name=self.collection,
+                            points=batch,
+                            shard_key_selector=shard_key,
+                            wait=True,
+                        )
+                    break
+                except Exception as exc:  # noqa: BLE001
+                    if attempts > self.retries or not is_transient(exc):
+                        raise
+                    delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                    delay *= random.uniform(0.5, 1.5)
+                    logger.warning(f"{shard_key}: upsert hatası ({exc}); {delay:.1f}s sonra tekrar (#{attempts})")
+                    time.sleep(delay)
+        except Exception as exc:  # noqa: BLE001
+            error = exc
+        finally:
+            window.release()
+            state.part_done(attempts, error)
+
+    def join(self) -> List[BatchResult]:
+        """Bekleyen tüm batch'ler bitene kadar bekler ve sonuçları döner."""
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+            return list(self.results)
+
+    def close(self) -> None:
+        self.join()
+        for ex in self._executors.values():
+            ex.shutdown(wait=True)
+
+    def __enter__(self) -> "Uploader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
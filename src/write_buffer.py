@@ -0,0 +1,210 @@
+# src/write_buffer.py
+# Etkileşimli yorum eklemeleri için yazma birleştirici (write-coalescing) arka plan yazıcısı.
+#
+# * Süreç başına tek örnek (arayüzde st.cache_resource ile tüm oturumlar paylaşır).
+# * `submit()` yorumu kuyruğa koyar ve bir Future döner; Future, nokta Qdrant'a `wait=True` ile
+#   yazıldığında (kalıcı olduğunda) nokta ID'siyle, yazım başarısızsa hatayla sonuçlanır.
+# * Arka plan iş parçacığı ilk bekleyen kayıttan itibaren en fazla `max_delay` saniye ya da
+#   `max_batch` kayıt biriktirir; metinler model başına TEK çağrıda embed edilir ve noktalar
+#   shard-key (dil) başına tek upsert isteğiyle Uploader üzerinden yazılır (tekrar deneme dahil).
+# * Yazım sürerken yeni kayıtlar toplanmaya devam eder (shard başına UPSERT_IN_FLIGHT penceresi).
+
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+from loguru import logger
+
+from src.clients import get_client, get_embedder
+from src.config import settings
+from src.model_registry import collection_models
+from src.projection import project
+from src.uploader import BatchResult, Uploader
+
+_STOP = object()
+
+
+@dataclass
+class PendingWrite:
+    text: str
+    lang: str
+    payload: dict
+    id: str = field(default_factory=lambda: str(uuid4()))
+    future: Future = field(default_factory=Future)
+    queued: float = field(default_factory=time.perf_counter)
+
+
+class WriteBuffer:
+    """
+    Bekleyen eklemeleri toplayıp batch halinde embed eden ve shard-key başına gruplanmış
+    upsert'lerle yazan arka plan yazıcısı. `on_written(shard_key)` her başarılı yazımdan sonra
+    çağrılır (ör. sonuç önbelleğini geçersizleştirmek için).
+    """
+
+    def __init__(
+        self,
+        client=None,
+        collection: Optional[str] = None,
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        on_written: Optional[Callable[[str], None]] = None,
+    ):
+        self.collection = collection or settings.COLLECTION
+        self.max_batch = max(1, max_batch or settings.WRITE_BUFFER_MAX_BATCH)
+        self.max_delay = settings.WRITE_BUFFER_MAX_DELAY if max_delay is None else max_delay
+        self.on_written = on_written
+        self.uploader = Uploader(
+            client or get_client(),
+            self.collection,
+            in_flight=settings.UPSERT_IN_FLIGHT,
+            max_bytes=settings.UPSERT_MAX_MB * 1024 * 1024,
+            retries=settings.UPSERT_RETRIES,
+            backoff=settings.UPSERT_BACKOFF,
+            keep_results=False,
+        )
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.writes = 0          # kalıcı olarak yazılan nokta
+        self.failed = 0          # yazılamayan nokta
+        self.flushes = 0         # embed + upsert turu (model çağrısı = flushes × model sayısı)
+        self.requests = 0        # upsert isteği (shard-key grubu)
+        self._thread = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # süreç kapanırken bekleyen yazımlar boşaltılır
+
+    def submit(self, text: str, lang: str, payload: Optional[dict] = None) -> Future:
+        """Yorumu kuyruğa ekler; yazım kalıcı olunca nokta ID'siyle sonuçlanan Future döner."""
+        item = PendingWrite(text, lang, {"language": lang, **(payload or {})})
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBuffer kapatıldı")
+            self._queue.put(item)
+        return item.future
+
+    def write(self, text: str, lang: str, payload: Optional[dict] = None, timeout: Optional[float] = None) -> str:
+        """`submit` + kalıcı olana kadar bekleme; nokta ID'sini döner."""
+        return self.submit(text, lang, payload).result(timeout)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[PendingWrite] = [first]
+            deadline = time.monotonic() + self.max_delay
+            # İlk kayıttan sonra en fazla max_delay beklenir; batch dolarsa hemen yazılır
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._flush(batch)
+            except Exception as exc:  # noqa: BLE001 — yazıcı iş parçacığı hiçbir hatayla ölmemeli
+                logger.exception(f"Yazma tamponu: beklenmeyen hata: {exc}")
+                self._resolve(batch, exc)
+
+    def _flush(self, batch: List[PendingWrite]) -> None:
+        self.flushes += 1
+        handed: List[PendingWrite] = []   # Uploader'a verilenler; sonuçları _on_uploaded'a gelir
+        try:
+            texts = [p.text for p in batch]
+            # Koleksiyondaki her modelin named vector'ü: model başına tek embedding çağrısı.
+            # Önbellek namespace'i arayüze ayrılmıştır: "documents"a ingest / reindex süreçleri yazar
+            # ve bir namespace'e aynı anda tek süreç yazabilir.
+            vectors: Dict[str, np.ndarray] = {}
+            for spec in collection_models():
+                embedder = get_embedder(namespace="ui_writes", model=spec.name)
+                vecs = np.vstack(list(embedder.embed(spec.document_texts(texts)))).astype(np.float32, copy=False)
+                vectors[spec.vector] = project(vecs, self.collection, spec.name)
+
+            by_lang: Dict[str, List[int]] = {}
+            for i, p in enumerate(batch):
+                by_lang.setdefault(p.lang, []).append(i)
+            for lang, idx in by_lang.items():
+                items = [batch[i] for i in idx]
+                self.requests += 1
+                self.uploader.submit(
+                    lang,
+                    ids=[p.id for p in items],
+                    vectors={name: m[idx] for name, m in vectors.items()},
+                    payloads=[p.payload for p in items],
+                    tag=items,
+                    on_done=self._on_uploaded,
+                )
+                handed.extend(items)
+        except Exception as exc:  # noqa: BLE001 — hata bekleyen çağıranlara iletilir
+            sent = {p.id for p in handed}
+            rest = [p for p in batch if p.id not in sent]
+            logger.exception(f"Yazma tamponu: {len(rest)} yorum yazılamadı: {exc}")
+            self._resolve(rest, exc)
+
+    def _on_uploaded(self, result: BatchResult) -> None:
+        error = None if result.ok else result.errors[0]
+        try:
+            if error is not None:
+                logger.error(f"Yazma tamponu: {result.shard_key} shard'ına {result.count} yorum yazılamadı: {error}")
+            elif self.on_written is not None:
+                try:
+                    self.on_written(result.shard_key)   # önce önbellek, sonra çağıran: yeni yorum hemen aranabilir
+                except Exception as exc:  # noqa: BLE001 — yazım kalıcı; yalnızca geri çağrı başarısız
+                    logger.exception(f"Yazma tamponu: {result.shard_key} için on_written hata verdi: {exc}")
+        finally:
+            self._resolve(result.tag, error)
+        if error is not None:
+            return
+        logger.debug(
+            f"Yazma tamponu: {result.shard_key} ← {result.count} yorum, {result.seconds * 1000:.0f} ms "
+            f"(kuyrukta en uzun {max(time.perf_counter() - p.queued for p in result.tag) * 1000:.0f} ms)"
+        )
+
+    def _resolve(self, items: List[PendingWrite], error: Optional[BaseException]) -> None:
+        # İki hata yolu aynı kaydı çözmeye çalışırsa ilk sonuç kalır
+        items = [p for p in items if not p.future.done()]
+        with self._lock:
+            if error is None:
+                self.writes += len(items)
+            else:
+                self.failed += len(items)
+        for p in items:
+            if error is None:
+                p.future.set_result(p.id)
+            else:
+                p.future.set_exception(error)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.writes + self.failed
+            return {
+                "writes": self.writes,
+                "failed": self.failed,
+                "flushes": self.flushes,
+                "requests": self.requests,
+                "pending": self._queue.qsize(),
+                "points_per_flush": done / self.flushes if self.flushes else 0.0,
+            }
+
+    def close(self) -> None:
+        """Kuyruktaki kayıtları yazar, yazıcıyı ve yükleyiciyi kapatır (tekrar çağrılabilir)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        self.uploader.close()
@@ -4,7 +4,7 @@
 * 6 dil (en, es, fr, de, zh, ja)
 * Dil ve yıldız filtreleri opsiyonel
 * Sonuç limiti 1‑8
-* Yeni yorum eklerken PointStruct artık `id` ister → uuid4() kullanıyoruz
+* Yeni yorumlar paylaşılan yazma tamponuyla (src/write_buffer.py) eklenir; id → uuid4()
 """
 
 # -----------------------------------------------------------------------------
@@ -19,15 +19,17 @@ from __future__ import annotations
 
 import warnings
 from typing import Sequence
-from uuid import uuid4
 
 import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
-from fastembed import TextEmbedding
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct
 
-from src.qdrant_setup import client
+from src import clients
+from src.clients import get_client
+from src.model_registry import get_spec
+from src.projection import project
+from src.search import build_star_filter, search_params, search_shards
+from src.write_buffer import WriteBuffer
 from src.config import settings
 
 # -----------------------------------------------------------------------------
@@ -45,13 +47,19 @@ st.set_page_config(
 )
 
 
+# (TR) Süreç genelinde paylaşılan, sorgu önbellekli embedder (src/clients.py); model tek kez
+#      yüklenir ve qdrant_ui.py ile aynı "queries" namespace'ini kullanır.
+
+def get_embedder():
+    return clients.get_embedder(namespace="queries", model=get_spec().name)
+
+
 @st.cache_resource(show_spinner=False)
-# (TR) Embedder nesnesini bellekte önbelleğe alıyoruz; tekrar çağrıldığında
-#      yeniden yüklenmesini engeller, performans kazandırır.
-#      TextEmbedding: FastEmbed kitaplığından çok‑dilli gömme (embedding) modeli.
+# (TR) Tüm oturumların paylaştığı arka plan yazıcısı: yorum, koleksiyondaki her modelin
+#      named vector'üyle (projeksiyon dahil) embed edilip shard'ına yazılır.
 
-def get_embedder() -> TextEmbedding:
-    return TextEmbedding(settings.MODEL_NAME, device=settings.DEVICE)
+def get_write_buffer() -> WriteBuffer:
+    return WriteBuffer()
 
 # (TR) Kullanıcıya sunulacak sabit dil ve yıldız seçenekleri
 LANG_OPTS = ["en", "es", "fr", "de", "zh", "ja"]
@@ -104,46 +112,32 @@ def query_qdrant(text: str, langs: Sequence[str], stars: Sequence[int], limit: i
     # (TR) Hiç dil seçilmediyse tüm dilleri ara
     if not langs:
         langs = LANG_OPTS
-    star_filter_flag = bool(stars)
-
-    # (TR) Sorgu metnini embedding vektörüne dönüştür
-    vec = next(get_embedder().embed([text]))
-    collected: list[dict] = []
-    for lang in langs:
-        q_filter: Filter | None = None
-        if star_filter_flag:
-            # (TR) Yıldız filtresi: OR (should) koşulları
-            q_filter = Filter(
-                should=[FieldCondition(key="stars", match=MatchValue(value=s)) for s in stars]
-            )
-        try:
-            resp = client.query_points(
-                collection_name=settings.COLLECTION,
-                query=vec,
-                limit=limit,  # (TR) Her shard için en fazla `limit` kayıt çek
-                with_payload=True,
-                shard_key_selector=lang,
-                query_filter=q_filter,
-            )
-            # (TR) Her bir nokta için gerekli alanları topla
-            collected.extend(
-                {
-                    "language": p.payload.get("language", lang),
-                    "stars": p.payload.get("stars"),
-                    "score": round(p.score, 3),
-                }
-                for p in resp.points
-            )
-        except Exception as exc:
-            st.error(f"Qdrant query failed for '{lang}': {exc}")
-
-    if not collected:
-        return pd.DataFrame()
 
-    # (TR) Tüm shard’lardan gelen kayıtlar → en yüksek skorluları seç
-    df_all = pd.DataFrame(collected)
-    df_top = df_all.sort_values("score", ascending=False).head(limit).reset_index(drop=True)
-    return df_top
+    # (TR) Sorgu metnini embedding vektörüne dönüştür (modelin sorgu önekiyle); koleksiyon PCA ile
+    #      küçültülmüşse sorgu vektörü de aynı projeksiyondan geçirilir (aksi halde boyut uyuşmaz)
+    spec = get_spec()
+    vec = project(next(get_embedder().embed(spec.query_texts([text]))), model=spec.name)
+    # (TR) Yıldız filtresi: tek koşul (ardışık yıldızlar → Range, diğerleri → MatchAny);
+    #      'stars' payload indeksi sayesinde nokta nokta tarama yapılmaz
+    q_filter = build_star_filter(stars)
+
+    # (TR) Shard'lar eşzamanlı sorgulanır; sonuçlar sınırlı heap ile skora göre birleştirilir.
+    #      Süresi dolan / hata veren shard sonucu bekletmez, yalnızca uyarı olarak gösterilir.
+    res = search_shards(
+        get_client(),
+        settings.COLLECTION,
+        vec,
+        langs,
+        limit,  # (TR) Her shard için en fazla `limit` kayıt çek
+        query_filter=q_filter,
+        timeout=settings.SEARCH_TIMEOUT,
+        params=search_params(),  # (TR) Nicemleme açıksa rescore / oversampling ayarları
+        using=spec.vector,  # (TR) Sorguyu embed eden modelin named vector'ü
+    )
+    for lang, reason in res.failed.items():
+        st.warning(f"Qdrant query failed for '{lang}': {reason}")
+
+    return pd.DataFrame(res.records())
 
 
 # -----------------------------------------------------------------------------
@@ -272,6 +266,11 @@ if st.button("Search"):
     with st.spinner("Searching…"):
         df = query_qdrant(query, sel_langs, sel_stars, limit)
 
+    # Önbellek isabet/ıskalama istatistikleri (model süresi ne kadar kazanıldı?)
+    cache = getattr(get_embedder(), "cache", None)
+    if cache is not None:
+        st.sidebar.caption(cache.report())
+
     tab_res, tab_gfx = st.tabs(["Results", "Graphs"])
     with tab_res:
         show_table(df)
@@ -293,16 +292,14 @@ with st.expander("Add new review to database"):
     with c2:
         new_star = st.selectbox("Stars", STAR_OPTS, index=4)
 
-    # (TR) Kaydet butonu: yeni embed ve Qdrant upsert
+    # (TR) Kaydet butonu: yorum yazma tamponuna verilir; nokta Qdrant'a kalıcı yazılınca döner
     if st.button("Save to DB") and new_text:
-        vec = next(get_embedder().embed([new_text]))
-        point = PointStruct(
-            id=str(uuid4()),  # (TR) Her yorum için benzersiz UUID
-            vector=vec,
-            payload={"language": new_lang, "stars": new_star},
-        )
-        client.upsert(settings.COLLECTION, [point], shard_key_selector=new_lang)
-        st.success("Review added!")
+        try:
+            get_write_buffer().write(new_text, new_lang, {"stars": new_star}, timeout=settings.WRITE_TIMEOUT)
+        except Exception as exc:  # noqa: BLE001
+            st.error(f"Review could not be saved: {exc}")
+        else:
+            st.success("Review added!")
 
 
 # -----------------------------------------------------------------------------
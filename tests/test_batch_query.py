@@ -0,0 +1,62 @@
+import os
+
+import pyarrow.parquet as pq
+
+from src.batch_query import load_queries, result_schema, write_parquet
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "Example.txt")
+
+
+def test_example_file_has_no_separator_or_header_queries():
+    queries = load_queries(EXAMPLE)
+    texts = [q.text for q in queries]
+    assert not any(t.strip("-=") == "" for t in texts)
+    assert not {"English/Spanish", "French/German", "English", "Chinese"} & set(texts)
+    assert [q.qid for q in queries] == list(range(len(queries)))
+
+
+def test_example_file_languages():
+    queries = load_queries(EXAMPLE)
+    by_lang = {}
+    for q in queries:
+        by_lang.setdefault(q.lang, []).append(q)
+    # İki bölüm × 10 yıldızlı satır, her tek dilli başlık için
+    for lang in ("en", "de", "fr", "es", "ja", "zh"):
+        assert len(by_lang[lang]) == 20
+        assert {q.stars for q in by_lang[lang]} == {1, 2, 3, 4, 5}
+    # Karma başlıkların altındaki satırlar tek bir dile (ör. son görülen "zh") bağlanmaz
+    mixed = [q for q in queries if q.text.startswith("Arrived broken y el soporte")]
+    assert len(mixed) == 1 and mixed[0].lang is None and mixed[0].stars == 1
+
+
+def test_headers_and_separators(tmp_path):
+    path = tmp_path / "q.txt"
+    path.write_text(
+        "German\n★2: billig\n---\n\nEnglish / Spanish\n★5: great y barato\n===\nFrench\nplain query\n",
+        encoding="utf-8",
+    )
+    queries = load_queries(str(path))
+    assert [(q.text, q.lang, q.stars) for q in queries] == [
+        ("billig", "de", 2),
+        ("great y barato", None, 5),
+        ("plain query", "fr", None),
+    ]
+
+
+def _row(qid, lang=None, stars=None):
+    return {
+        "qid": qid, "query": f"q{qid}", "query_lang": lang, "query_stars": None, "shard_key": "en",
+        "rank": 1, "id": str(qid), "score": 0.5, "language": "en", "stars": stars,
+    }
+
+
+def test_write_parquet_null_first_chunk(tmp_path):
+    # İlk parçada dil / yıldız kolonları tamamen boş; sonraki parça değer taşıyor
+    path = str(tmp_path / "out.parquet")
+    rows = [_row(0), _row(1), _row(2, "de", 3)]
+    assert write_parquet(iter(rows), path, row_group=2) == 3
+    table = pq.read_table(path)
+    assert table.schema.equals(result_schema())
+    assert pq.ParquetFile(path).num_row_groups == 2
+    assert table.column("query_lang").to_pylist() == [None, None, "de"]
+    assert table.column("stars").to_pylist() == [None, None, 3]
@@ -0,0 +1,13 @@
+import re
+
+from src.batch_query import _HEADER_LANG
+from src.benchmark import DEFAULT_QUERIES, query_texts
+
+
+def test_default_query_set_is_clean():
+    texts = query_texts(DEFAULT_QUERIES)
+    assert len(texts) >= 120
+    for text in texts:
+        assert not re.fullmatch(r"[-=_*~]+", text), text
+        assert not all(p.strip().lower() in _HEADER_LANG for p in text.split("/")), text
+        assert not text.startswith("★"), text
@@ -0,0 +1,70 @@
+import json
+
+from src.checkpoint import Manifest, file_fingerprint, point_id
+
+
+def _manifest(tmp_path):
+    return Manifest(str(tmp_path / "manifest.json"))
+
+
+def test_point_id_is_deterministic():
+    assert point_id("en", "en.parquet", 7) == point_id("en", "en.parquet", 7)
+    assert point_id("en", "en.parquet", 7) != point_id("de", "en.parquet", 7)
+    assert point_id("en", "en.parquet", 7) != point_id("en", "en.parquet", 8)
+
+
+def test_commit_advances_only_over_contiguous_prefix(tmp_path):
+    m = _manifest(tmp_path)
+    key = Manifest.key("c", "en", "en.parquet")
+    assert m.start_row(key, "fp") == 0
+    # Upsert'ler sırasız biter: 100..200 önce gelir, önek 0'da kalmalı
+    m.commit(key, 100, 100)
+    assert m.rows(key) == 0
+    m.commit(key, 200, 50)
+    assert m.rows(key) == 0
+    m.commit(key, 0, 100)
+    assert m.rows(key) == 250
+
+
+def test_resume_after_restart(tmp_path):
+    m = _manifest(tmp_path)
+    key = Manifest.key("c", "en", "en.parquet", "bge_small_en")
+    m.start_row(key, "fp")
+    m.commit(key, 0, 64)
+    m.commit(key, 128, 64)  # 64..128 yazılmadan süreç çöktü
+    resumed = _manifest(tmp_path)
+    assert resumed.start_row(key, "fp") == 64
+    # Yazılmamış aradaki batch tekrar yüklenir, sonra bekleyen kayıt yeniden gelir
+    resumed.commit(key, 64, 64)
+    resumed.commit(key, 128, 64)
+    assert _manifest(tmp_path).rows(key) == 192
+
+
+def test_changed_file_restarts_from_zero(tmp_path):
+    m = _manifest(tmp_path)
+    key = Manifest.key("c", "de", "de.parquet")
+    m.start_row(key, "v1")
+    m.commit(key, 0, 10)
+    assert _manifest(tmp_path).start_row(key, "v2") == 0
+
+
+def test_vectors_and_collections_are_tracked_separately(tmp_path):
+    m = _manifest(tmp_path)
+    a = Manifest.key("c_v1", "en", "en.parquet", "a")
+    b = Manifest.key("c_v1", "en", "en.parquet", "b")
+    other = Manifest.key("c_v2", "en", "en.parquet", "a")
+    for key in (a, b, other):
+        m.start_row(key, "fp")
+    m.commit(a, 0, 5)
+    assert (m.rows(a), m.rows(b), m.rows(other)) == (5, 0, 0)
+    assert m.drop("c_v1") == 2
+    state = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert list(state) == [other]
+
+
+def test_file_fingerprint_changes_with_content(tmp_path):
+    path = tmp_path / "x.parquet"
+    path.write_bytes(b"a")
+    before = file_fingerprint(str(path))
+    path.write_bytes(b"ab")
+    assert file_fingerprint(str(path)) != before
@@ -0,0 +1,37 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+# data/ paket değil; betik dosya yolundan yüklenir
+_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "data", "data_reduce.py")
+_spec = importlib.util.spec_from_file_location("data_reduce", _PATH)
+data_reduce = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(data_reduce)
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 50, 99, 100, 1_000])
+def test_quotas_sum_exactly_and_fit_groups(n):
+    counts = np.array([50, 30, 15, 4, 1])
+    q = data_reduce.quotas(counts, n)
+    assert int(q.sum()) == min(n, int(counts.sum()))
+    assert (q <= counts).all() and (q >= 0).all()
+
+
+def test_quotas_fraction_and_empty():
+    assert data_reduce.quotas(np.array([60, 40]), 0.5).tolist() == [30, 20]
+    assert data_reduce.quotas(np.array([0, 0]), 10).tolist() == [0, 0]
+
+
+def test_stratified_indices_keep_distribution_and_are_deterministic():
+    rng = np.random.default_rng(0)
+    ratings = rng.choice(np.arange(1, 6), size=10_000, p=[0.1, 0.1, 0.2, 0.3, 0.3])
+    idx = data_reduce.stratified_indices(ratings, 1_000, seed=1)
+    assert len(idx) == 1_000 and len(np.unique(idx)) == 1_000
+    assert (np.diff(idx) > 0).all()
+    full = np.bincount(ratings, minlength=6) / len(ratings)
+    sample = np.bincount(ratings[idx], minlength=6) / len(idx)
+    assert np.abs(full - sample).max() < 0.002
+    assert np.array_equal(idx, data_reduce.stratified_indices(ratings, 1_000, seed=1))
+    assert not np.array_equal(idx, data_reduce.stratified_indices(ratings, 1_000, seed=2))
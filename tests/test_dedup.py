@@ -0,0 +1,41 @@
+import numpy as np
+
+from src.dedup import Deduper
+
+TEXT = "This vacuum cleaner is great, the suction is strong and the battery lasts a long time."
+
+
+def test_exact_and_near_duplicates_are_dropped():
+    d = Deduper()
+    keep = d.dedupe("en", [0, 1, 2], [TEXT, TEXT, "Completely unrelated review about a pair of shoes."])
+    assert keep.tolist() == [True, False, True]
+    # Tek karakterlik fark da yakın kopya sayılmalı
+    keep = d.dedupe("en", [3], [TEXT.replace("great", "great!")])
+    assert not keep[0]
+    assert d.dup_counts() == {"en": {0: 3}}
+
+
+def test_counts_survive_language_switch():
+    d = Deduper()
+    d.dedupe("en", ["a", "b"], [TEXT, TEXT])
+    # Dil değişince indeks sıfırlanır: aynı metin yeni dilde tekrar tutulur
+    keep = d.dedupe("de", ["c", "d"], [TEXT, TEXT])
+    assert keep.tolist() == [True, False]
+    assert d.dup_counts() == {"en": {"a": 2}, "de": {"c": 2}}
+    assert d.seen == {"en": 2, "de": 2}
+    assert d.dropped == {"en": 1, "de": 1}
+
+
+def test_signature_is_deterministic_per_seed():
+    a, b, c = Deduper(seed=3), Deduper(seed=3), Deduper(seed=4)
+    assert np.array_equal(a.signature(TEXT), b.signature(TEXT))
+    assert not np.array_equal(a.signature(TEXT), c.signature(TEXT))
+
+
+def test_bands_must_divide_num_perm():
+    try:
+        Deduper(num_perm=64, bands=7)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ValueError bekleniyordu")
@@ -0,0 +1,57 @@
+import numpy as np
+
+from src.embed_cache import CachedEmbedder, EmbeddingCache, normalize_text, text_key
+
+
+class CountingEmbedder:
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.seen = []
+
+    def embed(self, texts):
+        for t in texts:
+            self.seen.append(t)
+            yield np.full(self.dim, float(len(t)), dtype=np.float32)
+
+
+def test_key_is_stable_across_whitespace_and_unicode_forms():
+    assert normalize_text("  Muy \t bien \n") == "Muy bien"
+    # "é" tek kod noktası (NFC) ve e + birleşik aksan (NFD) aynı anahtara düşer
+    assert text_key(normalize_text("caf\u00e9")) == text_key(normalize_text("cafe\u0301"))
+    assert text_key("a") != text_key("b")
+    assert 0 < text_key("a") < 2 ** 64  # 0 boş slot için ayrılmış
+
+
+def test_cached_embedder_dedupes_and_keeps_order(tmp_path):
+    model = CountingEmbedder()
+    emb = CachedEmbedder(model, EmbeddingCache(str(tmp_path), "m", "test", max_mb=1))
+    out = list(emb.embed(["aa", "b", "aa ", "ccc"]))
+    assert [v[0] for v in out] == [2, 1, 2, 3]
+    assert model.seen == ["aa", "b", "ccc"]
+    list(emb.embed(["b", "ccc"]))
+    assert model.seen == ["aa", "b", "ccc"]
+    assert (emb.cache.hits, emb.cache.misses) == (3, 3)
+
+
+def test_cache_persists_across_instances(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", "test", max_mb=1)
+    cache.put_many([text_key("x")], [np.arange(4, dtype=np.float32)])
+    cache.flush()
+    reopened = EmbeddingCache(str(tmp_path), "m", "test", max_mb=1)
+    (vec,) = reopened.get_many([text_key("x")])
+    assert vec.tolist() == [0, 1, 2, 3]
+    # Başka bir namespace aynı dizini paylaşmaz
+    assert EmbeddingCache(str(tmp_path), "m", "other", max_mb=1).get_many([text_key("x")]) == [None]
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", "test", max_mb=1)
+    dim = 65536  # 1 MB / (65536 × 4 bayt) → 4 slot
+    keys = [1, 2, 3, 4]
+    cache.put_many(keys, [np.full(dim, k, np.float32) for k in keys])
+    assert cache.capacity == 4 and len(cache) == 4
+    cache.get_many([1])          # 1 yeniden kullanıldı → en eski 2
+    cache.put_many([5], [np.full(dim, 5, np.float32)])
+    assert cache.evictions == 1
+    got = cache.get_many([1, 2, 5])
+    assert got[0][0] == 1 and got[1] is None and got[2][0] == 5
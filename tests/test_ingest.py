@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src import embed_and_ingest
+from src.checkpoint import Manifest, file_fingerprint, point_id
+from src.config import settings
+from src.model_registry import get_spec
+
+A = "The headphones broke after two days and the seller never answered my messages."
+B = "Fast delivery, well packed, and the colour is exactly like in the pictures."
+C = "Too small for my hands; I returned it and bought the larger model instead."
+TEXTS = [A, A, B, A, B, C]
+
+
+class FakeClient:
+    def __init__(self):
+        self.upserted = []
+        self.payloads = {}
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, shard_key_selector, wait):
+        with self.lock:
+            self.upserted.extend(points.ids)
+
+    def set_payload(self, collection_name, payload, points, shard_key_selector, wait):
+        with self.lock:
+            for i in points:
+                self.payloads[i] = payload["dup_count"]
+
+
+class FakeEmbedder:
+    def embed(self, texts):
+        for t in texts:
+            yield np.full(4, len(t), dtype=np.float32)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    pq.write_table(pa.table({"text": TEXTS, "stars": [1, 1, 2, 1, 2, 3]}), str(tmp_path / "en.parquet"))
+    client = FakeClient()
+    monkeypatch.setattr(embed_and_ingest, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(embed_and_ingest, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(embed_and_ingest, "LANGS", ["en"])
+    monkeypatch.setattr(embed_and_ingest, "BATCH_SIZE", 2)
+    monkeypatch.setattr(embed_and_ingest, "get_client", lambda: client)
+    monkeypatch.setattr(embed_and_ingest, "get_embedder", lambda namespace, model=None: FakeEmbedder())
+    monkeypatch.setattr(settings, "DEDUP", True)
+    monkeypatch.setattr(settings, "EMBED_PROCESSES", 0)
+    return tmp_path, client
+
+
+def _key():
+    return Manifest.key("t", "en", "en.parquet", get_spec().vector)
+
+
+def test_dedup_counts_survive_resume(env):
+    tmp_path, client = env
+    # Önceki çalışma ilk 4 satırı yükleyip çöktü (dup_count'lar hiç yazılmadı)
+    m = Manifest(str(tmp_path / "manifest.json"))
+    m.start_row(_key(), file_fingerprint(str(tmp_path / "en.parquet")))
+    m.commit(_key(), 0, 4)
+
+    totals, failed = embed_and_ingest.ingest(collection="t")
+    assert not failed
+    # Satır 4 (B), önceki çalışmadaki satır 2'nin kopyası: yalnızca satır 5 yeni nokta
+    assert client.upserted == [point_id("en", "en.parquet", 5)]
+    assert client.payloads == {point_id("en", "en.parquet", 0): 3, point_id("en", "en.parquet", 2): 2}
+    assert Manifest(str(tmp_path / "manifest.json")).rows(_key()) == 6
+
+
+def test_dedup_rejects_embedding_pool(env, monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_PROCESSES", 2)
+    with pytest.raises(RuntimeError, match="DEDUP"):
+        embed_and_ingest.ingest(collection="t")
+
+
+def test_uploader_closed_when_pipeline_fails(env, monkeypatch):
+    closed = []
+
+    class Failing(FakeEmbedder):
+        def embed(self, texts):
+            raise RuntimeError("model")
+
+    class Uploader(embed_and_ingest.Uploader):
+        def close(self):
+            closed.append(True)
+            super().close()
+
+    monkeypatch.setattr(embed_and_ingest, "get_embedder", lambda namespace, model=None: Failing())
+    monkeypatch.setattr(embed_and_ingest, "Uploader", Uploader)
+    with pytest.raises(RuntimeError, match="model"):
+        embed_and_ingest.ingest(collection="t")
+    assert closed == [True]
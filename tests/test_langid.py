@@ -0,0 +1,44 @@
+import pytest
+
+from src import langid
+from src.config import settings
+
+
+@pytest.fixture(autouse=True)
+def no_model(tmp_path, monkeypatch):
+    # Eğitilmiş model yokken yalnızca yazı sistemi kuralları geçerli
+    monkeypatch.setattr(settings, "LANGID_PATH", str(tmp_path / "langid.npz"))
+
+
+def test_candidates_by_script():
+    assert langid.candidates(langid._codepoints("これはとても良い商品です")) == ["ja"]
+    assert langid.candidates(langid._codepoints("质量很好")) == ["ja", "zh"]
+    assert langid.candidates(langid._codepoints("very good product")) == list(langid.LATIN)
+    # Desteklenmeyen yazı sistemi / harfsiz metin: tüm diller
+    assert langid.candidates(langid._codepoints("아주 좋아요")) == list(langid.LANGS)
+    assert langid.candidates(langid._codepoints("12345 !!!")) == list(langid.LANGS)
+
+
+def test_detect_without_model_is_uniform_over_candidates():
+    probs = langid.detect("质量很好")
+    assert probs["ja"] == pytest.approx(0.5) and probs["zh"] == pytest.approx(0.5)
+    assert probs["en"] == 0.0
+    assert sum(probs.values()) == pytest.approx(1.0)
+
+
+def test_route_narrows_or_fans_out():
+    assert langid.route("これはとても良い商品です") == ["ja"]
+    assert langid.route("质量很好", threshold=0.9) == ["ja", "zh"]
+    assert langid.route("very good product", threshold=0.9) == list(langid.LATIN)
+    assert langid.route("아주 좋아요") == list(langid.LANGS)
+
+
+def test_trained_model_picks_language(tmp_path):
+    model = langid.LangModel.fit({
+        "en": ["the product is very good and the price is fine"] * 5,
+        "de": ["das produkt ist sehr gut und der preis ist in ordnung"] * 5,
+    })
+    model.save(settings.LANGID_PATH)
+    probs = langid.detect("the price is very good", langs=("en", "de"))
+    assert next(iter(probs)) == "en"
+    assert langid.route("das ist sehr gut", langs=("en", "de"), threshold=0.6) == ["de"]
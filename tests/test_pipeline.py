@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from src.pipeline import Stage, run_pipeline
+
+
+def test_all_items_flow_through_every_stage():
+    out = []
+    lock = threading.Lock()
+
+    def sink(x):
+        with lock:
+            out.append(x)
+
+    run_pipeline(range(100), [Stage("double", lambda x: x * 2, 3), Stage("sink", sink, 2)], depth=2)
+    assert sorted(out) == [x * 2 for x in range(100)]
+
+
+def test_none_drops_item():
+    out = []
+    run_pipeline(range(10), [Stage("odd", lambda x: x if x % 2 else None), Stage("sink", out.append)])
+    assert sorted(out) == [1, 3, 5, 7, 9]
+
+
+def test_stage_error_stops_pipeline_and_is_raised():
+    seen = []
+
+    def fail_at_5(x):
+        if x == 5:
+            raise ValueError("bad row")
+        return x
+
+    def endless():
+        i = 0
+        while True:  # hata hattı durdurmazsa test takılır
+            yield i
+            i += 1
+
+    with pytest.raises(ValueError, match="bad row"):
+        run_pipeline(endless(), [Stage("check", fail_at_5), Stage("sink", seen.append)], depth=1)
+    assert 5 not in seen
+
+
+def test_source_error_is_raised():
+    def broken():
+        yield 1
+        raise OSError("parquet read failed")
+
+    with pytest.raises(OSError, match="parquet read failed"):
+        run_pipeline(broken(), [Stage("sink", lambda x: None)])
+
+
+def test_requires_a_stage():
+    with pytest.raises(ValueError):
+        run_pipeline([], [])
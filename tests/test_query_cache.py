@@ -0,0 +1,112 @@
+import numpy as np
+
+from src.query_cache import QueryCache, ResultCache, VectorLRU, vector_digest
+
+
+def _key(cache, langs=("en", "de"), extra=()):
+    return cache.key(vector_digest(np.ones(4)), langs, (), 10, extra=extra)
+
+
+def test_write_to_a_shard_invalidates_results_that_include_it():
+    cache = ResultCache(ttl=60)
+    both, only_de = _key(cache), _key(cache, ("de",))
+    cache.put(both, "both")
+    cache.put(only_de, "de")
+    cache.invalidate("en")
+    assert cache.get(both) is None
+    assert cache.get(only_de) == "de"
+    assert cache.invalidations == 1
+
+
+def test_result_is_not_stored_if_a_shard_changed_during_search():
+    cache = ResultCache(ttl=60)
+    key = _key(cache)
+    gens = cache.snapshot(key)
+    cache.invalidate("de")            # arama sürerken gelen yazım
+    assert cache.put(key, "stale", gens) is False
+    assert cache.get(key) is None
+    assert cache.put(key, "fresh", cache.snapshot(key)) is True
+    assert cache.get(key) == "fresh"
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.query_cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(ttl=5)
+    key = _key(cache)
+    cache.put(key, "r")
+    now[0] += 4
+    assert cache.get(key) == "r"
+    now[0] += 2
+    assert cache.get(key) is None
+
+
+def test_key_separates_collection_targets_and_params():
+    cache = ResultCache(ttl=60)
+    v1 = _key(cache, extra=(None, None, "bge", "reviews_v1"))
+    v2 = _key(cache, extra=(None, None, "bge", "reviews_v2"))
+    cache.put(v1, "old")
+    assert cache.get(v2) is None
+    # Dil sırası anahtarı değiştirmez
+    assert _key(cache, ("de", "en")) == _key(cache, ("en", "de"))
+
+
+def test_result_cache_is_bounded():
+    cache = ResultCache(ttl=60, maxsize=2)
+    keys = [cache.key(str(i), ["en"], (), 10) for i in range(3)]
+    for k in keys:
+        cache.put(k, k)
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) == keys[2]
+
+
+def test_vector_lru_embeds_once_per_normalized_text():
+    calls = []
+    lru = VectorLRU(maxsize=2)
+
+    def embed(text):
+        calls.append(text)
+        return np.zeros(2)
+
+    lru.get_or_embed("m", "good  phone", embed)
+    lru.get_or_embed("m", "good phone ", embed)
+    lru.get_or_embed("other", "good phone", embed)
+    assert calls == ["good  phone", "good phone"]
+    assert (lru.hits, lru.misses) == (1, 2)
+
+
+def test_query_cache_stats():
+    qc = QueryCache(4, 60, 4)
+    key = _key(qc.results)
+    qc.results.get(key)
+    qc.results.put(key, "r")
+    qc.results.get(key)
+    qc.invalidate("en")
+    stats = qc.stats()
+    assert stats["result_hit_rate"] == 0.5 and stats["invalidations"] == 1
+
+
+def test_collection_target_follows_alias(monkeypatch):
+    from qdrant_client import QdrantClient, models
+
+    from src import clients
+
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(clients, "_client", client)
+    monkeypatch.setattr(clients, "_targets", {})
+    for name in ("reviews_v1", "reviews_v2"):
+        client.create_collection(name, vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+
+    def point_alias(collection, delete=False):
+        ops = [models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name="reviews"))] if delete else []
+        ops.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection, alias_name="reviews")
+        ))
+        client.update_collection_aliases(change_aliases_operations=ops)
+
+    assert clients.collection_target("reviews", ttl=0) == "reviews"  # alias'sız kurulum
+    point_alias("reviews_v1")
+    assert clients.collection_target("reviews", ttl=60) == "reviews_v1"
+    point_alias("reviews_v2", delete=True)
+    assert clients.collection_target("reviews", ttl=60) == "reviews_v1"  # ALIAS_REFRESH dolmadı
+    monkeypatch.setattr(clients, "_targets", {})
+    assert clients.collection_target("reviews") == "reviews_v2"
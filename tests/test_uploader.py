@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.uploader import Uploader, is_transient
+
+
+class FakeClient:
+    """upsert çağrılarını kaydeder; `failures` listesindeki hatalar sırayla fırlatılır."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, shard_key_selector, wait):
+        with self.lock:
+            self.calls.append((shard_key_selector, list(points.ids), points.vectors))
+            if self.failures:
+                raise self.failures.pop(0)
+
+
+def _submit(uploader, n, dim=4, key="en", **kw):
+    ids = list(range(n))
+    vecs = np.arange(n * dim, dtype=np.float32).reshape(n, dim)
+    done = []
+    uploader.submit(key, ids=ids, vectors=vecs, payloads=[{"i": i} for i in ids], tag="t", on_done=done.append, **kw)
+    uploader.join()
+    return done
+
+
+def test_splits_batch_by_request_size():
+    client = FakeClient()
+    # 4 boyut → 16 bayt vektör + 128 bayt ek yük; 300 bayt → istek başına 2 nokta
+    up = Uploader(client, "c", max_bytes=300)
+    assert up.rows_per_request(4) == 2
+    (result,) = _submit(up, 5)
+    up.close()
+    assert result.ok and result.count == 5 and result.requests == 3
+    sent = sorted(i for _, ids, _ in client.calls for i in ids)
+    assert sent == [0, 1, 2, 3, 4]
+    assert max(len(ids) for _, ids, _ in client.calls) == 2
+
+
+def test_retries_transient_errors_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("src.uploader.time.sleep", sleeps.append)
+    client = FakeClient([ConnectionError("reset"), TimeoutError("slow")])
+    up = Uploader(client, "c", retries=3, backoff=0.5)
+    (result,) = _submit(up, 3)
+    up.close()
+    assert result.ok and result.attempts == 3
+    assert len(sleeps) == 2
+    # Üstel geri çekilme ±%50 jitter ile: 0.5s, sonra 1.0s
+    assert 0.25 <= sleeps[0] <= 0.75 and 0.5 <= sleeps[1] <= 1.5
+
+
+def test_gives_up_after_retries(monkeypatch):
+    monkeypatch.setattr("src.uploader.time.sleep", lambda s: None)
+    client = FakeClient([ConnectionError("down")] * 10)
+    up = Uploader(client, "c", retries=2)
+    (result,) = _submit(up, 2)
+    up.close()
+    assert not result.ok and result.attempts == 3
+    assert isinstance(result.errors[0], ConnectionError)
+
+
+def test_permanent_error_is_not_retried():
+    client = FakeClient([ValueError("bad payload")])
+    up = Uploader(client, "c", retries=5)
+    (result,) = _submit(up, 2)
+    up.close()
+    assert not result.ok and result.attempts == 1
+    assert not is_transient(ValueError())
+
+
+def test_partial_failure_reports_whole_batch():
+    # İlk alt-batch kalıcı hata verir, ikincisi başarılı: batch yine de hatalı raporlanır
+    client = FakeClient([ValueError("bad")])
+    up = Uploader(client, "c", in_flight=1, max_bytes=300)
+    (result,) = _submit(up, 4)
+    up.close()
+    assert not result.ok and result.requests == 2 and len(result.errors) == 1
+
+
+def test_unschedulable_parts_are_reported_and_join_returns():
+    client = FakeClient()
+    up = Uploader(client, "c")
+    executor, _ = up._shard("en")
+    executor.shutdown()
+    (result,) = _submit(up, 3)  # join() takılmamalı
+    assert not result.ok and isinstance(result.errors[0], RuntimeError)
+    assert client.calls == []
+
+
+def test_named_vectors_are_sent_per_model():
+    client = FakeClient()
+    up = Uploader(client, "c")
+    done = []
+    up.submit(
+        "de",
+        ids=[1, 2],
+        vectors={"a": np.ones((2, 3), np.float32), "b": np.zeros((2, 2), np.float32)},
+        payloads=[{}, {}],
+        on_done=done.append,
+    )
+    up.close()
+    assert done[0].ok
+    (_, ids, vectors), = client.calls
+    assert ids == [1, 2] and set(vectors) == {"a", "b"} and len(vectors["b"][0]) == 2
+
+
+def test_update_vectors_requires_name():
+    with pytest.raises(ValueError):
+        Uploader(FakeClient(), "c", update_vectors=True)
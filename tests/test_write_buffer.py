@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src import write_buffer
+from src.model_registry import ModelSpec
+from src.uploader import BatchResult
+
+SPEC = ModelSpec("fake-model", "fake", 3)
+
+
+class FakeEmbedder:
+    def embed(self, texts):
+        for t in texts:
+            yield np.full(3, len(t), dtype=np.float32)
+
+
+class FakeClient:
+    def __init__(self):
+        self.points = []
+
+    def upsert(self, collection_name, points, shard_key_selector, wait):
+        self.points.extend((shard_key_selector, i) for i in points.ids)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    monkeypatch.setattr(write_buffer, "collection_models", lambda: [SPEC])
+    monkeypatch.setattr(write_buffer, "get_embedder", lambda namespace, model: FakeEmbedder())
+    monkeypatch.setattr(write_buffer, "project", lambda vecs, collection, model: vecs)
+
+
+def _buffer(client, **kw):
+    return write_buffer.WriteBuffer(client, "c", max_batch=8, max_delay=0.05, **kw)
+
+
+def test_writes_are_coalesced_per_shard(fake_models):
+    client = FakeClient()
+    written = []
+    buf = _buffer(client, on_written=written.append)
+    futures = [buf.submit(f"review {i}", "en" if i % 2 else "de", {"stars": 5}) for i in range(4)]
+    ids = [f.result(timeout=5) for f in futures]
+    buf.close()
+    assert sorted(i for _, i in client.points) == sorted(ids)
+    assert sorted(written) == ["de", "en"]
+    assert buf.stats()["writes"] == 4
+
+
+def test_uploader_submit_error_resolves_futures(fake_models, monkeypatch):
+    buf = _buffer(FakeClient())
+
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("executor closed")
+
+    monkeypatch.setattr(buf.uploader, "submit", broken_submit)
+    with pytest.raises(RuntimeError, match="executor closed"):
+        buf.write("a", "en", timeout=5)
+    # Yazıcı iş parçacığı hayatta: sonraki kayıt da (aynı hatayla) hemen sonuçlanır
+    with pytest.raises(RuntimeError):
+        buf.write("b", "en", timeout=5)
+    assert buf._thread.is_alive()
+    buf.close()
+
+
+def test_on_written_error_still_resolves(fake_models):
+    def boom(shard_key):
+        raise ValueError("cache gone")
+
+    buf = _buffer(FakeClient(), on_written=boom)
+    assert buf.write("a", "fr", timeout=5)
+    buf.close()
+
+
+def test_failed_upload_propagates_error(fake_models):
+    buf = _buffer(FakeClient())
+    item = write_buffer.PendingWrite("a", "en", {})
+    err = ConnectionError("down")
+    buf._on_uploaded(BatchResult("en", [item], 1, errors=[err]))
+    assert item.future.exception() is err
+    buf.close()